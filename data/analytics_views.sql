@@ -40,10 +40,12 @@ WHERE rn = 1;
 
 DROP VIEW IF EXISTS vw_adv_latest;
 CREATE VIEW vw_adv_latest AS
+-- One row per firm: a firm files a new FilingID with every amendment, so the
+-- latest submission per firm_id (see tools/load_staging.py) stands for the adviser.
 WITH ranked AS (
     SELECT *,
            ROW_NUMBER() OVER (
-               PARTITION BY FilingID
+               PARTITION BY firm_id
                ORDER BY DateSubmitted DESC NULLS LAST, ROWID DESC
            ) AS rn
     FROM stg_adv_base_a
@@ -69,6 +71,9 @@ SELECT ls.ACCESSIONNUMBER,
        fo.TOTALREMAINING,
        fo.MINIMUMINVESTMENTACCEPTED,
        fo.SALE_DATE,
+       fo.TOTALOFFERINGAMOUNT_NUM,
+       fo.TOTALAMOUNTSOLD_NUM,
+       fo.MINIMUMINVESTMENTACCEPTED_NUM,
        isr.CIK,
        isr.ENTITYNAME,
        isr.ENTITYTYPE,
@@ -104,7 +109,11 @@ SELECT ls.ACCESSION_NUMBER,
        dis.NETINCOMEMOSTRECENTFISCALYEAR,
        dis.TOTALASSETPRIORYEAR,
        dis.REVENUEPRIORYEAR,
-       dis.NETINCOMEPRIORYEAR
+       dis.NETINCOMEPRIORYEAR,
+       dis.PRICE_NUM,
+       dis.OFFERINGAMOUNT_NUM,
+       dis.MAXIMUMOFFERINGAMOUNT_NUM,
+       dis.CURRENTEMPLOYEES_NUM
 FROM vw_cf_latest_submission ls
 LEFT JOIN stg_cf_FORM_C_ISSUER_INFORMATION iss USING (ACCESSION_NUMBER)
 LEFT JOIN stg_cf_FORM_C_DISCLOSURE dis USING (ACCESSION_NUMBER);
@@ -112,12 +121,12 @@ LEFT JOIN stg_cf_FORM_C_DISCLOSURE dis USING (ACCESSION_NUMBER);
 DROP VIEW IF EXISTS vw_fd_features;
 CREATE VIEW vw_fd_features AS
 WITH parsed AS (
+    -- *_NUM columns are parsed once by tools/load_staging.py (see DERIVED_COLUMNS).
     SELECT l.*,
-           CAST(REPLACE(REPLACE(fo.TOTALOFFERINGAMOUNT, ',', ''), '$', '') AS REAL) AS target_raise,
-           CAST(REPLACE(REPLACE(fo.TOTALAMOUNTSOLD, ',', ''), '$', '') AS REAL) AS amount_sold,
-           CAST(REPLACE(REPLACE(fo.MINIMUMINVESTMENTACCEPTED, ',', ''), '$', '') AS REAL) AS min_invest
+           l.TOTALOFFERINGAMOUNT_NUM AS target_raise,
+           l.TOTALAMOUNTSOLD_NUM AS amount_sold,
+           l.MINIMUMINVESTMENTACCEPTED_NUM AS min_invest
     FROM vw_fd_latest_offering l
-    LEFT JOIN stg_fd_OFFERING fo USING (ACCESSIONNUMBER)
 )
 SELECT ACCESSIONNUMBER,
        SUBMISSIONTYPE,
@@ -147,10 +156,10 @@ DROP VIEW IF EXISTS vw_cf_features;
 CREATE VIEW vw_cf_features AS
 WITH parsed AS (
     SELECT l.*,
-           CAST(REPLACE(REPLACE(l.OFFERINGAMOUNT, ',', ''), '$', '') AS REAL) AS target_raise,
-           CAST(REPLACE(REPLACE(l.MAXIMUMOFFERINGAMOUNT, ',', ''), '$', '') AS REAL) AS max_raise,
-           CAST(REPLACE(REPLACE(l.PRICE, ',', ''), '$', '') AS REAL) AS unit_price,
-           CAST(REPLACE(l.CURRENTEMPLOYEES, ',', '') AS REAL) AS employees
+           l.OFFERINGAMOUNT_NUM AS target_raise,
+           l.MAXIMUMOFFERINGAMOUNT_NUM AS max_raise,
+           l.PRICE_NUM AS unit_price,
+           l.CURRENTEMPLOYEES_NUM AS employees
     FROM vw_cf_latest_offering l
 )
 SELECT ACCESSION_NUMBER,
@@ -187,6 +196,7 @@ FROM parsed;
 DROP VIEW IF EXISTS vw_adv_features;
 CREATE VIEW vw_adv_features AS
 SELECT a.FilingID,
+       a.firm_id,
        a."1A" AS adviser_name,
        a."1F1-City" AS city,
        a."1F1-State" AS state,
@@ -214,6 +224,20 @@ SELECT a.FilingID,
 FROM vw_adv_latest a
 LEFT JOIN stg_adv_base_b b USING (FilingID);
 
+-- Adviser contact e-mails from Schedule R (pivoted by tools/load_staging.py). stg_adv_contacts is keyed
+-- on FilingID, so `LEFT JOIN vw_adv_contact_emails c ON c.adviser_id = s.adviser_id` is an index lookup.
+DROP VIEW IF EXISTS vw_adv_contact_emails;
+CREATE VIEW vw_adv_contact_emails AS
+SELECT FilingID AS adviser_id,
+       MAIN_OFFICE_EMAIL,
+       CEO_EMAIL,
+       CFO_EMAIL,
+       CTO_EMAIL,
+       CCO_EMAIL,
+       GENERAL_OFFICE_EMAIL,
+       OTHER_EMAILS
+FROM stg_adv_contacts;
+
 DROP VIEW IF EXISTS vw_investor_deal_candidates;
 CREATE VIEW vw_investor_deal_candidates AS
 WITH deal_universe AS (
@@ -265,66 +289,70 @@ adv AS (
            COALESCE(non_hnw_clients, 0) AS non_hnw_clients,
            COALESCE(hnw_clients, 0) AS hnw_clients,
            COALESCE(pooled_clients, 0) AS pooled_clients,
-           registered_states,
-           UPPER(REPLACE(IFNULL(registered_states, ''), ' ', '')) AS state_list_normalized
+           registered_states
     FROM vw_adv_features
 ),
-adv_ready AS (
-    SELECT *,
-           CASE
-               WHEN state_list_normalized = '' THEN ''
-               ELSE ',' || state_list_normalized || ','
-           END AS state_list_search
+adv_states AS (
+    -- Inverted geography index: one row per (adviser, state) from HQ plus Base B registrations.
+    SELECT FilingID, hq_state AS state
     FROM adv
+    WHERE hq_state IS NOT NULL AND hq_state <> ''
+    UNION
+    SELECT FilingID, state
+    FROM stg_adv_state_reg
+),
+eligible AS (
+    SELECT d.*, a.*
+    FROM deal_universe d
+    CROSS JOIN adv a
+    WHERE d.issuer_state IS NULL OR d.issuer_state = ''
+
+    UNION ALL
+
+    SELECT d.*, a.*
+    FROM deal_universe d
+    JOIN adv_states s ON s.state = d.issuer_state
+    JOIN adv a ON a.FilingID = s.FilingID
 ),
 matches AS (
-    SELECT d.deal_type,
-           d.deal_id,
-           d.accession_id,
-           d.issuer_name,
-           d.issuer_state,
-           d.target_raise,
-           d.ticket_hint,
-           d.industry_focus,
-           d.security_type,
-           d.retail_allowed,
-           d.pooled_focus,
-           d.unit_price,
-           d.employee_band,
-           a.FilingID AS adviser_id,
-           a.adviser_name,
-           a.hq_state,
-           a.total_raum,
-           a.raum_bucket,
-           a.non_hnw_clients,
-           a.hnw_clients,
-           a.pooled_clients,
-           a.registered_states,
+    SELECT e.deal_type,
+           e.deal_id,
+           e.accession_id,
+           e.issuer_name,
+           e.issuer_state,
+           e.target_raise,
+           e.ticket_hint,
+           e.industry_focus,
+           e.security_type,
+           e.retail_allowed,
+           e.pooled_focus,
+           e.unit_price,
+           e.employee_band,
+           e.FilingID AS adviser_id,
+           e.adviser_name,
+           e.hq_state,
+           e.total_raum,
+           e.raum_bucket,
+           e.non_hnw_clients,
+           e.hnw_clients,
+           e.pooled_clients,
+           e.registered_states,
            CASE
-               WHEN d.issuer_state IS NULL OR d.issuer_state = '' THEN 0
-               WHEN a.hq_state = d.issuer_state THEN 1
-               WHEN a.state_list_search <> '' AND instr(a.state_list_search, ',' || d.issuer_state || ',') > 0 THEN 1
-               ELSE 0
+               WHEN e.issuer_state IS NULL OR e.issuer_state = '' THEN 0
+               ELSE 1
            END AS state_match,
            CASE
-               WHEN d.target_raise IS NULL OR a.total_raum IS NULL THEN 0
-               WHEN d.target_raise <= a.total_raum * 0.10 THEN 1
-               WHEN d.target_raise <= 2500000 THEN 1
+               WHEN e.target_raise IS NULL OR e.total_raum IS NULL THEN 0
+               WHEN e.target_raise <= e.total_raum * 0.10 THEN 1
+               WHEN e.target_raise <= 2500000 THEN 1
                ELSE 0
            END AS capital_fit,
            CASE
-               WHEN d.pooled_focus = 1 THEN CASE WHEN a.pooled_clients > 0 THEN 1 ELSE 0 END
-               WHEN d.retail_allowed = 1 THEN CASE WHEN a.non_hnw_clients > 0 THEN 1 ELSE 0 END
-               ELSE CASE WHEN a.hnw_clients > 0 THEN 1 ELSE 0 END
+               WHEN e.pooled_focus = 1 THEN CASE WHEN e.pooled_clients > 0 THEN 1 ELSE 0 END
+               WHEN e.retail_allowed = 1 THEN CASE WHEN e.non_hnw_clients > 0 THEN 1 ELSE 0 END
+               ELSE CASE WHEN e.hnw_clients > 0 THEN 1 ELSE 0 END
            END AS audience_fit
-    FROM deal_universe d
-    JOIN adv_ready a
-      ON (
-          d.issuer_state IS NULL OR
-          d.issuer_state = '' OR
-          a.hq_state = d.issuer_state OR
-          (a.state_list_search <> '' AND instr(a.state_list_search, ',' || d.issuer_state || ',') > 0)
-      )
+    FROM eligible e
 )
 SELECT *,
        state_match + capital_fit + audience_fit AS fit_score
@@ -36,7 +36,10 @@ CREATE TABLE IF NOT EXISTS stg_fd_OFFERING (
   TOTALAMOUNTSOLD text,                -- OFFERING.tsv; progress toward raise goal (traction signal).
   TOTALREMAINING text,                 -- OFFERING.tsv; remaining capacity indicator.
   MINIMUMINVESTMENTACCEPTED text,      -- OFFERING.tsv; minimum check size critical for investor fit.
-  SALE_DATE date                       -- OFFERING.tsv; most recent sale date (freshness cue).
+  SALE_DATE date,                      -- OFFERING.tsv; most recent sale date (freshness cue).
+  TOTALOFFERINGAMOUNT_NUM real,        -- loader-parsed TOTALOFFERINGAMOUNT (commas/$ stripped); feeds target_raise.
+  TOTALAMOUNTSOLD_NUM real,            -- loader-parsed TOTALAMOUNTSOLD; feeds amount_sold.
+  MINIMUMINVESTMENTACCEPTED_NUM real   -- loader-parsed MINIMUMINVESTMENTACCEPTED; feeds min_invest.
 );
 -- RECIPIENTS, RELATEDPERSONS, SIGNATURES optional for v1
 
@@ -80,7 +83,11 @@ CREATE TABLE IF NOT EXISTS stg_cf_FORM_C_DISCLOSURE (
   NETINCOMEMOSTRECENTFISCALYEAR text,      -- FORM_C_DISCLOSURE.tsv; profitability insight.
   TOTALASSETPRIORYEAR text,                -- FORM_C_DISCLOSURE.tsv; YoY comparison.
   REVENUEPRIORYEAR text,                   -- FORM_C_DISCLOSURE.tsv; revenue trend.
-  NETINCOMEPRIORYEAR text                  -- FORM_C_DISCLOSURE.tsv; net income trend (growth vs burn).
+  NETINCOMEPRIORYEAR text,                 -- FORM_C_DISCLOSURE.tsv; net income trend (growth vs burn).
+  PRICE_NUM real,                          -- loader-parsed PRICE (commas/$ stripped); feeds unit_price.
+  OFFERINGAMOUNT_NUM real,                 -- loader-parsed OFFERINGAMOUNT; feeds target_raise.
+  MAXIMUMOFFERINGAMOUNT_NUM real,          -- loader-parsed MAXIMUMOFFERINGAMOUNT; feeds max_raise.
+  CURRENTEMPLOYEES_NUM real                -- loader-parsed CURRENTEMPLOYEES; feeds employees.
 );
 
 CREATE TABLE IF NOT EXISTS stg_cf_FORM_C_ISSUER_JURISDICTIONS (
@@ -94,6 +101,7 @@ CREATE TABLE IF NOT EXISTS stg_adv_base_a (
   FilingID text,        -- IA_ADV_Base_A.csv; adviser filing key across ADV tables.
   DateSubmitted date,   -- IA_ADV_Base_A.csv; latest submission date for recency filters.
   "1A" text,            -- IA_ADV_Base_A.csv; adviser legal name.
+  "1E1" text,           -- IA_ADV_Base_A.csv; firm CRD number (stable across the firm's filings; loaded when present).
   "1F1-Street 1" text,  -- IA_ADV_Base_A.csv; main office street address line 1.
   "1F1-Street 2" text,  -- IA_ADV_Base_A.csv; main office street address line 2.
   "1F1-City" text,      -- IA_ADV_Base_A.csv; main office city (geo matching).
@@ -148,12 +156,69 @@ CREATE TABLE IF NOT EXISTS stg_adv_base_a (
   "9A1a" boolean,       -- IA_ADV_Base_A.csv; custody of client cash/securities (Y/N).
   "9A1b" boolean,       -- IA_ADV_Base_A.csv; custody due to related person.
   "9A2a" numeric,       -- IA_ADV_Base_A.csv; total client assets held in custody.
-  "9A2b" numeric        -- IA_ADV_Base_A.csv; discretionary custody amounts (if different).
+  "9A2b" numeric,       -- IA_ADV_Base_A.csv; discretionary custody amounts (if different).
+  firm_id text          -- loader-derived firm key, per FilingID across every part: CRD number, else normalized legal name + main office state.
 );
 
 CREATE TABLE IF NOT EXISTS stg_adv_base_b (
   FilingID text,          -- IA_ADV_Base_B.csv; join back to base_a (same FilingID).
-  "2-SECStateReg" text,   -- IA_ADV_Base_B.csv; comma list of states where adviser is registered (from 2-XX flags).
+  "2-SECStateReg" text,   -- IA_ADV_Base_B.csv; comma list of state codes where adviser is registered (from 2-XX flags).
   "3A" text,              -- IA_ADV_Base_B.csv; legal form of organization (LLC, corp, etc.).
   "3A-Other" text         -- IA_ADV_Base_B.csv; free-form description when 3A = Other.
 );
+
+-- Inverted index of Base B state registrations; drives the geography join in vw_investor_deal_candidates.
+CREATE TABLE IF NOT EXISTS stg_adv_state_reg (
+  FilingID text,  -- IA_ADV_Base_B.csv; adviser filing key (same as base_b).
+  state text      -- IA_ADV_Base_B.csv; state code of a 2-XX registration flag set to Y.
+);
+CREATE INDEX IF NOT EXISTS ix_stg_adv_state_reg_state ON stg_adv_state_reg (state, FilingID);
+CREATE INDEX IF NOT EXISTS ix_stg_adv_state_reg_filing ON stg_adv_state_reg (FilingID);
+
+-- Schedule R contact e-mails as filed: one row per (FilingID, role, address), wide or long source layouts alike.
+CREATE TABLE IF NOT EXISTS stg_adv_sch_r (
+  FilingID text,  -- IA_Firm_Download_SCH_R.csv; adviser filing key (same as base_a).
+  role text,      -- loader-normalized contact role: MAIN_OFFICE, CEO, CFO, CTO, CCO, GENERAL_OFFICE or OTHER.
+  email text      -- contact e-mail address (trimmed, lowercased).
+);
+CREATE INDEX IF NOT EXISTS ix_stg_adv_sch_r_filing ON stg_adv_sch_r (FilingID);
+
+-- Schedule R pivoted to one row per FilingID after each load (tools/load_staging.py refresh_contacts).
+-- Clustered on FilingID, so contact enrichment of a top-K adviser list is K primary-key lookups.
+CREATE TABLE IF NOT EXISTS stg_adv_contacts (
+  FilingID text PRIMARY KEY,  -- adviser filing key (= adviser_id in the scoring views).
+  MAIN_OFFICE_EMAIL text,     -- main office address.
+  CEO_EMAIL text,             -- chief executive officer.
+  CFO_EMAIL text,             -- chief financial officer.
+  CTO_EMAIL text,             -- chief technology officer.
+  CCO_EMAIL text,             -- chief compliance officer.
+  GENERAL_OFFICE_EMAIL text,  -- general office / info address.
+  OTHER_EMAILS text           -- comma list of addresses under any other role, and each role's beyond its first.
+) WITHOUT ROWID;
+
+-- Upsert keys: tools/load_staging.py replaces rows by these keys when a source file is reloaded.
+CREATE INDEX IF NOT EXISTS ix_stg_fd_submission_accession ON stg_fd_FORMDSUBMISSION (ACCESSIONNUMBER);
+CREATE INDEX IF NOT EXISTS ix_stg_fd_issuers_accession ON stg_fd_ISSUERS (ACCESSIONNUMBER);
+CREATE INDEX IF NOT EXISTS ix_stg_fd_offering_accession ON stg_fd_OFFERING (ACCESSIONNUMBER);
+CREATE INDEX IF NOT EXISTS ix_stg_cf_submission_accession ON stg_cf_FORM_C_SUBMISSION (ACCESSION_NUMBER);
+CREATE INDEX IF NOT EXISTS ix_stg_cf_issuer_accession ON stg_cf_FORM_C_ISSUER_INFORMATION (ACCESSION_NUMBER);
+CREATE INDEX IF NOT EXISTS ix_stg_cf_disclosure_accession ON stg_cf_FORM_C_DISCLOSURE (ACCESSION_NUMBER);
+CREATE INDEX IF NOT EXISTS ix_stg_cf_jurisdictions_accession ON stg_cf_FORM_C_ISSUER_JURISDICTIONS (ACCESSION_NUMBER);
+CREATE INDEX IF NOT EXISTS ix_stg_adv_base_a_filing ON stg_adv_base_a (FilingID);
+CREATE INDEX IF NOT EXISTS ix_stg_adv_base_b_filing ON stg_adv_base_b (FilingID);
+
+-- Latest-submission views: partition key + recency in index order, so the window only sorts ROWID ties.
+CREATE INDEX IF NOT EXISTS ix_stg_fd_submission_latest ON stg_fd_FORMDSUBMISSION (ACCESSIONNUMBER, FILING_DATE DESC);
+CREATE INDEX IF NOT EXISTS ix_stg_cf_submission_latest ON stg_cf_FORM_C_SUBMISSION (ACCESSION_NUMBER, FILING_DATE DESC);
+CREATE INDEX IF NOT EXISTS ix_stg_adv_base_a_latest ON stg_adv_base_a (FilingID, DateSubmitted DESC);
+CREATE INDEX IF NOT EXISTS ix_stg_adv_base_a_firm_latest ON stg_adv_base_a (firm_id, DateSubmitted DESC);
+
+-- Ingestion manifest: one row per source file consumed by tools/load_staging.py.
+CREATE TABLE IF NOT EXISTS stg_ingest_manifest (
+  path text PRIMARY KEY,  -- file path relative to the data root (e.g. 2025Q1_d/OFFERING.tsv).
+  loader text,            -- loader that consumed the file (load_form_d, load_adv_base_a, ...).
+  size integer,           -- file size in bytes at load time.
+  mtime real,             -- file modification time (epoch seconds) at load time.
+  sha256 text,            -- content hash; a touched file with the same hash is not reloaded.
+  loaded_at text          -- UTC timestamp of the load.
+);
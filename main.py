@@ -1,27 +1,104 @@
+from __future__ import annotations
+
 import os
 from datetime import datetime
 from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, List, Optional
 
-from agno.agent import Agent
-from agno.models.google import Gemini
-from agno.tools.sql import SQLTools
-from tools.sequential_thinking_tool import SequentialThinkingTools
-from utils.prompts import PROMPT_MAIN
-from agno.os import AgentOS
+# agno, the Gemini client and the toolkits are imported where they are used, so CLI paths that only
+# need the configuration below (tools.agent_runner, tools.batch_match, tools.agent_service) start fast.
+if TYPE_CHECKING:
+    from agno.agent import Agent
+    from agno.models.base import Model
+    from agno.tools import Toolkit
+    from tools.scoring_tool import ScoringTools
 
 
 db_path = Path("data/staging.sqlite").resolve()
 db_url = f"sqlite:///{db_path}"
 
-agno_agent = Agent(
-    name="Match Making Agent",
-    model=Gemini(id="gemini-2.5-flash", api_key=""),
-    tools=[SequentialThinkingTools(), SQLTools(db_url=db_url)],
-    add_history_to_context=True,
-    markdown=True,
-    debug_mode=True,
-    system_message=PROMPT_MAIN
-)
+# "sqlite": GuardedSQLTools (cached, cost-guarded) on data/staging.sqlite. "duckdb": DuckDB over the Parquet
+# snapshot in PARQUET_DIR (python -m tools.export_parquet), faster for scans/aggregates.
+QUERY_BACKEND = "sqlite"
+PARQUET_DIR = Path("data/parquet").resolve()
+# True: serve data/staging.sqlite immutable and memory-mapped from one connection pool; refresh it with
+# python -m tools.serving_db (build a copy, swap it in). Set False when loading into the file in place.
+SERVE_READ_ONLY = True
+
+
+def make_sql_tools(backend: str = QUERY_BACKEND) -> Toolkit:
+    """The agent's sql_tools for the configured query backend."""
+    from tools.guarded_sql_tool import GuardedSQLTools
+    from tools.serving_db import serving_engine
+
+    if backend == "duckdb":
+        from tools.duckdb_sql_tool import DuckDBSQLTools
+
+        return DuckDBSQLTools(parquet_dir=PARQUET_DIR)
+    if backend == "sqlite":
+        if SERVE_READ_ONLY:
+            return GuardedSQLTools(db_engine=serving_engine(db_path))
+        return GuardedSQLTools(db_url=db_url)
+    raise ValueError(f"Unknown QUERY_BACKEND: {backend!r} (expected 'sqlite' or 'duckdb')")
+
+
+def make_model(name: str = "gemini") -> Model:
+    """The agent's model: "gemini", or "standin" (tools/standin_model.py, local and scripted, for tests)."""
+    if name == "standin":
+        from tools.standin_model import StandInModel
+
+        return StandInModel()
+    if name == "gemini":
+        from agno.models.google import Gemini
+
+        return Gemini(id="gemini-2.5-flash", api_key="")
+    raise ValueError(f"Unknown model: {name!r} (expected 'gemini' or 'standin')")
+
+
+def build_agent(
+    sql_tools: Optional[Toolkit] = None,
+    scoring_tools: Optional[ScoringTools] = None,
+    debug_mode: bool = True,
+    tool_hooks: Optional[List[Callable]] = None,
+    model: Optional[Model] = None,
+) -> Agent:
+    """A matchmaking agent; pass shared toolkits to reuse one cache/connection pool across agents,
+    tool_hooks (e.g. a ToolTrace) to instrument every tool call, and model to replace Gemini
+    (e.g. tools.standin_model.StandInModel for offline runs)."""
+    from agno.agent import Agent
+    from tools.guarded_sql_tool import GuardedSQLTools
+    from tools.result_pages import PagedResultTools
+    from tools.scoring_tool import ScoringTools
+    from tools.sequential_thinking_tool import SequentialThinkingTools
+    from utils.prompts import PROMPT_DUCKDB, PROMPT_MAIN
+
+    sql_tools = sql_tools or make_sql_tools()
+    tools = [
+        SequentialThinkingTools(),
+        sql_tools,
+        scoring_tools or ScoringTools(db_path=db_path, read_only=SERVE_READ_ONLY),
+    ]
+    if isinstance(sql_tools, GuardedSQLTools):
+        tools.append(PagedResultTools(sql_tools))  # page handles are per agent session
+    return Agent(
+        name="Match Making Agent",
+        model=model or make_model(),
+        tools=tools,
+        add_history_to_context=True,
+        markdown=True,
+        debug_mode=debug_mode,
+        system_message=PROMPT_MAIN + (PROMPT_DUCKDB if QUERY_BACKEND == "duckdb" else ""),
+        tool_hooks=tool_hooks,
+    )
+
+
+def __getattr__(name: str) -> Any:
+    # `agno_agent` is built on first use (from main import agno_agent), not at import time.
+    if name == "agno_agent":
+        agent = build_agent()
+        globals()["agno_agent"] = agent
+        return agent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
@@ -37,13 +114,28 @@ Return adviser_id, adviser_name, adviser_city, adviser_state, total_raum, compos
 plus the geography/capital/audience component scores. 
 Explain briefly why each adviser is a good fit.
 """
-    res = agno_agent.run(USER_INPUT)
+    from tools.tool_trace import SlowQueryLog, ToolTrace
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+    # Every tool call is timed; SQL calls also get EXPLAIN QUERY PLAN. Set SLOW_QUERY_LOG to
+    # append SQL calls slower than SLOW_QUERY_MS to a log shared across runs.
+    sql_tools = make_sql_tools()
+    slow_log_path = os.environ.get("SLOW_QUERY_LOG")
+    slow_log = SlowQueryLog(Path(slow_log_path), float(os.environ.get("SLOW_QUERY_MS", "250"))) if slow_log_path else None
+    trace = ToolTrace(
+        plan_engine=getattr(sql_tools, "db_engine", None),
+        slow_log=slow_log,
+        run=f"output_{timestamp}",
+        rewrite=getattr(sql_tools, "rewrite", None),
+    )
+    res = build_agent(sql_tools=sql_tools, tool_hooks=[trace]).run(USER_INPUT)
 
     markdown_dir = Path("markdown")
     os.makedirs(markdown_dir, exist_ok=True)
 
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     output_path = markdown_dir / f"output_{timestamp}.md"
     with open(output_path, "w", encoding="utf-8") as md_file:
         md_file.write(res.content)
+    trace.write(markdown_dir / f"output_{timestamp}.trace.json")
   
\ No newline at end of file
@@ -0,0 +1,71 @@
+import sqlite3
+
+import pytest
+
+from tools.export_parquet import CURRENT_NAME, SNAPSHOTS_NAME, current_snapshot, export_snapshot, swap_current
+
+
+def test_swap_current_repoints_the_symlink(tmp_path):
+    old = tmp_path / SNAPSHOTS_NAME / "a"
+    new = tmp_path / SNAPSHOTS_NAME / "b"
+    old.mkdir(parents=True)
+    new.mkdir()
+
+    assert current_snapshot(tmp_path) is None
+    swap_current(tmp_path, old)
+    assert current_snapshot(tmp_path) == old.resolve()
+    swap_current(tmp_path, new)
+    assert current_snapshot(tmp_path) == new.resolve()
+    assert (tmp_path / CURRENT_NAME).is_symlink()
+    assert not (tmp_path / f"{CURRENT_NAME}.tmp").exists()
+
+
+def _cube_db(path, version):
+    con = sqlite3.connect(path)
+    con.execute("CREATE TABLE IF NOT EXISTS mat_cube_fd (issuer_state TEXT, deals INTEGER, raised REAL)")
+    con.execute("DELETE FROM mat_cube_fd")
+    con.executemany("INSERT INTO mat_cube_fd VALUES (?, ?, ?)", [("NY", version, 1.5), ("TX", 2, 3.0)])
+    con.execute(f"PRAGMA user_version = {version}")
+    con.commit()
+    con.close()
+
+
+def test_export_snapshot_keeps_current_and_previous(tmp_path):
+    pytest.importorskip("pyarrow")
+    db, root = tmp_path / "db.sqlite", tmp_path / "parquet"
+    snapshots = []
+    for version in (1, 2, 3):
+        _cube_db(db, version)
+        assert export_snapshot(db, root)["data_version"][0] == version
+        snapshots.append(current_snapshot(root))
+    assert export_snapshot(db, root) is None  # unchanged data version
+
+    assert sorted(path.resolve() for path in (root / SNAPSHOTS_NAME).iterdir()) == sorted(snapshots[1:])
+    assert (snapshots[-1] / "cube_fd").is_dir()
+
+
+def test_duckdb_reads_only_the_snapshot(tmp_path):
+    pytest.importorskip("pyarrow")
+    pytest.importorskip("duckdb")
+    from tools.duckdb_sql_tool import DuckDBSQLTools
+
+    db, root = tmp_path / "db.sqlite", tmp_path / "parquet"
+    _cube_db(db, 1)
+    export_snapshot(db, root)
+    (tmp_path / "secret.csv").write_text("a\n1\n")
+    tools = DuckDBSQLTools(parquet_dir=root)
+
+    assert tools.run_sql("SELECT SUM(deals) AS deals FROM mat_cube_fd") == [{"deals": 3.0}]
+    for sql in (
+        "CREATE TABLE t AS SELECT 1",
+        "SELECT 1; DROP VIEW mat_cube_fd",
+        "SET enable_external_access = true",
+    ):
+        with pytest.raises(ValueError):
+            tools.run_sql(sql)
+    with pytest.raises(Exception):
+        tools.run_sql(f"SELECT * FROM read_csv('{(tmp_path / 'secret.csv').as_posix()}')")
+
+    _cube_db(db, 5)
+    export_snapshot(db, root)
+    assert tools.run_sql("SELECT SUM(deals) AS deals FROM mat_cube_fd") == [{"deals": 7.0}]
@@ -0,0 +1,114 @@
+import json
+import sqlite3
+
+import pytest
+
+from tools.guarded_sql_tool import GuardedSQLTools, QueryRejected
+
+
+@pytest.fixture
+def guarded(tmp_path):
+    db = tmp_path / "guarded.sqlite"
+    con = sqlite3.connect(db)
+    con.executescript(
+        """
+        CREATE TABLE mat_investor_deal_scored (deal_id TEXT, adviser_id TEXT, composite_score REAL);
+        CREATE INDEX ix_scored_deal ON mat_investor_deal_scored (deal_id);
+        CREATE INDEX ix_scored_adviser ON mat_investor_deal_scored (adviser_id);
+        CREATE TABLE deals (deal_id TEXT PRIMARY KEY, issuer_state TEXT);
+        CREATE TABLE mat_adv_features (adviser_id TEXT PRIMARY KEY, state TEXT);
+        CREATE TABLE pairs (deal_id TEXT, adviser_id TEXT, composite_score REAL);
+        CREATE VIEW vw_investor_deal_candidates AS SELECT * FROM pairs;
+        """
+    )
+    con.close()
+    return GuardedSQLTools(db_url=f"sqlite:///{db}")
+
+
+def _reason(tools, sql):
+    with pytest.raises(QueryRejected) as rejected:
+        tools.check_query(sql)
+    return rejected.value.reason
+
+
+def test_small_limit_bounds_a_scan(guarded):
+    guarded.check_query("SELECT * FROM mat_investor_deal_scored LIMIT 5")
+    guarded.check_query("SELECT * FROM mat_investor_deal_scored WHERE composite_score > 0.5 LIMIT 20 OFFSET 20")
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT * FROM mat_investor_deal_scored",
+    "SELECT * FROM mat_investor_deal_scored LIMIT 100000",
+    "SELECT * FROM mat_investor_deal_scored ORDER BY composite_score DESC LIMIT 5",
+    "SELECT count(*) FROM mat_investor_deal_scored LIMIT 5",
+    "SELECT DISTINCT adviser_id FROM mat_investor_deal_scored LIMIT 5",
+    "SELECT * FROM (SELECT * FROM mat_investor_deal_scored ORDER BY composite_score) LIMIT 5",
+    "SELECT s.* FROM deals d CROSS JOIN mat_investor_deal_scored s WHERE s.composite_score > 0.5 LIMIT 5",
+])
+def test_unbounded_scans_are_refused(guarded, sql):
+    assert _reason(guarded, sql) == "unbounded_scan"
+
+
+@pytest.mark.parametrize("sql", [
+    # key-filtered, but the IN list is every adviser id in mat_adv_features
+    "SELECT COUNT(*) FROM mat_investor_deal_scored WHERE adviser_id IN (SELECT adviser_id FROM mat_adv_features)",
+    "SELECT COUNT(*) FROM mat_investor_deal_scored "
+    "WHERE adviser_id IN (SELECT adviser_id FROM mat_adv_features WHERE state = 'NY')",
+    # an index probe into the scored pairs for every mat_adv_features row
+    "SELECT s.* FROM mat_adv_features a CROSS JOIN mat_investor_deal_scored s "
+    "ON s.adviser_id = a.adviser_id ORDER BY s.composite_score DESC",
+])
+def test_key_lookups_driven_by_a_table_scan_are_refused(guarded, sql):
+    assert _reason(guarded, sql) == "unbounded_scan"
+
+
+def test_key_lookups_from_a_bounded_driver_run(guarded):
+    guarded.check_query(
+        "SELECT COUNT(*) FROM mat_investor_deal_scored "
+        "WHERE adviser_id IN (SELECT adviser_id FROM mat_adv_features WHERE adviser_id = 'ADV:1')"
+    )
+    guarded.check_query("SELECT * FROM mat_adv_features WHERE state = 'NY'")
+
+
+@pytest.mark.parametrize("sql", [
+    'SELECT * FROM "mat_investor_deal_scored" s WHERE s.composite_score > 0.5',
+    'SELECT * FROM [mat_investor_deal_scored] AS "s x" WHERE "s x".composite_score > 0.5',
+    'SELECT * FROM main."mat_investor_deal_scored" WHERE composite_score > 0.5',
+])
+def test_quoted_names_are_guarded(guarded, sql):
+    assert _reason(guarded, sql) == "unbounded_scan"
+
+
+def test_key_filter_needs_a_literal_or_parameter(guarded):
+    guarded.check_query("SELECT * FROM vw_investor_deal_candidates WHERE deal_id = 'FD:0001'")
+    guarded.check_query('SELECT * FROM vw_investor_deal_candidates WHERE "adviser_id" IN (?, ?)')
+    join = (
+        "SELECT c.* FROM deals d JOIN vw_investor_deal_candidates c ON c.deal_id = d.deal_id "
+        "WHERE d.issuer_state = 'NY'"
+    )
+    assert _reason(guarded, join) == "unfiltered_view"
+
+
+@pytest.mark.parametrize("prefix", ["-- top advisers\n", "/* x */ ", "  /* it's */\n-- a\n"])
+def test_leading_comments_do_not_skip_the_guard(guarded, prefix):
+    sql = prefix + "SELECT * FROM mat_investor_deal_scored ORDER BY composite_score DESC"
+    assert _reason(guarded, sql) == "unbounded_scan"
+    result = json.loads(guarded.run_sql_query(sql))
+    assert result["error"] == "too_expensive"
+
+
+def test_non_read_statements_are_refused(guarded):
+    for sql in ("DELETE FROM deals", "/* x */ INSERT INTO deals VALUES ('FD:1', 'NY')", "PRAGMA user_version = 9"):
+        result = json.loads(guarded.run_sql_query(sql))
+        assert (result["error"], result["reason"]) == ("read_only", "not_read_only")
+    assert guarded.run_sql("SELECT COUNT(*) AS n FROM deals") == [{"n": 0}]
+
+
+def test_writes_are_refused_while_running(guarded):
+    # WITH ... passes the leading-keyword check; the authorizer stops the DELETE itself
+    sql = "WITH doomed AS (SELECT deal_id FROM deals) DELETE FROM deals WHERE deal_id IN doomed"
+    with pytest.raises(QueryRejected) as refused:
+        guarded.run_sql(sql)
+    assert (refused.value.error, refused.value.reason) == ("read_only", "not_read_only")
+    assert json.loads(guarded.run_sql_query(sql))["error"] == "read_only"
+    assert guarded.run_sql("WITH d AS (SELECT deal_id FROM deals) SELECT COUNT(*) AS n FROM d") == [{"n": 0}]
@@ -0,0 +1,87 @@
+import sqlite3
+
+import pandas as pd
+
+from tools.load_staging import ADV_A_USECOLS, classify_role, exec_schema, ingest, refresh_contacts, write_batch
+
+
+def test_write_batch_keeps_rows_from_earlier_chunks():
+    con = sqlite3.connect(":memory:")
+    con.execute("CREATE TABLE stg_adv_state_reg (FilingID text, state text)")
+    con.executemany("INSERT INTO stg_adv_state_reg VALUES (?, ?)", [("A", "NY"), ("B", "TX"), ("B", "CA")])
+
+    # Filing B comes back spread over two chunks; the deletes free B's old ROWIDs for reuse.
+    replaced = {}
+    columns = ["FilingID", "state"]
+    write_batch(con, ("stg_adv_state_reg", columns, [("B", "TX"), ("B", "CA")], ["B"]), replaced)
+    write_batch(con, ("stg_adv_state_reg", columns, [("B", "FL")], ["B"]), replaced)
+
+    rows = con.execute("SELECT FilingID, state FROM stg_adv_state_reg ORDER BY FilingID, state").fetchall()
+    assert rows == [("A", "NY"), ("B", "CA"), ("B", "FL"), ("B", "TX")]
+
+
+def test_contacts_keep_every_address():
+    con = sqlite3.connect(":memory:")
+    exec_schema(con)
+    con.executemany(
+        "INSERT INTO stg_adv_sch_r VALUES (?, ?, ?)",
+        [
+            ("F1", "CEO", "ceo@firm.com"),
+            ("F1", "CEO", "co-ceo@firm.com"),
+            ("F1", "OTHER", "ir@firm.com"),
+            ("F1", classify_role("General Counsel"), "legal@firm.com"),
+            ("F1", classify_role("General Office"), "office@firm.com"),
+        ],
+    )
+    refresh_contacts(con)
+
+    ceo, general, other = con.execute(
+        "SELECT CEO_EMAIL, GENERAL_OFFICE_EMAIL, OTHER_EMAILS FROM stg_adv_contacts WHERE FilingID = 'F1'"
+    ).fetchone()
+    assert ceo == "ceo@firm.com"
+    assert general == "office@firm.com"
+    assert sorted(other.split(",")) == ["co-ceo@firm.com", "ir@firm.com", "legal@firm.com"]
+
+
+def _base_a_part(path, rows, crd=True):
+    """An ADV Base A part file; crd=False writes an older extract without the 1E1 column."""
+    columns = ADV_A_USECOLS + (["1E1"] if crd else [])
+    frame = pd.DataFrame([{col: "" for col in columns} | row for row in rows], columns=columns)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    frame.to_csv(path, index=False, encoding="latin1")
+
+
+def test_firm_id_is_shared_across_parts(tmp_path):
+    root = tmp_path / "raw"
+    part = root / "adv-filing-data-test"
+
+    def filing(filing_id, name, state, submitted, crd=None):
+        row = {"FilingID": filing_id, "1A": name, "1F1-State": state, "DateSubmitted": f"{submitted} 10:00:00 AM"}
+        return row | ({"1E1": crd} if crd else {})
+
+    # Part 1 predates the 1E1 column; part 2 carries CRD numbers.
+    _base_a_part(part / "IA_ADV_Base_A_1.csv", [
+        filing("F1", "Acme Capital, L.L.C.", "NY", "01/05/2023"),
+        filing("F2", "Acme Capital LLC", "CA", "01/06/2023"),
+        filing("F3", "Twin Advisers", "TX", "01/07/2023"),
+        filing("F4", "Solo Partners", "FL", "01/08/2023"),
+    ], crd=False)
+    _base_a_part(part / "IA_ADV_Base_A_2.csv", [
+        filing("F5", "ACME CAPITAL LLC", "ny", "02/05/2024", crd="123"),
+        filing("F6", "Twin Advisers", "TX", "02/06/2024", crd="700"),
+        filing("F7", "Twin Advisers", "TX", "02/07/2024", crd="701"),
+    ])
+
+    con = sqlite3.connect(tmp_path / "staging.sqlite")
+    exec_schema(con)
+    ingest(con, root)
+    firms = dict(con.execute("SELECT FilingID, firm_id FROM stg_adv_base_a"))
+    assert firms == {
+        "F1": "CRD:123",  # same name + state as a filing that carries its CRD
+        "F2": "NAME:ACME CAPITAL LLC|CA",  # another main office state: another firm
+        "F3": "NAME:TWIN ADVISERS|TX",  # two CRDs under that name: ambiguous
+        "F4": "NAME:SOLO PARTNERS|FL",
+        "F5": "CRD:123",
+        "F6": "CRD:700",
+        "F7": "CRD:701",
+    }
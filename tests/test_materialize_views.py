@@ -0,0 +1,81 @@
+import shutil
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from tools import load_staging, materialize_views
+from tools.load_staging import CF_FILES, FD_FILES
+from tools.synthetic_data import Scale, generate, write_reg_cf
+
+SCALE = Scale(advisers=150, form_d=40, reg_cf=15)
+
+
+def _load(db, root, full=False):
+    con = sqlite3.connect(db, isolation_level=None)
+    load_staging.configure_connection(con)
+    load_staging.exec_schema(con)
+    load_staging.ingest(con, root)
+    mode = materialize_views.materialize(con, full=full)
+    con.close()
+    return mode
+
+
+def _edit_tsv(path, edit):
+    frame = pd.read_csv(path, sep="\t", dtype=str, keep_default_na=False)
+    edit(frame)
+    frame.to_csv(path, sep="\t", index=False, lineterminator="\n")
+
+
+def _mat_tables(db):
+    con = sqlite3.connect(db)
+    names = [row[0] for row in con.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'mat\\_%' ESCAPE '\\' "
+        "AND name <> 'mat_refresh_log' ORDER BY name"
+    )]
+    tables = {name: sorted(con.execute(f"SELECT * FROM {name}").fetchall(), key=repr) for name in names}
+    con.close()
+    return tables
+
+
+def test_incremental_refresh_matches_a_full_rebuild(tmp_path):
+    root, db = tmp_path / "raw", tmp_path / "staging.sqlite"
+    generate(root, SCALE, seed=0)
+    assert _load(db, root, full=True) == "full"
+
+    # Changed Form D offerings, advisers that moved and grew, and a new Reg CF quarter.
+    def resize_offerings(frame):
+        frame.loc[:4, "TOTALOFFERINGAMOUNT"] = "2500000"
+        frame.loc[:4, "MINIMUMINVESTMENTACCEPTED"] = "25000"
+
+    def move_advisers(frame):
+        frame.loc[:9, "1F1-State"] = "NY"
+        frame.loc[:9, "5F2c"] = "750000000"
+
+    _edit_tsv(root / "2025Q1_d" / FD_FILES[2], resize_offerings)
+    base_a = root / "adv-filing-data-synthetic" / "IA_ADV_Base_A_synthetic.csv"
+    frame = pd.read_csv(base_a, dtype=str, keep_default_na=False, encoding="latin1")
+    move_advisers(frame)
+    frame.to_csv(base_a, index=False, encoding="latin1")
+    write_reg_cf(root, "2025Q2", 10, np.random.default_rng(1))
+    for name in CF_FILES:
+        _edit_tsv(root / "2025Q2_cf" / name,
+                  lambda f: f.__setitem__("ACCESSION_NUMBER", "Q2" + f["ACCESSION_NUMBER"]))
+
+    assert _load(db, root) == "incremental"
+    rebuilt = tmp_path / "rebuilt.sqlite"
+    shutil.copy(db, rebuilt)
+    con = sqlite3.connect(rebuilt, isolation_level=None)
+    assert materialize_views.materialize(con, full=True) == "full"
+    con.close()
+
+    incremental, full = _mat_tables(db), _mat_tables(rebuilt)
+    assert incremental.keys() == full.keys()
+    assert {"mat_investor_deal_scored", "mat_adviser_top_deals", "mat_adv_features"} <= incremental.keys()
+    for name in full:
+        assert incremental[name] == full[name], name
+    assert full["mat_investor_deal_scored"]
+    last = sqlite3.connect(db).execute(
+        "SELECT mode, changed_deals, changed_advisers FROM mat_refresh_log ORDER BY ROWID DESC LIMIT 1"
+    ).fetchone()
+    assert last[0] == "incremental" and last[1] > 0 and last[2] > 0
@@ -0,0 +1,66 @@
+import json
+import sqlite3
+
+from tools.guarded_sql_tool import GuardedSQLTools
+from tools.result_pages import PagedResultTools
+
+
+def _scored_db(path):
+    con = sqlite3.connect(path)
+    con.execute(
+        "CREATE TABLE mat_investor_deal_scored (deal_id TEXT, adviser_id TEXT, composite_score REAL)"
+    )
+    con.execute("CREATE INDEX ix_mat_scored_adviser ON mat_investor_deal_scored (adviser_id)")
+    rows = [(f"FD:{deal:04d}", adviser, score)
+            for deal in range(12)
+            for adviser, score in (("A1", 0.5), ("A2", 0.5 if deal % 2 else 0.25))]
+    con.executemany("INSERT INTO mat_investor_deal_scored VALUES (?, ?, ?)", rows)
+    con.commit()
+    con.close()
+
+
+def _all_pages(pages, query, page_size):
+    first = json.loads(pages.page_scored_query(query, page_size=page_size))
+    assert first["ok"], first
+    rows = list(first["rows"])
+    result = first
+    while result["has_more"]:
+        result = json.loads(pages.next_page(first["handle"]))
+        rows.extend(result["rows"])
+    return first["total_rows"], rows
+
+
+def test_next_page_keeps_tied_scores(tmp_path):
+    db = tmp_path / "scored.sqlite"
+    _scored_db(db)
+    pages = PagedResultTools(GuardedSQLTools(db_url=f"sqlite:///{db}"), out_dir=tmp_path)
+
+    # One adviser, twelve deals, one score: only deal_id tells the rows apart.
+    total, rows = _all_pages(
+        pages,
+        "SELECT deal_id, adviser_id, composite_score FROM mat_investor_deal_scored WHERE adviser_id = 'A1'",
+        page_size=5,
+    )
+    assert total == len(rows) == 12
+    assert sorted(row["deal_id"] for row in rows) == [f"FD:{deal:04d}" for deal in range(12)]
+
+    total, rows = _all_pages(
+        pages,
+        "SELECT deal_id, adviser_id, composite_score FROM mat_investor_deal_scored WHERE adviser_id IN ('A1', 'A2')",
+        page_size=4,
+    )
+    keys = [(-row["composite_score"], row["adviser_id"], row["deal_id"]) for row in rows]
+    assert total == len(rows) == 24
+    assert keys == sorted(set(keys))
+
+
+def test_page_scored_query_requires_deal_id(tmp_path):
+    db = tmp_path / "scored.sqlite"
+    _scored_db(db)
+    pages = PagedResultTools(GuardedSQLTools(db_url=f"sqlite:///{db}"), out_dir=tmp_path)
+
+    result = json.loads(pages.page_scored_query(
+        "SELECT adviser_id, composite_score FROM mat_investor_deal_scored WHERE adviser_id = 'A1'"
+    ))
+    assert result["error"] == "missing_keyset_columns"
+    assert result["missing"] == ["deal_id"]
@@ -0,0 +1,55 @@
+import sqlite3
+
+import pytest
+
+from tools import load_staging, materialize_views
+from tools.scoring_engine import ScoringEngine, profile_deal
+from tools.synthetic_data import Scale, generate
+
+
+def test_profile_deal_parses_numbers_and_blanks():
+    deal = profile_deal("ny", target_raise="5000000", min_invest="", unit_price=None)
+    assert deal.target_raise == 5_000_000.0
+    assert deal.min_invest is None
+    assert deal.issuer_state == "NY"
+
+
+@pytest.mark.parametrize("field", ["target_raise", "min_invest", "unit_price"])
+def test_profile_deal_rejects_unparseable_numbers(field):
+    with pytest.raises(ValueError, match=field):
+        profile_deal("NY", **{field: "5M"})
+
+
+COMPONENTS = (
+    "geography_score", "capital_score", "audience_score", "ticket_score", "traction_score",
+    "security_score", "composite_score",
+)
+
+
+def test_engine_matches_the_scored_view(tmp_path):
+    root, db = tmp_path / "raw", tmp_path / "staging.sqlite"
+    generate(root, Scale(advisers=150, form_d=20, reg_cf=10), seed=3)
+    con = sqlite3.connect(db, isolation_level=None)
+    load_staging.exec_schema(con)
+    load_staging.ingest(con, root)
+    materialize_views.apply_views(con)  # no mat_* tables: the engine reads the views too
+    deal_ids = [row[0] for deal_type in ("FORM_D", "REG_CF") for row in con.execute(
+        "SELECT DISTINCT deal_id FROM vw_investor_deal_candidates WHERE deal_type = ? ORDER BY deal_id LIMIT 3",
+        (deal_type,),
+    )]
+    assert len(deal_ids) == 6
+
+    engine = ScoringEngine(db)
+    ties = 0
+    for deal_id in deal_ids:
+        view = con.execute(
+            f"SELECT adviser_id, {', '.join(COMPONENTS)} FROM vw_investor_deal_scored "
+            "WHERE deal_id = ? ORDER BY composite_score DESC, adviser_id",
+            (deal_id,),
+        ).fetchall()
+        ranked = engine.top_advisers(deal_id, k=len(view) + 1)
+        assert ranked["candidates"] == len(view) > 0
+        # Same advisers in the same order (ties by adviser_id), with bit-identical scores.
+        assert [(a["adviser_id"], *(a[c] for c in COMPONENTS)) for a in ranked["advisers"]] == view
+        ties += sum(a[-1] == b[-1] for a, b in zip(view, view[1:]))
+    assert ties > 0
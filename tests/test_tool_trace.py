@@ -0,0 +1,31 @@
+import sqlite3
+
+from tools.guarded_sql_tool import GuardedSQLTools
+from tools.tool_trace import ToolTrace
+
+
+def test_trace_explains_the_rewritten_statement(tmp_path):
+    db = tmp_path / "trace.sqlite"
+    con = sqlite3.connect(db)
+    con.executescript(
+        """
+        CREATE TABLE pairs (deal_id TEXT, adviser_id TEXT, composite_score REAL);
+        CREATE VIEW vw_investor_deal_scored AS SELECT * FROM pairs;
+        CREATE TABLE mat_investor_deal_scored (deal_id TEXT, adviser_id TEXT, composite_score REAL);
+        CREATE INDEX ix_mat_scored_deal ON mat_investor_deal_scored (deal_id);
+        INSERT INTO mat_investor_deal_scored VALUES ('FD:0001', 'A1', 0.5);
+        """
+    )
+    con.close()
+    tools = GuardedSQLTools(db_url=f"sqlite:///{db}")
+    trace = ToolTrace(plan_engine=tools.db_engine, rewrite=tools.rewrite)
+
+    query = "SELECT adviser_id FROM vw_investor_deal_scored WHERE deal_id = 'FD:0001'"
+    trace("run_sql_query", tools.run_sql_query, {"query": query})
+
+    call = trace.calls[0]
+    assert call["status"] == "ok"
+    assert call["query"] == query
+    assert call["executed"] == "SELECT adviser_id FROM mat_investor_deal_scored WHERE deal_id = 'FD:0001'"
+    assert call["plan"][0].startswith("SEARCH mat_investor_deal_scored USING INDEX ix_mat_scored_deal")
+    assert call["full_scans"] == []
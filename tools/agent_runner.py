@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Run many matchmaking questions through the agent concurrently.
+
+Requests are JSONL (a file, or - for stdin): one object per line with the
+question in "prompt", "input" or "body" (a "title" is prepended when present)
+and an optional "id" / "request_id". Up to --concurrency agent sessions run
+at once on one event loop. Every session shares one GuardedSQLTools backed by
+an immutable, memory-mapped SQLite connection pool (tools/serving_db.py) and
+one ScoringTools adviser matrix, so the database work is shared while Gemini
+round trips overlap; python -m tools.serving_db refreshes the data mid-run. Each attempt
+gets --timeout seconds, and failures are retried --retries times with
+exponential backoff and jitter. Answers are written to
+markdown/run_<timestamp>/<id>.md with their timing; summary.jsonl lists
+every request's status, attempts and latency. --trace adds <id>.trace.json
+per request (tools/tool_trace.py: per-tool-call timings and SQL query plans),
+and --slow-log appends slow SQL calls from every run to one JSONL file.
+
+Run from the repo root: python -m tools.agent_runner requests.jsonl --concurrency 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import sys
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Iterable, List, Optional, TextIO
+
+from tools.scoring_engine import DB_PATH, REPO_ROOT
+from tools.serving_db import serving_engine
+from tools.tool_trace import SlowQueryLog, ToolTrace
+
+OUTPUT_DIR = REPO_ROOT / "markdown"
+PROMPT_KEYS = ("prompt", "input", "body")
+ID_KEYS = ("id", "request_id")
+
+
+@dataclass
+class AgentRequest:
+    request_id: str
+    prompt: str
+
+
+@dataclass
+class RunResult:
+    request_id: str
+    status: str  # "ok", "timeout" or "error" (after the last attempt)
+    attempts: int
+    elapsed_s: float
+    started_at: str
+    content: Optional[str] = None
+    error: Optional[str] = None
+    path: Optional[str] = None
+    trace: Optional[str] = None
+
+
+def read_requests(stream: TextIO) -> List[AgentRequest]:
+    requests = []
+    for lineno, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        record = json.loads(line)
+        prompt = next((record[k] for k in PROMPT_KEYS if record.get(k)), None)
+        if prompt is None:
+            raise ValueError(f"line {lineno}: no {'/'.join(PROMPT_KEYS)} field")
+        if record.get("title"):
+            prompt = f"{record['title']}\n\n{prompt}"
+        request_id = next((str(record[k]) for k in ID_KEYS if record.get(k)), f"line-{lineno}")
+        requests.append(AgentRequest(request_id, prompt))
+    return requests
+
+
+def shared_agent_factory(db_path: Path, concurrency: int, model: str = "gemini") -> Callable[[], Any]:
+    """build_agent with the SQL and scoring toolkits (and the model client) created once and shared."""
+    from main import QUERY_BACKEND, build_agent, make_model, make_sql_tools
+    from tools.guarded_sql_tool import GuardedSQLTools
+    from tools.scoring_tool import ScoringTools
+
+    if QUERY_BACKEND == "sqlite":
+        sql_tools = GuardedSQLTools(db_engine=serving_engine(db_path, pool_size=concurrency))
+    else:
+        sql_tools = make_sql_tools(QUERY_BACKEND)
+    scoring_tools = ScoringTools(db_path=db_path, read_only=True)
+    scoring_tools.engine.reload()  # load the adviser matrix before sessions race for it
+    return partial(
+        build_agent, sql_tools=sql_tools, scoring_tools=scoring_tools, model=make_model(model), debug_mode=False
+    )
+
+
+def backoff_delay(attempt: int, base: float, cap: float = 60.0) -> float:
+    """Exponential backoff with jitter: ~base * 2**(attempt-1), scaled by 0.5-1.0."""
+    return min(cap, base * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+
+
+async def run_one(
+    request: AgentRequest,
+    make_agent: Callable[[], Any],
+    limit: asyncio.Semaphore,
+    run_id: str,
+    timeout: float,
+    retries: int,
+    backoff: float,
+    trace: Optional[ToolTrace] = None,
+) -> RunResult:
+    async with limit:
+        started_at = datetime.now().isoformat(timespec="seconds")
+        start = time.perf_counter()
+        status, error = "error", None
+        for attempt in range(1, retries + 2):
+            try:
+                if trace is not None:
+                    trace.reset()  # the trace describes the attempt that produced the answer
+                    agent = make_agent(tool_hooks=[trace])
+                else:
+                    agent = make_agent()
+                response = await asyncio.wait_for(
+                    agent.arun(request.prompt, session_id=f"{run_id}-{request.request_id}-{attempt}"),
+                    timeout=timeout,
+                )
+                if str(getattr(response, "status", "")).upper().endswith("ERROR"):
+                    raise RuntimeError(response.content or "agent run failed")
+                return RunResult(
+                    request.request_id, "ok", attempt, round(time.perf_counter() - start, 3),
+                    started_at, content=response.content,
+                )
+            except asyncio.TimeoutError:
+                status, error = "timeout", f"no answer within {timeout:g}s"
+            except Exception as exc:  # model/API errors are retried like timeouts
+                status, error = "error", f"{type(exc).__name__}: {exc}"
+            if attempt <= retries:
+                await asyncio.sleep(backoff_delay(attempt, backoff))
+        return RunResult(
+            request.request_id, status, retries + 1, round(time.perf_counter() - start, 3),
+            started_at, error=error,
+        )
+
+
+def write_result(out_dir: Path, request: AgentRequest, result: RunResult, trace: Optional[ToolTrace] = None) -> None:
+    safe_id = re.sub(r"[^A-Za-z0-9_.-]+", "_", result.request_id)
+    path = out_dir / f"{safe_id}.md"
+    timing = []
+    if trace is not None:
+        summary = trace.summary()
+        timing = [f"- tool calls: {summary['calls']} ({summary['tool_ms'] / 1000:.3f} s in tools, "
+                  f"{summary['full_scans']} with full scans)"]
+        result.trace = str(trace.write(out_dir / f"{safe_id}.trace.json"))
+    lines = [
+        f"# {result.request_id}",
+        "",
+        f"- status: {result.status}",
+        f"- attempts: {result.attempts}",
+        f"- started_at: {result.started_at}",
+        f"- elapsed: {result.elapsed_s:.3f} s",
+        *timing,
+        "",
+        "## Prompt",
+        "",
+        request.prompt,
+        "",
+        "## Answer",
+        "",
+        result.content if result.content is not None else f"_No answer: {result.error}_",
+        "",
+    ]
+    path.write_text("\n".join(lines), encoding="utf-8")
+    result.path = str(path)
+
+
+async def run_all(
+    requests: Iterable[AgentRequest],
+    make_agent: Callable[[], Any],
+    out_dir: Path,
+    concurrency: int = 4,
+    timeout: float = 300.0,
+    retries: int = 2,
+    backoff: float = 2.0,
+    make_trace: Optional[Callable[..., ToolTrace]] = None,
+) -> List[RunResult]:
+    """Run every request with at most `concurrency` in flight; results are written as they finish.
+
+    make_trace, when given, builds one ToolTrace per request (called with run=<run_id>/<request_id>).
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    run_id = out_dir.name
+    limit = asyncio.Semaphore(concurrency)
+    results: List[RunResult] = []
+
+    async def _run(request: AgentRequest) -> None:
+        trace = make_trace(run=f"{run_id}/{request.request_id}") if make_trace else None
+        result = await run_one(request, make_agent, limit, run_id, timeout, retries, backoff, trace)
+        write_result(out_dir, request, result, trace)
+        results.append(result)
+        print(f"  {result.request_id}: {result.status} in {result.elapsed_s:.1f}s ({result.attempts} attempts)")
+
+    await asyncio.gather(*(_run(request) for request in requests))
+    with open(out_dir / "summary.jsonl", "w", encoding="utf-8") as handle:
+        for result in results:
+            record = asdict(result)
+            record.pop("content")
+            handle.write(json.dumps(record) + "\n")
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run JSONL matchmaking requests through the agent concurrently.")
+    parser.add_argument("requests", nargs="?", default="-", help="JSONL file of requests, or - for stdin.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Agent sessions in flight at once.")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Seconds allowed per attempt.")
+    parser.add_argument("--retries", type=int, default=2, help="Retries after a timeout or error.")
+    parser.add_argument("--backoff", type=float, default=2.0, help="Base backoff in seconds (doubles per retry).")
+    parser.add_argument("--db", type=Path, default=DB_PATH, help="SQLite database the sessions read.")
+    parser.add_argument(
+        "--model",
+        choices=("gemini", "standin"),
+        default="gemini",
+        help="standin: local scripted model (no API calls) to time the tools and database alone.",
+    )
+    parser.add_argument("--out-dir", type=Path, help="Result directory (default: markdown/run_<timestamp>).")
+    parser.add_argument("--trace", action="store_true", help="Write <id>.trace.json with per-tool-call timings and query plans.")
+    parser.add_argument("--slow-log", type=Path, help="Append SQL calls slower than --slow-ms to this JSONL (implies --trace).")
+    parser.add_argument("--slow-ms", type=float, default=250.0, help="Slow-query threshold in milliseconds.")
+    args = parser.parse_args()
+
+    if args.requests == "-":
+        requests = read_requests(sys.stdin)
+    else:
+        with open(args.requests, encoding="utf-8") as handle:
+            requests = read_requests(handle)
+    out_dir = args.out_dir or OUTPUT_DIR / f"run_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+    make_agent = shared_agent_factory(args.db, args.concurrency, args.model)
+    make_trace = None
+    if args.trace or args.slow_log:
+        sql_tools = make_agent.keywords["sql_tools"]
+        make_trace = partial(
+            ToolTrace,
+            plan_engine=getattr(sql_tools, "db_engine", None),
+            rewrite=getattr(sql_tools, "rewrite", None),
+            slow_log=SlowQueryLog(args.slow_log, args.slow_ms) if args.slow_log else None,
+        )
+    start = time.perf_counter()
+    results = asyncio.run(run_all(
+        requests, make_agent, out_dir,
+        concurrency=args.concurrency, timeout=args.timeout, retries=args.retries, backoff=args.backoff,
+        make_trace=make_trace,
+    ))
+    elapsed = time.perf_counter() - start
+    ok = sum(result.status == "ok" for result in results)
+    print(f"{ok}/{len(results)} requests answered in {elapsed:.1f}s "
+          f"({len(results) / elapsed if elapsed else 0:.2f} req/s) -> {out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Long-running matchmaking service: one warm process answering many questions.
+
+main.py answers one question per process, so every question pays interpreter
+start-up, the agno/Gemini imports, loading the adviser matrix and cold SQLite
+pages. This service pays them once: at start-up it builds the shared toolkits
+(tools.agent_runner.shared_agent_factory: one GuardedSQLTools over the
+immutable serving pool, one scoring engine, one model client), loads the
+adviser matrix, fills the schema cache and, with --preload, reads the
+database file once so its pages sit in the OS page cache. Each question then
+gets a fresh Agent around those shared toolkits.
+
+Endpoints (JSON):
+- POST /ask {"prompt": ..., "id": optional} -> answer, status, elapsed and
+  the run's tool/model time split
+- GET /health -> 200 once warm (503 while starting or without a database),
+  with uptime, warm-up time, model, and the served file's identity
+- GET /metrics -> request counts, errors and p50/p95/p99 latencies for
+  /ask, model vs. tool time, per-tool latencies, SQL cache hit rate and
+  connection pool status
+
+--model standin swaps Gemini for tools/standin_model.py (no network) to test
+the service and time everything but the model. --agent-os also mounts
+AgentOS's routes for the same agent (needs python-multipart).
+
+Run from the repo root: python -m tools.agent_service --port 7777 [--concurrency 8] [--model standin]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from tools.agent_runner import AgentRequest, run_one, shared_agent_factory
+from tools.scoring_engine import DB_PATH
+from tools.serving_db import file_identity
+
+LATENCY_WINDOW = 2048       # recent samples kept per metric for percentiles
+PRELOAD_BYTES = 16 << 20    # read size when pulling the database into the page cache
+
+
+class LatencyStats:
+    """Count, errors and nearest-rank percentiles over the last `window` samples."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+
+    def record(self, ms: float, ok: bool = True) -> None:
+        self.samples.append(ms)
+        self.count += 1
+        self.errors += not ok
+        self.total_ms += ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        ordered = sorted(self.samples)
+
+        def pct(p: int) -> Optional[float]:
+            return round(ordered[max(0, -(-p * len(ordered) // 100) - 1)], 3) if ordered else None
+
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else None,
+            "p50_ms": pct(50),
+            "p95_ms": pct(95),
+            "p99_ms": pct(99),
+            "max_ms": round(ordered[-1], 3) if ordered else None,
+        }
+
+
+class ServiceMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = LatencyStats()
+        self.model = LatencyStats()
+        self.tools: Dict[str, LatencyStats] = {}
+        self.statuses: Dict[str, int] = {}
+        self.in_flight = 0
+
+    def record_run(self, status: str, elapsed_ms: float, trace: Optional[Dict[str, Any]]) -> None:
+        with self._lock:
+            self.requests.record(elapsed_ms, status == "ok")
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            if trace is None:
+                return
+            self.model.record(trace["model_ms"], status == "ok")
+            for call in trace["calls"]:
+                stats = self.tools.setdefault(call["tool"], LatencyStats())
+                stats.record(call["wall_ms"], call.get("status") == "ok")
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "in_flight": self.in_flight,
+                "statuses": dict(self.statuses),
+                "ask": self.requests.to_dict(),
+                "model": self.model.to_dict(),
+                "tools": {name: stats.to_dict() for name, stats in sorted(self.tools.items())},
+            }
+
+
+def preload_pages(db_path: Path) -> int:
+    """Read the database file once so its pages are in the OS page cache (and so in the mmap)."""
+    size = 0
+    with open(db_path, "rb", buffering=0) as handle:
+        while chunk := handle.read(PRELOAD_BYTES):
+            size += len(chunk)
+    return size
+
+
+class AgentService:
+    """The warm state behind the HTTP endpoints: shared toolkits, model client and metrics."""
+
+    def __init__(
+        self,
+        db_path: Path = DB_PATH,
+        concurrency: int = 8,
+        timeout: float = 300.0,
+        retries: int = 0,
+        backoff: float = 2.0,
+        model: str = "gemini",
+        preload: bool = False,
+    ):
+        self.db_path = Path(db_path).resolve()
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.model = model
+        self.preload = preload
+        self.metrics = ServiceMetrics()
+        self.make_agent: Optional[Callable[..., Any]] = None
+        self.started = time.time()
+        self.warmup: Dict[str, Any] = {}
+        self._limit: Optional[asyncio.Semaphore] = None
+
+    @property
+    def sql_tools(self) -> Any:
+        return self.make_agent.keywords["sql_tools"] if self.make_agent else None
+
+    @property
+    def scoring_tools(self) -> Any:
+        return self.make_agent.keywords["scoring_tools"] if self.make_agent else None
+
+    def warm(self) -> Dict[str, Any]:
+        """Build everything a question needs before the first one arrives."""
+        steps: Dict[str, float] = {}
+        start = time.perf_counter()
+        self.make_agent = shared_agent_factory(self.db_path, self.concurrency, self.model)
+        steps["toolkits_ms"] = (time.perf_counter() - start) * 1000
+
+        mark = time.perf_counter()
+        if hasattr(self.sql_tools, "list_tables"):
+            self.sql_tools.list_tables()
+        steps["schema_ms"] = (time.perf_counter() - mark) * 1000
+
+        mark = time.perf_counter()
+        self.make_agent()  # first Agent: resolves the tool schemas agno builds lazily
+        steps["agent_ms"] = (time.perf_counter() - mark) * 1000
+
+        if self.preload and self.db_path.exists():
+            mark = time.perf_counter()
+            steps["preloaded_bytes"] = preload_pages(self.db_path)
+            steps["preload_ms"] = (time.perf_counter() - mark) * 1000
+        steps["total_ms"] = (time.perf_counter() - start) * 1000
+        self.warmup = {name: round(value, 3) for name, value in steps.items()}
+        return self.warmup
+
+    async def ask(self, prompt: str, request_id: Optional[str] = None) -> Dict[str, Any]:
+        from tools.tool_trace import ToolTrace
+
+        if self._limit is None:
+            self._limit = asyncio.Semaphore(self.concurrency)
+        request = AgentRequest(request_id or uuid.uuid4().hex[:12], prompt)
+        trace = ToolTrace(run=f"service/{request.request_id}")  # timings only: no plan engine
+        self.metrics.in_flight += 1
+        try:
+            result = await run_one(
+                request, self.make_agent, self._limit, "service",
+                self.timeout, self.retries, self.backoff, trace,
+            )
+        finally:
+            self.metrics.in_flight -= 1
+        summary = trace.summary()
+        self.metrics.record_run(result.status, result.elapsed_s * 1000, {**summary, "calls": trace.calls})
+        return {
+            "id": result.request_id,
+            "status": result.status,
+            "content": result.content,
+            "error": result.error,
+            "attempts": result.attempts,
+            "elapsed_ms": round(result.elapsed_s * 1000, 3),
+            "tool_ms": summary["tool_ms"],
+            "model_ms": summary["model_ms"],
+            "tool_calls": summary["calls"],
+        }
+
+    def health(self) -> Tuple[int, Dict[str, Any]]:
+        identity = file_identity(self.db_path)
+        engine = self.scoring_tools.engine if self.scoring_tools else None
+        status = "ok"
+        if self.make_agent is None:
+            status = "starting"
+        elif identity is None:
+            status = "no_database"
+        body = {
+            "status": status,
+            "uptime_s": round(time.time() - self.started, 3),
+            "pid": os.getpid(),
+            "model": self.model,
+            "warmup": self.warmup,
+            "db": {
+                "path": str(self.db_path),
+                "identity": identity,
+                "adviser_matrix": None if engine is None else ("stale" if engine.stale else "current"),
+            },
+        }
+        return (200 if status == "ok" else 503), body
+
+    def metrics_dict(self) -> Dict[str, Any]:
+        body = {"uptime_s": round(time.time() - self.started, 3), **self.metrics.to_dict()}
+        if hasattr(self.sql_tools, "cache_stats"):
+            body["sql_cache"] = self.sql_tools.cache_stats()
+        engine = getattr(self.sql_tools, "db_engine", None)
+        if engine is not None:
+            body["pool"] = engine.pool.status()
+        return body
+
+
+def create_app(service: AgentService, agent_os: bool = False) -> Any:
+    from contextlib import asynccontextmanager
+
+    from fastapi import Body, FastAPI, HTTPException
+    from fastapi.responses import JSONResponse
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        if service.make_agent is None:
+            await asyncio.to_thread(service.warm)
+        yield
+
+    app = FastAPI(title="Matchmaking agent service", lifespan=lifespan)
+
+    @app.post("/ask")
+    async def ask(prompt: str = Body(...), id: Optional[str] = Body(None)) -> JSONResponse:
+        if service.make_agent is None:
+            raise HTTPException(status_code=503, detail="warming up")
+        result = await service.ask(prompt, id)
+        code = {"ok": 200, "timeout": 504}.get(result["status"], 502)
+        return JSONResponse(result, status_code=code)
+
+    @app.get("/health")
+    async def health() -> JSONResponse:
+        code, body = service.health()
+        return JSONResponse(body, status_code=code)
+
+    @app.get("/metrics")
+    async def metrics() -> JSONResponse:
+        return JSONResponse(service.metrics_dict())
+
+    if agent_os:
+        from agno.os import AgentOS
+
+        if service.make_agent is None:
+            service.warm()
+        agent = service.make_agent()
+        agent.id = "matchmaker"
+        app = AgentOS(agents=[agent], base_app=app, telemetry=False).get_app()
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve the matchmaking agent from one warm process.")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind.")
+    parser.add_argument("--port", type=int, default=7777, help="Port to listen on.")
+    parser.add_argument("--db", type=Path, default=DB_PATH, help="SQLite database the agent reads.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Agent runs in flight at once (and pool size).")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Seconds allowed per attempt.")
+    parser.add_argument("--retries", type=int, default=0, help="Retries after a timeout or error.")
+    parser.add_argument(
+        "--model",
+        choices=("gemini", "standin"),
+        default="gemini",
+        help="standin: local scripted model (no API calls) for tests and latency baselines.",
+    )
+    parser.add_argument("--preload", action="store_true", help="Read the database once at start-up to warm the page cache.")
+    parser.add_argument("--agent-os", action="store_true", help="Also mount AgentOS's routes (needs python-multipart).")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    service = AgentService(
+        args.db, args.concurrency, args.timeout, args.retries, model=args.model, preload=args.preload
+    )
+    warmup = service.warm()
+    print(f"Warm in {warmup['total_ms']:.0f} ms; serving {service.db_path} on http://{args.host}:{args.port}")
+    uvicorn.run(create_app(service, agent_os=args.agent_os), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
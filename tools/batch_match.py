@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Batch matchmaking: top-N advisers for many deals in one pass, without the LLM.
+
+Deals come from explicit deal_ids (FD:/CF:/bare accession, on the command line
+or one per line in --deal-file) or from every filing on or after --since. The
+adviser matrix is loaded once and deals are fetched with one query per deal
+type, then each deal is scored by tools/scoring_engine.py. Reports are written
+under markdown/ as markdown, CSV and/or Parquet. The agent in main.py is only
+called when --narrative is passed.
+
+Run from the repo root: python -m tools.batch_match --since 2025-01-01 --format md csv
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from tools.scoring_engine import DB_PATH, REPO_ROOT, ScoringEngine, split_deal_id
+
+OUTPUT_DIR = REPO_ROOT / "markdown"
+FORMATS = ("md", "csv", "parquet")
+
+# Long-format report: one row per (deal, adviser rank).
+REPORT_COLUMNS = [
+    "deal_id",
+    "deal_type",
+    "issuer_name",
+    "issuer_state",
+    "filing_date",
+    "target_raise",
+    "candidates",
+    "rank",
+    "adviser_id",
+    "adviser_name",
+    "adviser_city",
+    "adviser_state",
+    "total_raum",
+    "composite_score",
+    "geography_score",
+    "capital_score",
+    "audience_score",
+    "ticket_score",
+    "traction_score",
+    "security_score",
+    "MAIN_OFFICE_EMAIL",
+    "CEO_EMAIL",
+    "CFO_EMAIL",
+    "CTO_EMAIL",
+    "CCO_EMAIL",
+    "GENERAL_OFFICE_EMAIL",
+    "OTHER_EMAILS",
+]
+
+MARKDOWN_COLUMNS = [
+    "rank",
+    "adviser_id",
+    "adviser_name",
+    "adviser_city",
+    "adviser_state",
+    "total_raum",
+    "composite_score",
+    "geography_score",
+    "capital_score",
+    "audience_score",
+    "MAIN_OFFICE_EMAIL",
+]
+
+NARRATIVE_PROMPT = """
+Deal {deal_id} ({deal_type}, issuer {issuer_name}, state {issuer_state}, target raise {target_raise}).
+These are its top {k} advisers from the scoring engine (same scores as mat_investor_deal_scored):
+
+{table}
+
+Explain briefly why each adviser is a good fit. Use these rows as given; only query the database
+for details they do not contain.
+"""
+
+
+def report_rows(results: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    rows = []
+    for result in results:
+        deal = result["deal"]
+        for rank, adviser in enumerate(result["advisers"], start=1):
+            rows.append({
+                **{key: deal.get(key) for key in ("deal_id", "deal_type", "issuer_name", "issuer_state",
+                                                  "filing_date", "target_raise")},
+                "candidates": result["candidates"],
+                "rank": rank,
+                **adviser,
+            })
+    return rows
+
+
+def _cell(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return f"{value:.0f}" if value.is_integer() and abs(value) >= 1000 else f"{value:.4g}"
+    return str(value).replace("|", "\\|")
+
+
+def markdown_table(rows: List[Dict[str, Any]], columns: List[str]) -> str:
+    lines = [
+        "| " + " | ".join(columns) + " |",
+        "|" + "|".join(":---" for _ in columns) + "|",
+    ]
+    for row in rows:
+        lines.append("| " + " | ".join(_cell(row.get(col)) for col in columns) + " |")
+    return "\n".join(lines)
+
+
+def markdown_report(results: List[Dict[str, Any]], k: int, narratives: Optional[Dict[str, str]] = None) -> str:
+    generated = datetime.now().isoformat(timespec="seconds")
+    parts = [f"# Top {k} advisers for {len(results)} deals", "", f"Generated {generated} by tools/batch_match.py.", ""]
+    for result in results:
+        deal = result["deal"]
+        parts.append(f"## {deal['deal_id']} — {deal.get('issuer_name') or 'unknown issuer'}")
+        parts.append("")
+        parts.append(
+            f"{deal['deal_type']}, issuer state {deal.get('issuer_state') or 'n/a'}, "
+            f"filed {deal.get('filing_date') or 'n/a'}, target raise {_cell(deal.get('target_raise')) or 'n/a'}; "
+            f"{result['candidates']} eligible advisers."
+        )
+        parts.append("")
+        rows = report_rows([result])
+        parts.append(markdown_table(rows, MARKDOWN_COLUMNS) if rows else "_No eligible advisers._")
+        parts.append("")
+        if narratives and deal["deal_id"] in narratives:
+            parts.append(narratives[deal["deal_id"]])
+            parts.append("")
+    return "\n".join(parts)
+
+
+def narrate(results: List[Dict[str, Any]], k: int) -> Dict[str, str]:
+    """One agent turn per deal; the agent (and its model client) is only imported here."""
+    from main import agno_agent
+
+    narratives = {}
+    for result in results:
+        if not result["advisers"]:
+            continue
+        deal = result["deal"]
+        prompt = NARRATIVE_PROMPT.format(
+            k=k,
+            table=markdown_table(report_rows([result]), MARKDOWN_COLUMNS),
+            **{key: deal.get(key) for key in ("deal_id", "deal_type", "issuer_name", "issuer_state", "target_raise")},
+        )
+        narratives[deal["deal_id"]] = agno_agent.run(prompt).content
+    return narratives
+
+
+def write_reports(
+    results: List[Dict[str, Any]],
+    k: int,
+    formats: Iterable[str],
+    out_dir: Path,
+    narratives: Optional[Dict[str, str]] = None,
+) -> List[Path]:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stem = out_dir / f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    frame = pd.DataFrame(report_rows(results), columns=REPORT_COLUMNS)
+    written = []
+    for fmt in formats:
+        path = stem.with_suffix(f".{fmt}")
+        if fmt == "md":
+            path.write_text(markdown_report(results, k, narratives), encoding="utf-8")
+        elif fmt == "csv":
+            frame.to_csv(path, index=False)
+        elif fmt == "parquet":
+            frame.to_parquet(path, index=False)
+        written.append(path)
+    return written
+
+
+def read_deal_ids(args: argparse.Namespace) -> Optional[List[str]]:
+    deal_ids = list(args.deal_ids)
+    if args.deal_file:
+        lines = args.deal_file.read_text().splitlines()
+        deal_ids += [line.strip() for line in lines if line.strip() and not line.startswith("#")]
+    return deal_ids or None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Top-N advisers for many deals in one pass, written as reports.")
+    parser.add_argument("deal_ids", nargs="*", help="Deals to score (FD:<accession>, CF:<accession> or a bare accession).")
+    parser.add_argument("--deal-file", type=Path, help="File with one deal_id per line.")
+    parser.add_argument("--since", help="Score every deal filed on or after this ISO date (YYYY-MM-DD).")
+    parser.add_argument(
+        "--deal-type",
+        choices=["FORM_D", "REG_CF"],
+        action="append",
+        help="Restrict --since to one deal type (repeatable); default: both.",
+    )
+    parser.add_argument("--top", type=int, default=5, help="Advisers per deal.")
+    parser.add_argument("--format", nargs="+", choices=FORMATS, default=["md"], help="Report formats to write.")
+    parser.add_argument("--out-dir", type=Path, default=OUTPUT_DIR, help="Directory for the reports.")
+    parser.add_argument("--db", type=Path, default=DB_PATH, help="SQLite database to score from.")
+    parser.add_argument(
+        "--narrative",
+        action="store_true",
+        help="Ask the agent for a short fit explanation per deal (one LLM call per deal; implies md).",
+    )
+    args = parser.parse_args()
+
+    deal_ids = read_deal_ids(args)
+    if deal_ids is None and not args.since:
+        parser.error("pass deal_ids, --deal-file or --since")
+    formats = list(dict.fromkeys(args.format + (["md"] if args.narrative else [])))
+    if "parquet" in formats and not any(importlib.util.find_spec(m) for m in ("pyarrow", "fastparquet")):
+        parser.error("--format parquet needs pyarrow or fastparquet installed")
+
+    engine = ScoringEngine(args.db)
+    results = engine.top_advisers_batch(
+        deal_ids=deal_ids,
+        since=args.since,
+        k=args.top,
+        deal_types=args.deal_type or ("FORM_D", "REG_CF"),
+    )
+    if deal_ids is not None:
+        # Compare ids the way load_deals resolves them: prefix case-folded, bare accessions of either type.
+        found = {split_deal_id(r["deal"]["deal_id"]) for r in results}
+        found |= {("", accession) for _, accession in found}
+        missing = [d for d in deal_ids if split_deal_id(d) not in found]
+        if missing:
+            print(f"Skipped {len(missing)} unknown deals: {', '.join(missing[:10])}")
+
+    narratives = narrate(results, args.top) if args.narrative else None
+    for path in write_reports(results, args.top, formats, args.out_dir, narratives):
+        print(f"Wrote {path}")
+    print(f"Scored {len(results)} deals against {len(engine.advisers)} advisers")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark: synthetic data -> loader -> materialization -> scoring queries.
+
+Generates deterministic Form D / Reg CF / ADV files with tools/synthetic_data.py
+(or reuses --data-root), loads them into a fresh SQLite database with the same
+code path as tools/load_staging.py, materializes the scoring tables with
+tools/materialize_views.py, and times representative lookups:
+
+- deal -> advisers and adviser -> deals on mat_investor_deal_scored
+- adviser -> deals on the mat_adviser_top_deals reverse index
+- a market statistic (Form D median raise by state) from the mat_cube_fd summary cube
+- deal -> advisers on the unmaterialized vw_investor_deal_scored
+- the NumPy scoring engine, single deal, hypothetical deal profile and batch
+
+Every stage is written to a JSON report (default: benchmarks/<scale>_<timestamp>.json).
+--compare prints each timing against an earlier report.
+
+Run from the repo root: python -m tools.benchmark --scale 10k
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from tools import load_staging, materialize_views
+from tools.scoring_engine import REPO_ROOT, ScoringEngine, profile_deal
+from tools.synthetic_data import SCALES, Scale, generate
+
+REPORT_DIR = REPO_ROOT / "benchmarks"
+
+DEAL_TO_ADVISERS_SQL = """
+SELECT adviser_id, adviser_name, composite_score
+FROM {source}
+WHERE deal_id = ?
+ORDER BY composite_score DESC, adviser_id
+LIMIT 10
+"""
+
+ADVISER_TO_DEALS_SQL = """
+SELECT deal_id, issuer_name, composite_score
+FROM {source}
+WHERE adviser_id = ?
+ORDER BY composite_score DESC, deal_id
+LIMIT 10
+"""
+
+ADVISER_TOP_DEALS_SQL = """
+SELECT deal_id, issuer_name, composite_score
+FROM mat_adviser_top_deals
+WHERE adviser_id = ? AND deal_type = 'FORM_D' AND deal_rank <= 10
+ORDER BY deal_rank
+"""
+
+CUBE_STATE_SQL = """
+SELECT issuer_state, deals, target_raise_p50
+FROM mat_cube_fd
+WHERE grouping_set = 'issuer_state' AND issuer_state = ?
+"""
+
+
+class Report:
+    """Collects stage timings and query latency distributions."""
+
+    def __init__(self, meta: Dict[str, Any]):
+        self.meta = meta
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.queries: Dict[str, Dict[str, Any]] = {}
+
+    @contextmanager
+    def stage(self, name: str, **extra: Any) -> Iterator[Dict[str, Any]]:
+        record: Dict[str, Any] = dict(extra)
+        start = time.perf_counter()
+        yield record
+        record["seconds"] = round(time.perf_counter() - start, 4)
+        self.stages[name] = record
+        print(f"  {name}: {record['seconds']:.3f}s" + (f" ({record['rows']} rows)" if "rows" in record else ""))
+
+    def latency(self, name: str, fn: Callable[[Any], Any], args: List[Any]) -> None:
+        if not args:
+            return
+        samples = []
+        for arg in args:
+            start = time.perf_counter()
+            fn(arg)
+            samples.append((time.perf_counter() - start) * 1000)
+        samples.sort()
+        self.queries[name] = {
+            "n": len(samples),
+            "mean_ms": round(statistics.fmean(samples), 3),
+            "p50_ms": round(samples[len(samples) // 2], 3),
+            "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+            "max_ms": round(samples[-1], 3),
+        }
+        print(f"  {name}: p50 {self.queries[name]['p50_ms']:.2f}ms over {len(samples)} calls")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"meta": self.meta, "stages": self.stages, "queries": self.queries}
+
+
+def git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_load(report: Report, con: sqlite3.Connection, data_root: Path, workers: int) -> None:
+    """Time each loader stage (per source) and a no-change rerun of the manifest check."""
+    with report.stage("load.schema"):
+        load_staging.exec_schema(con)
+    for source in load_staging.discover_sources(data_root):
+        changed = load_staging.changed_files(con, source, data_root)
+        with report.stage(f"load.{source.loader.__name__}", source=source.name) as record:
+            with con:
+                record["rows"] = source.load(con, workers)
+                load_staging.record_manifest(con, source, data_root, changed)
+                load_staging.bump_data_version(con)
+    with report.stage("load.derive_firm_ids"):
+        with con:
+            load_staging.derive_firm_ids(con)
+            load_staging.bump_data_version(con)
+    with report.stage("load.rerun_unchanged") as record:
+        record["sources_loaded"] = len(load_staging.ingest(con, data_root, workers=workers))
+
+
+def bench_materialize(report: Report, db_path: Path) -> None:
+    con = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        with report.stage("views.apply"):
+            materialize_views.apply_views(con)
+        with report.stage("materialize.full") as record:
+            materialize_views.materialize(con, full=True)
+            record["rows"] = con.execute(
+                f"SELECT COUNT(*) FROM {materialize_views.SCORED_TABLE}"
+            ).fetchone()[0]
+        with report.stage("materialize.incremental_noop"):
+            materialize_views.materialize(con)
+    finally:
+        con.close()
+
+
+def bench_queries(report: Report, db_path: Path, samples: int, view_samples: int, seed: int) -> None:
+    con = sqlite3.connect(db_path)
+    rng = random.Random(seed)
+    try:
+        deals = [r[0] for r in con.execute(
+            f"SELECT DISTINCT deal_id FROM {materialize_views.SCORED_TABLE} ORDER BY deal_id")]
+        advisers = [r[0] for r in con.execute("SELECT FilingID FROM mat_adv_features ORDER BY FilingID")]
+        deal_sample = rng.sample(deals, min(samples, len(deals)))
+        adviser_sample = rng.sample(advisers, min(samples, len(advisers)))
+
+        def _query(sql: str) -> Callable[[Any], Any]:
+            return lambda key: con.execute(sql, (key,)).fetchall()
+
+        scored = materialize_views.SCORED_TABLE
+        report.latency("sql.deal_to_advisers.mat", _query(DEAL_TO_ADVISERS_SQL.format(source=scored)), deal_sample)
+        report.latency("sql.adviser_to_deals.mat", _query(ADVISER_TO_DEALS_SQL.format(source=scored)), adviser_sample)
+        report.latency("sql.adviser_to_deals.index", _query(ADVISER_TOP_DEALS_SQL), adviser_sample)
+        states = [r[0] for r in con.execute("SELECT DISTINCT state FROM mat_adv_features WHERE state IS NOT NULL")]
+        report.latency("sql.cube.fd_by_state", _query(CUBE_STATE_SQL), [rng.choice(states) for _ in range(samples)] if states else [])
+        report.latency(
+            "sql.deal_to_advisers.view",
+            _query(DEAL_TO_ADVISERS_SQL.format(source=materialize_views.SCORED_VIEW)),
+            deal_sample[:view_samples],
+        )
+    finally:
+        con.close()
+
+    engine = ScoringEngine(db_path)
+    with report.stage("engine.load_advisers") as record:
+        engine.reload()
+        record["rows"] = len(engine.advisers)
+    report.latency("engine.top_advisers", lambda deal_id: engine.top_advisers(deal_id, 10), deal_sample)
+    profiles = [
+        profile_deal(
+            issuer_state=rng.choice(states) if states else None,
+            target_raise=rng.choice([250_000, 1_000_000, 5_000_000, 25_000_000]),
+            min_invest=rng.choice([None, 10_000, 100_000]),
+            security_type=rng.choice(["Equity", "Debt", "Other"]),
+            retail_allowed=rng.random() < 0.2,
+        )
+        for _ in range(samples)
+    ]
+    report.latency("engine.top_advisers_profile", lambda deal: engine.top_advisers_for_profile(deal, 10), profiles)
+    report.latency("engine.top_deals", lambda adviser_id: engine.top_deals(adviser_id, 10), adviser_sample)
+    with report.stage("engine.batch_all_deals") as record:
+        record["rows"] = len(engine.top_advisers_batch(deal_ids=deals, k=10))
+
+
+def compare(current: Dict[str, Any], previous: Dict[str, Any]) -> None:
+    """Print current vs previous timings (ratio > 1 means slower now)."""
+    print(f"\nvs {previous['meta'].get('started_at')} ({previous['meta'].get('git')}):")
+    for section, field in (("stages", "seconds"), ("queries", "p50_ms")):
+        for name, record in current[section].items():
+            before = previous.get(section, {}).get(name, {}).get(field)
+            now = record[field]
+            if before:
+                print(f"  {name:<34} {before:>10.3f} -> {now:>10.3f} {field}  x{now / before:.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark load, materialization and scoring on synthetic SEC data.")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="10k", help="Synthetic data preset (advisers).")
+    parser.add_argument("--advisers", type=int, help="Override the preset's adviser count.")
+    parser.add_argument("--form-d", type=int, help="Override the preset's Form D offering count.")
+    parser.add_argument("--reg-cf", type=int, help="Override the preset's Reg CF offering count.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for data generation and query sampling.")
+    parser.add_argument("--data-root", type=Path, help="Reuse existing raw files instead of generating them.")
+    parser.add_argument("--work-dir", type=Path, help="Where to put generated files and the database (default: temp).")
+    parser.add_argument("--keep", action="store_true", help="Keep the work directory after the run.")
+    parser.add_argument("--workers", type=int, default=1, help="Loader processes for ADV chunks.")
+    parser.add_argument("--samples", type=int, default=200, help="Lookups timed per indexed query.")
+    parser.add_argument("--view-samples", type=int, default=3, help="Lookups timed on the unmaterialized view.")
+    parser.add_argument(
+        "--skip",
+        nargs="*",
+        choices=["materialize", "queries"],
+        default=[],
+        help="Stages to skip (queries need materialize).",
+    )
+    parser.add_argument("--output", type=Path, help="Report path (default: benchmarks/<scale>_<timestamp>.json).")
+    parser.add_argument("--compare", type=Path, help="Earlier report to compare against.")
+    args = parser.parse_args()
+
+    preset = SCALES[args.scale]
+    scale = Scale(
+        advisers=args.advisers or preset.advisers,
+        form_d=args.form_d or preset.form_d,
+        reg_cf=args.reg_cf or preset.reg_cf,
+    )
+    work_dir = args.work_dir or Path(tempfile.mkdtemp(prefix="sec-bench-"))
+    work_dir.mkdir(parents=True, exist_ok=True)
+    db_path = work_dir / "bench.sqlite"
+    db_path.unlink(missing_ok=True)
+
+    started_at = datetime.now().isoformat(timespec="seconds")
+    report = Report({
+        "started_at": started_at,
+        "git": git_revision(),
+        "scale": args.scale,
+        "sizes": scale.__dict__,
+        "seed": args.seed,
+        "workers": args.workers,
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+    })
+    print(f"Benchmark {args.scale} {scale.__dict__} in {work_dir}")
+    try:
+        data_root = args.data_root
+        if data_root is None:
+            data_root = work_dir / "data"
+            with report.stage("generate") as record:
+                record["rows"] = generate(data_root, scale, seed=args.seed)["adv_filings"]
+
+        con = sqlite3.connect(db_path)
+        load_staging.configure_connection(con)
+        try:
+            bench_load(report, con, data_root, args.workers)
+        finally:
+            con.close()
+        if "materialize" not in args.skip:
+            bench_materialize(report, db_path)
+            if "queries" not in args.skip:
+                bench_queries(report, db_path, args.samples, args.view_samples, args.seed)
+        report.meta["db_bytes"] = db_path.stat().st_size
+    finally:
+        if not args.keep and args.work_dir is None:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    output = args.output or REPORT_DIR / f"{args.scale}_{started_at.replace(':', '').replace('-', '')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    result = report.to_dict()
+    output.write_text(json.dumps(result, indent=2))
+    print(f"Wrote {output}")
+    if args.compare:
+        compare(result, json.loads(args.compare.read_text()))
+
+
+if __name__ == "__main__":
+    main()
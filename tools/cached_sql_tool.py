@@ -0,0 +1,222 @@
+from __future__ import annotations
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Hashable, Optional, Tuple
+import json
+import os
+import re
+import threading
+import time
+from urllib.parse import urlparse
+
+from agno.tools.sql import SQLTools
+from agno.utils.log import log_debug, logger
+
+# Statements whose results may be cached; anything else (DML/DDL) runs uncached and clears the cache.
+READ_ONLY_SQL = re.compile(r"^\s*(SELECT|WITH|VALUES|EXPLAIN)\b", re.IGNORECASE)
+# Quoted literals/identifiers are kept verbatim; everything between them is case- and space-folded.
+QUOTED_SQL = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|`[^`]*`|\[[^\]]*\])")
+# A quoted literal/identifier (group 1) or a -- / /* */ comment (group 2), whichever starts first.
+COMMENTED_SQL = re.compile(
+    r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|`[^`]*`|\[[^\]]*\])|(--[^\n]*|/\*.*?(?:\*/|$))", re.DOTALL
+)
+
+
+def strip_comments(sql: str) -> str:
+    """`sql` with every comment replaced by a space (quoted text is left alone)."""
+    return COMMENTED_SQL.sub(lambda m: m.group(1) or " ", sql)
+
+
+def is_read_only(sql: str) -> bool:
+    """True for SELECT / WITH / VALUES / EXPLAIN statements, looking past leading comments."""
+    return READ_ONLY_SQL.match(strip_comments(sql)) is not None
+
+
+def normalize_sql(sql: str) -> str:
+    """Cache key text: whitespace collapsed, keywords/identifiers lowercased, trailing ';' dropped.
+
+    String literals keep their case, so WHERE state = 'TX' and WHERE state = 'tx' stay distinct.
+    """
+    parts = QUOTED_SQL.split(sql.strip().rstrip(";").strip())
+    for i in range(0, len(parts), 2):
+        parts[i] = re.sub(r"\s+", " ", parts[i]).lower()
+    return "".join(parts)
+
+
+class CachedSQLTools(SQLTools):
+    """
+    SQLTools with a result cache for the agent's repeated queries:
+    - run_sql_query: LRU/TTL cache keyed by normalized SQL + limit
+    - list_tables / describe_table: cached until the database changes
+    - cache_stats: hit/miss counters (not exposed to the model)
+
+    Every lookup compares the database's data version (file identity,
+    PRAGMA user_version bumped by load_staging.py / materialize_views.py,
+    and PRAGMA schema_version) with the one the cache was filled under and
+    drops all entries when it moved. One instance may be shared by several
+    agents: Agno runs sync tools on worker threads, so cache state is locked.
+    """
+    def __init__(
+        self,
+        db_url: Optional[str] = None,
+        max_entries: int = 256,
+        ttl_seconds: Optional[float] = 600.0,
+        **kwargs,
+    ):
+        super().__init__(db_url=db_url, **kwargs)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._results: OrderedDict[Hashable, Tuple[float, str]] = OrderedDict()
+        self._schema: Dict[Hashable, str] = {}
+        self._version: Optional[Tuple[Any, ...]] = None
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+        self._lock = threading.RLock()
+        database = self.db_engine.url.database
+        if database and database.startswith("file:"):
+            # URI filenames (e.g. file:/path/staging.sqlite?mode=ro) used by read-only pools.
+            database = urlparse(database).path
+        self._db_file = Path(database) if database and database != ":memory:" else None
+
+    # ---------- cache plumbing ----------
+    def data_version(self) -> Tuple[Any, ...]:
+        """(device, inode, user_version, schema_version) of the database right now."""
+        identity: Tuple[Any, ...] = ()
+        if self._db_file is not None and self._db_file.exists():
+            stat = os.stat(self._db_file)
+            identity = (stat.st_dev, stat.st_ino)
+        with self.db_engine.connect() as conn:
+            row = conn.exec_driver_sql(
+                "SELECT * FROM pragma_user_version, pragma_schema_version"
+            ).fetchone()
+        return identity + tuple(row)
+
+    def _sync_version(self) -> None:
+        version = self.data_version()
+        with self._lock:
+            if version != self._version:
+                if self._version is not None:
+                    log_debug(f"data version {self._version} -> {version}; clearing SQL cache")
+                    self._stats["invalidations"] += 1
+                self.clear_cache()
+                self._version = version
+
+    def clear_cache(self) -> None:
+        with self._lock:
+            self._results.clear()
+            self._schema.clear()
+
+    def _get_result(self, key: Hashable) -> Optional[str]:
+        with self._lock:
+            entry = self._results.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._results[key]
+                self._stats["misses"] += 1
+                return None
+            self._results.move_to_end(key)
+            self._stats["hits"] += 1
+            return value
+
+    def _put_result(self, key: Hashable, value: str) -> None:
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds is not None else float("inf")
+        with self._lock:
+            self._results[key] = (expires_at, value)
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def _get_schema(self, key: Hashable) -> Optional[str]:
+        with self._lock:
+            value = self._schema.get(key)
+            self._stats["hits" if value is not None else "misses"] += 1
+            return value
+
+    def _put_schema(self, key: Hashable, value: str) -> None:
+        if not value.startswith("Error"):
+            with self._lock:
+                self._schema[key] = value
+
+    def cache_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+                "entries": len(self._results),
+                "schema_entries": len(self._schema),
+                "data_version": self._version,
+            }
+
+    # ---------- tools ----------
+    def list_tables(self) -> str:
+        """Use this function to get a list of table names in the database.
+
+        Returns:
+            str: list of tables in the database.
+        """
+        self._sync_version()
+        key = ("list_tables", self.schema)
+        cached = self._get_schema(key)
+        if cached is not None:
+            return cached
+        result = super().list_tables()
+        self._put_schema(key, result)
+        return result
+
+    def describe_table(self, table_name: str) -> str:
+        """Use this function to describe a table.
+
+        Args:
+            table_name (str): The name of the table to get the schema for.
+
+        Returns:
+            str: schema of a table
+        """
+        self._sync_version()
+        key = ("describe_table", self.schema, table_name.lower())
+        cached = self._get_schema(key)
+        if cached is not None:
+            return cached
+        result = super().describe_table(table_name)
+        self._put_schema(key, result)
+        return result
+
+    def run_sql_query(self, query: str, limit: Optional[int] = 10) -> str:
+        """Use this function to run a SQL query and return the result.
+
+        Args:
+            query (str): The query to run.
+            limit (int, optional): The number of rows to return. Defaults to 10. Use `None` to show all results.
+                Non-positive values return no rows.
+        Returns:
+            str: Result of the SQL query.
+        Notes:
+            - The result may be empty if the query does not return any data.
+        """
+        if not is_read_only(query):
+            result = super().run_sql_query(query, limit)
+            with self._lock:
+                self.clear_cache()
+                self._version = None
+            return result
+
+        self._sync_version()
+        key = ("run_sql_query", normalize_sql(query), limit)
+        cached = self._get_result(key)
+        if cached is not None:
+            return cached
+        try:
+            result = json.dumps(self.run_sql(sql=query, limit=limit), default=str)
+        except Exception as e:
+            return self.query_error(query, e)
+        self._put_result(key, result)
+        return result
+
+    def query_error(self, query: str, error: Exception) -> str:
+        """The tool response for a failed read-only query (errors are never cached)."""
+        logger.exception("Error running query")
+        return f"Error running query: {error}"
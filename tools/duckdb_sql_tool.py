@@ -0,0 +1,162 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import json
+import threading
+
+import duckdb
+from agno.tools import Toolkit
+from agno.utils.log import log_debug, logger
+
+from tools.cached_sql_tool import QUOTED_SQL, READ_ONLY_SQL, strip_comments
+from tools.export_parquet import PARQUET_DIR, current_snapshot, read_manifest
+
+
+class DuckDBSQLTools(Toolkit):
+    """
+    The SQLTools surface (list_tables / describe_table / run_sql_query) served
+    by DuckDB over the Parquet snapshot written by tools/export_parquet.py.
+
+    Every snapshot dataset is exposed as a view under its SQLite names
+    (vw_investor_deal_scored and mat_investor_deal_scored, ...), so the
+    agent's SELECTs run unchanged as long as they stick to portable SQL.
+    Views are rebuilt, pinned to the new snapshot's directory, whenever
+    parquet_dir/current is repointed at a new snapshot.
+
+    The connection is in-memory and locked down once opened: it may read
+    files under parquet_dir and nothing else (allowed_directories with
+    enable_external_access off, so no other paths, URLs, ATTACH, COPY or
+    extension installs), and lock_configuration keeps any statement from
+    undoing that. run_sql_query only accepts a single SELECT/WITH statement.
+    Each call gets its own cursor, so one instance may be shared across agents.
+    """
+    def __init__(
+        self,
+        parquet_dir: Optional[Path] = None,
+        threads: Optional[int] = None,
+        name: str = "sql_tools",
+        **kwargs,
+    ):
+        registered_tools = [
+            self.list_tables,
+            self.describe_table,
+            self.run_sql_query,
+        ]
+        super().__init__(name=name, tools=registered_tools, **kwargs)
+        self.parquet_dir = Path(parquet_dir or PARQUET_DIR)
+        self._con = duckdb.connect(":memory:")
+        if threads:
+            self._con.execute(f"SET threads = {int(threads)}")
+        allowed = (self.parquet_dir.resolve().as_posix().rstrip("/") + "/").replace("'", "''")
+        self._con.execute(f"SET allowed_directories = ['{allowed}']")
+        self._con.execute("SET enable_external_access = false")
+        self._con.execute("SET lock_configuration = true")
+        self._lock = threading.Lock()
+        self._snapshot: Optional[Path] = None
+        self._tables: List[str] = []
+
+    # ---------- snapshot plumbing ----------
+    def _sync_snapshot(self) -> None:
+        snapshot = current_snapshot(self.parquet_dir)
+        with self._lock:
+            if snapshot is not None and snapshot == self._snapshot:
+                return
+            manifest = read_manifest(snapshot) if snapshot is not None else None
+            if manifest is None:
+                raise FileNotFoundError(f"no Parquet snapshot in {self.parquet_dir}; run python -m tools.export_parquet")
+            for table in self._tables:
+                self._con.execute(f"DROP VIEW IF EXISTS {table}")
+            self._tables = []
+            for dataset, info in manifest["tables"].items():
+                files = (snapshot / dataset / "**" / "*.parquet").as_posix()
+                for alias in info["aliases"]:
+                    self._con.execute(
+                        f"CREATE VIEW {alias} AS "
+                        f"SELECT * FROM read_parquet('{files}', hive_partitioning = true, union_by_name = true)"
+                    )
+                    self._tables.append(alias)
+            self._snapshot = snapshot
+            log_debug(f"DuckDB views over snapshot {manifest['created_at']}: {self._tables}")
+
+    def _cursor(self) -> duckdb.DuckDBPyConnection:
+        self._sync_snapshot()
+        return self._con.cursor()
+
+    # ---------- tools ----------
+    def list_tables(self) -> str:
+        """Use this function to get a list of table names in the database.
+
+        Returns:
+            str: list of tables in the database.
+        """
+        try:
+            self._sync_snapshot()
+            return json.dumps(sorted(self._tables))
+        except Exception as e:
+            logger.exception("Error getting tables")
+            return f"Error getting tables: {e}"
+
+    def describe_table(self, table_name: str) -> str:
+        """Use this function to describe a table.
+
+        Args:
+            table_name (str): The name of the table to get the schema for.
+
+        Returns:
+            str: schema of a table
+        """
+        try:
+            self._sync_snapshot()
+            if table_name not in self._tables:
+                return f"Error getting table schema: unknown table {table_name!r}; see list_tables"
+            cur = self._con.cursor()
+            try:
+                rows = cur.execute(f"DESCRIBE {table_name}").fetchall()
+            finally:
+                cur.close()
+            return json.dumps([
+                {"name": name, "type": kind, "nullable": null == "YES", "default": default}
+                for name, kind, null, _, default, _ in rows
+            ])
+        except Exception as e:
+            logger.exception("Error getting table schema")
+            return f"Error getting table schema: {e}"
+
+    def run_sql_query(self, query: str, limit: Optional[int] = 10) -> str:
+        """Use this function to run a SQL query and return the result.
+
+        Args:
+            query (str): The query to run.
+            limit (int, optional): The number of rows to return. Defaults to 10. Use `None` to show all results.
+                Non-positive values return no rows.
+        Returns:
+            str: Result of the SQL query.
+        Notes:
+            - The result may be empty if the query does not return any data.
+        """
+        try:
+            return json.dumps(self.run_sql(sql=query, limit=limit), default=str)
+        except Exception as e:
+            logger.exception("Error running query")
+            return f"Error running query: {e}"
+
+    def run_sql(self, sql: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        log_debug(f"Running DuckDB sql |\n{sql}")
+        statement = strip_comments(sql).strip().rstrip(";")
+        if not READ_ONLY_SQL.match(statement) or any(";" in part for part in QUOTED_SQL.split(statement)[::2]):
+            raise ValueError("only a single read-only statement (SELECT or WITH ... SELECT) runs on the DuckDB snapshot")
+        cur = self._cursor()
+        try:
+            cur.execute(sql)
+            if cur.description is None:
+                return []
+            if limit is None:
+                rows = cur.fetchall()
+            elif limit > 0:
+                rows = cur.fetchmany(limit)
+            else:
+                rows = []
+            names = [d[0] for d in cur.description]
+            return [dict(zip(names, row)) for row in rows]
+        finally:
+            cur.close()
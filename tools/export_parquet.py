@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Snapshot the feature and scored tables to partitioned Parquet.
+
+Column stores answer the scan/aggregate questions (e.g. "top advisers per
+state by RAUM bucket") far faster than row-oriented SQLite, so this writes
+each table in SNAPSHOT_TABLES as a hive-partitioned Parquet dataset under
+data/parquet/<name>/ (e.g. investor_deal_scored/deal_type=FORM_D/issuer_state=TX/).
+The mat_* copy is read when tools/materialize_views.py has built it, else the
+vw_* view. Rows are streamed in chunks, so memory stays flat.
+
+Each snapshot is written to its own directory under data/parquet/snapshots/,
+with _snapshot.json recording the database's data version (PRAGMA
+user_version) and row counts, and published by atomically repointing the
+data/parquet/current symlink at it: a reader resolves either the old
+snapshot or the new one, never a half-written or missing one. The previous
+snapshot is kept for queries still reading it; older ones are removed.
+Unchanged databases are skipped unless --force. Query the
+snapshot with tools/duckdb_sql_tool.py (QUERY_BACKEND = "duckdb" in main.py).
+
+Needs pyarrow. Run from the repo root: python -m tools.export_parquet
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from tools.scoring_engine import DB_PATH, REPO_ROOT
+
+PARQUET_DIR = REPO_ROOT / "data" / "parquet"
+MANIFEST_NAME = "_snapshot.json"
+CURRENT_NAME = "current"      # symlink to the snapshot being served
+SNAPSHOTS_NAME = "snapshots"  # one directory per written snapshot
+CHUNK_ROWS = 200_000
+
+
+@dataclass
+class SnapshotTable:
+    name: str                # dataset directory under the snapshot root
+    view: str                # SQLite view; its mat_* table is preferred when present
+    partition_by: List[str]  # hive partition columns
+    aliases: List[str]       # names the DuckDB backend exposes the dataset under
+
+
+SNAPSHOT_TABLES = [
+    SnapshotTable("fd_features", "vw_fd_features", ["issuer_state"], ["vw_fd_features", "mat_fd_features"]),
+    SnapshotTable("cf_features", "vw_cf_features", ["STATEORCOUNTRY"], ["vw_cf_features", "mat_cf_features"]),
+    SnapshotTable("adv_features", "vw_adv_features", ["state"], ["vw_adv_features", "mat_adv_features"]),
+    SnapshotTable(
+        "investor_deal_scored",
+        "vw_investor_deal_scored",
+        ["deal_type", "issuer_state"],
+        ["vw_investor_deal_scored", "mat_investor_deal_scored"],
+    ),
+    SnapshotTable("adviser_top_deals", "mat_adviser_top_deals", ["deal_type"], ["mat_adviser_top_deals"]),
+    SnapshotTable("cube_fd", "mat_cube_fd", [], ["mat_cube_fd"]),
+    SnapshotTable("cube_cf", "mat_cube_cf", [], ["mat_cube_cf"]),
+    SnapshotTable("cube_adv", "mat_cube_adv", [], ["mat_cube_adv"]),
+]
+
+
+def source_for(con: sqlite3.Connection, view: str) -> Optional[str]:
+    """The mat_* copy of `view` if it exists, else `view` itself; None when neither exists."""
+    names = {row[0] for row in con.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")}
+    table = view.replace("vw_", "mat_", 1)
+    if table in names:
+        return table
+    return view if view in names else None
+
+
+def data_version(con: sqlite3.Connection) -> List[int]:
+    return list(con.execute("SELECT * FROM pragma_user_version, pragma_schema_version").fetchone())
+
+
+def current_snapshot(root: Path) -> Optional[Path]:
+    """The snapshot directory root/current points to, or None before the first export."""
+    current = root / CURRENT_NAME
+    return current.resolve() if current.exists() else None
+
+
+def read_manifest(snapshot: Path) -> Optional[Dict[str, Any]]:
+    path = snapshot / MANIFEST_NAME
+    return json.loads(path.read_text()) if path.exists() else None
+
+
+def swap_current(root: Path, snapshot: Path) -> None:
+    """Point root/current at `snapshot`: a new symlink renamed over the old one (a single atomic rename)."""
+    link = root / f"{CURRENT_NAME}.tmp"
+    link.unlink(missing_ok=True)
+    link.symlink_to(snapshot.relative_to(root), target_is_directory=True)
+    os.replace(link, root / CURRENT_NAME)
+
+
+def _arrow_schema(con: sqlite3.Connection, source: str, columns: List[str]):
+    """One Arrow schema for every chunk: numeric columns -> float64, everything else -> string.
+
+    Chunks typed independently would disagree whenever a column is all NULL in
+    one of them, and a dataset's files must share a schema. Declared types
+    decide where SQLite has them (mat_* tables); view expressions carry none,
+    so those columns are typed by one scan of their storage classes.
+    """
+    import pyarrow as pa
+
+    declared = {row[1]: (row[2] or "").upper() for row in con.execute(f"PRAGMA table_info({source})")}
+    numeric = {col for col, kind in declared.items() if any(t in kind for t in ("REAL", "INT", "NUM", "FLOA", "DOUB"))}
+    undeclared = [col for col in columns if not declared.get(col)]
+    if undeclared:
+        probes = ", ".join(
+            f"""MAX(typeof("{col}") IN ('integer', 'real')) - 2 * MAX(typeof("{col}") IN ('text', 'blob'))"""
+            for col in undeclared
+        )
+        flags = con.execute(f"SELECT {probes} FROM {source}").fetchone()
+        numeric.update(col for col, flag in zip(undeclared, flags) if flag == 1)
+    return pa.schema([pa.field(col, pa.float64() if col in numeric else pa.string()) for col in columns])
+
+
+def export_table(con: sqlite3.Connection, spec: SnapshotTable, root: Path, chunk_rows: int = CHUNK_ROWS) -> Optional[Dict[str, Any]]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    source = source_for(con, spec.view)
+    if source is None:
+        return None
+    # PRAGMA names are unique (CREATE TABLE AS renames duplicates to name:1), unlike the view's cursor names.
+    columns = [row[1] for row in con.execute(f"PRAGMA table_info({source})")]
+    select = ", ".join(f'"{col}"' for col in columns)
+    schema = _arrow_schema(con, source, columns)
+    rows = 0
+    for part, chunk in enumerate(pd.read_sql_query(f"SELECT {select} FROM {source}", con, chunksize=chunk_rows)):
+        for field in schema:
+            if pa.types.is_floating(field.type):
+                chunk[field.name] = pd.to_numeric(chunk[field.name], errors="coerce")
+            else:
+                chunk[field.name] = chunk[field.name].astype("string")
+        pq.write_to_dataset(
+            pa.Table.from_pandas(chunk, schema=schema, preserve_index=False),
+            root_path=root / spec.name,
+            partition_cols=spec.partition_by,
+            basename_template=f"part-{part:05d}-{{i}}.parquet",
+        )
+        rows += len(chunk)
+    return {"source": source, "rows": rows, "partition_by": spec.partition_by, "aliases": spec.aliases}
+
+
+def export_snapshot(db_path: Path, root: Path = PARQUET_DIR, force: bool = False) -> Optional[Dict[str, Any]]:
+    """Write a fresh snapshot and point root/current at it; returns its manifest, or None when already current."""
+    root = Path(root).resolve()
+    con = sqlite3.connect(db_path)
+    try:
+        version = data_version(con)
+        previous = current_snapshot(root)
+        served = read_manifest(previous) if previous is not None else None
+        if not force and served is not None and served.get("data_version") == version:
+            return None
+        (root / SNAPSHOTS_NAME).mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(prefix=time.strftime("%Y%m%d_%H%M%S-"), dir=root / SNAPSHOTS_NAME))
+        staging.chmod(0o755)  # mkdtemp creates it private to this user
+        manifest: Dict[str, Any] = {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "database": str(Path(db_path).resolve()),
+            "data_version": version,
+            "tables": {},
+        }
+        try:
+            for spec in SNAPSHOT_TABLES:
+                start = time.perf_counter()
+                info = export_table(con, spec, staging)
+                if info is None:
+                    print(f"  {spec.name}: skipped ({spec.view} not found)")
+                    continue
+                info["seconds"] = round(time.perf_counter() - start, 3)
+                manifest["tables"][spec.name] = info
+                print(f"  {spec.name}: {info['rows']} rows from {info['source']} in {info['seconds']:.2f}s")
+            (staging / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2))
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+    finally:
+        con.close()
+
+    swap_current(root, staging)
+    for old in (root / SNAPSHOTS_NAME).iterdir():
+        if old not in (staging, previous):
+            shutil.rmtree(old, ignore_errors=True)
+    # Datasets written directly under root before snapshots were kept in their own directories.
+    if (root / MANIFEST_NAME).exists():
+        for spec in SNAPSHOT_TABLES:
+            shutil.rmtree(root / spec.name, ignore_errors=True)
+        (root / MANIFEST_NAME).unlink()
+    return manifest
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Snapshot feature and scored tables to partitioned Parquet.")
+    parser.add_argument("--db", type=Path, default=DB_PATH, help="SQLite database to snapshot.")
+    parser.add_argument("--out", type=Path, default=PARQUET_DIR, help="Snapshot directory.")
+    parser.add_argument("--force", action="store_true", help="Rewrite even if the database has not changed.")
+    args = parser.parse_args()
+
+    if importlib.util.find_spec("pyarrow") is None:
+        parser.error("the Parquet snapshot needs pyarrow installed")
+    manifest = export_snapshot(args.db, args.out, force=args.force)
+    if manifest is None:
+        print(f"{args.out} is current (data version unchanged); pass --force to rewrite")
+    else:
+        total = sum(t["rows"] for t in manifest["tables"].values())
+        print(f"Wrote {total} rows in {len(manifest['tables'])} datasets to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,382 @@
+from __future__ import annotations
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Set
+import json
+import re
+import sqlite3
+import time
+
+from agno.utils.log import log_debug, logger
+
+from tools.cached_sql_tool import QUOTED_SQL, CachedSQLTools, is_read_only, strip_comments
+from tools.tool_trace import explain_plan
+
+# The heavy deal x adviser relations: view -> its materialized copy (tools/materialize_views.py).
+GUARDED_VIEWS = {
+    "vw_investor_deal_scored": "mat_investor_deal_scored",
+    "vw_investor_deal_candidates": "mat_investor_deal_candidates",
+}
+GUARDED_TABLES = set(GUARDED_VIEWS.values())
+
+# A key predicate SQLite can push into the views: the key compared to a literal or bound parameter
+# (deal_id = 'FD:...', adviser_id IN (?, ...)); string literals are blanked to '' before matching,
+# and a key compared to another column (a join predicate) does not count.
+LITERAL = r"(?:''|[-+]?\d|\?|[:@$]\w)"
+KEY_FILTER = re.compile(
+    rf"\b(deal_id|accession_id|adviser_id)[\"`\]]?\s*(?:==?|\bIN\s*\()\s*{LITERAL}", re.IGNORECASE
+)
+# FROM/JOIN [schema.]<relation> [AS] <alias>, names bare or quoted: EXPLAIN QUERY PLAN names
+# aliased tables by their alias.
+IDENTIFIER = r'(?:"(?:[^"]|"")+"|`[^`]+`|\[[^\]]+\]|\w+)'
+RELATION = re.compile(
+    rf"\b(?:FROM|JOIN)\s+(?:{IDENTIFIER}\s*\.\s*)?({IDENTIFIER})(?:\s+(?:AS\s+)?({IDENTIFIER}))?",
+    re.IGNORECASE,
+)
+NOT_ALIASES = {
+    "WHERE", "JOIN", "LEFT", "RIGHT", "FULL", "INNER", "OUTER", "CROSS", "NATURAL", "ON", "USING",
+    "GROUP", "ORDER", "LIMIT", "HAVING", "WINDOW", "UNION", "EXCEPT", "INTERSECT", "INDEXED", "NOT",
+}
+
+# A SCAN of a guarded table is let through when the outer query stops it after this many rows:
+# a LIMIT at most this large and nothing (ORDER BY, GROUP BY, DISTINCT, aggregates, compounds)
+# that needs every row first. The time budget still applies.
+BOUNDED_SCAN_ROWS = 1_000
+OUTER_LIMIT = re.compile(r"\bLIMIT\s+(\d+)(?:\s*(?:,|\bOFFSET\b)\s*(\d+))?\s*;?\s*$", re.IGNORECASE)
+NEEDS_EVERY_ROW = re.compile(
+    r"\b(?:ORDER\s+BY|GROUP\s+BY|DISTINCT|UNION|EXCEPT|INTERSECT|OVER|"
+    r"(?:COUNT|SUM|AVG|TOTAL|MIN|MAX|GROUP_CONCAT|STRING_AGG)\s*\()",
+    re.IGNORECASE,
+)
+# Plan steps that read a whole input before the outer loop returns its first row.
+BUFFERING_STEPS = ("TEMP B-TREE", "MATERIALIZE", "CO-ROUTINE", "SUBQUERY", "COMPOUND", "AUTOMATIC")
+
+# The progress handler runs every PROGRESS_STEPS SQLite VM instructions (~1ms of work).
+PROGRESS_STEPS = 10_000
+
+FILTER_HINT = (
+    "Add a deal_id, accession_id or adviser_id filter (e.g. WHERE deal_id = 'FD:<accession>'), "
+    "use scoring_tools.top_advisers_for_deal / top_deals_for_adviser, or read the mat_cube_* "
+    "summary tables for counts, totals and medians."
+)
+# Authorizer actions a read-only statement needs; anything else (a WITH ... DELETE, a PRAGMA,
+# ATTACH, CREATE TEMP ...) is denied while it compiles.
+READ_ACTIONS = {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION, sqlite3.SQLITE_RECURSIVE}
+READ_ONLY_HINT = (
+    "Rewrite the request as a SELECT. The data is changed only by the loader and materializer "
+    "(python -m tools.serving_db), never through the agent."
+)
+
+
+class QueryRejected(Exception):
+    """A query refused before or cancelled during execution for exceeding its cost budget."""
+
+    error = "too_expensive"
+
+    def __init__(self, reason: str, message: str, hint: str, **details: Any):
+        super().__init__(message)
+        self.reason = reason
+        self.message = message
+        self.hint = hint
+        self.details = details
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "ok": False,
+            "error": self.error,
+            "reason": self.reason,
+            "message": self.message,
+            "hint": self.hint,
+            **self.details,
+        }
+
+
+class StatementRefused(QueryRejected):
+    """A statement the agent's SQL tool never runs: anything but a read-only query."""
+
+    error = "read_only"
+
+
+def _unquoted(sql: str) -> List[str]:
+    """`sql` split into alternating unquoted / quoted parts (even indexes are outside quotes)."""
+    return QUOTED_SQL.split(sql)
+
+
+def _blank_strings(sql: str) -> str:
+    """`sql` with every string literal replaced by '' (quoted identifiers are kept)."""
+    parts = _unquoted(sql)
+    for i in range(1, len(parts), 2):
+        if parts[i].startswith("'"):
+            parts[i] = "''"
+    return "".join(parts)
+
+
+def _identifier(token: str) -> str:
+    if token[:1] in ('"', "`", "["):
+        token = token[1:-1].replace('""', '"')
+    return token.lower()
+
+
+def relation_names(sql: str, tables: Set[str]) -> Set[str]:
+    """Names (the table itself and any alias) under which `tables` appear in FROM/JOIN clauses."""
+    names: Set[str] = set()
+    for table, alias in RELATION.findall(_blank_strings(sql)):
+        if _identifier(table) in tables:
+            names.add(_identifier(table))
+            if alias and (alias[:1] in ('"', "`", "[") or alias.upper() not in NOT_ALIASES):
+                names.add(_identifier(alias))
+    return names
+
+
+def outer_level(sql: str) -> str:
+    """The outer query's own text: string literals blanked, everything inside parentheses dropped."""
+    kept: List[str] = []
+    depth = 0
+    for i, part in enumerate(_unquoted(_blank_strings(sql))):
+        if i % 2:
+            if depth == 0:
+                kept.append(part)
+            continue
+        for ch in part:
+            if ch == ")":
+                depth = max(depth - 1, 0)
+            if depth == 0:
+                kept.append(ch)
+            if ch == "(":
+                depth += 1
+    return "".join(kept)
+
+
+def step_target(line: str) -> str:
+    """The table or alias a plan "SCAN ..." / "SEARCH ..." step reads, without a main. prefix."""
+    target = line.strip().split(" ", 1)[1].split(" USING ")[0].strip().lower()
+    return target[len("main."):] if target.startswith("main.") else target
+
+
+def bounded_scan(sql: str, plan: List[str], scans: List[str]) -> bool:
+    """True when the outer query stops the scan after a few rows (see BOUNDED_SCAN_ROWS)."""
+    outer = outer_level(sql)
+    limit = OUTER_LIMIT.search(outer)
+    if limit is None or NEEDS_EVERY_ROW.search(outer):
+        return False
+    if sum(int(n) for n in limit.groups() if n) > BOUNDED_SCAN_ROWS:
+        return False
+    if any(step in line for line in plan for step in BUFFERING_STEPS):
+        return False
+    # Only the outermost loop: a table scanned inside a join is re-read for every outer row.
+    loops = [line.strip() for line in plan if line.strip().startswith(("SCAN ", "SEARCH "))]
+    return len(scans) == 1 and loops[:1] == scans
+
+
+class GuardedSQLTools(CachedSQLTools):
+    """
+    CachedSQLTools with a cost guard on the agent's read-only queries:
+    - every statement goes through check_query, comments stripped first; only
+      read-only queries run (anything else answers {"error": "read_only"})
+    - references to vw_investor_deal_scored / vw_investor_deal_candidates are
+      rewritten to their mat_* copies when those exist (same columns)
+    - EXPLAIN QUERY PLAN runs first; a query reading mat_investor_deal_scored
+      or mat_investor_deal_candidates is refused when its plan SCANs any table
+      (the guarded one without a deal_id / accession_id / adviser_id index, or
+      another table whose every row drives an index probe or feeds an IN
+      list) unless a small outer LIMIT with no ORDER BY stops it early
+      (BOUNDED_SCAN_ROWS); so is a view query without a key filter (the key
+      against a literal or parameter) when no mat_* copy exists
+    - max_ms: wall-time budget enforced by SQLite's progress handler, which
+      interrupts the statement; the pooled connection stays usable
+    - max_rows: queries producing more rows (limit=None or a larger limit) are
+      cancelled at max_rows + 1
+
+    Refused and cancelled queries answer with a JSON error
+    ({"ok": false, "error": "too_expensive" or "read_only", "reason": ..., "hint": ...}) the
+    agent can act on, instead of tying up a worker for minutes.
+    """
+    def __init__(
+        self,
+        db_url: Optional[str] = None,
+        max_ms: Optional[float] = 5000.0,
+        max_rows: Optional[int] = 10_000,
+        rewrite_views: bool = True,
+        **kwargs,
+    ):
+        super().__init__(db_url=db_url, **kwargs)
+        self.max_ms = max_ms
+        self.max_rows = max_rows
+        self.rewrite_views = rewrite_views
+
+    # ---------- guard ----------
+    def _table_names(self) -> Set[str]:
+        with self.db_engine.connect() as conn:
+            rows = conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+        return {row[0].lower() for row in rows}
+
+    def rewrite(self, query: str) -> str:
+        """The statement run for `query`: comments dropped, guarded views pointed at their mat_* copies
+        when those exist (what check_query returns for a query it lets through)."""
+        return self._rewrite(strip_comments(query).strip(), self._table_names())
+
+    def _rewrite(self, query: str, tables: Set[str]) -> str:
+        parts = _unquoted(query)
+        existing = tables & GUARDED_TABLES if self.rewrite_views else set()
+        for view, table in GUARDED_VIEWS.items():
+            if table in existing:
+                for i in range(0, len(parts), 2):
+                    parts[i] = re.sub(rf"\b{view}\b", table, parts[i], flags=re.IGNORECASE)
+        return "".join(parts)
+
+    def check_query(self, query: str) -> str:
+        """The query to run in place of `query` (see rewrite); raises StatementRefused for anything but
+        a read-only query and QueryRejected for unbounded scans."""
+        query = strip_comments(query).strip()
+        if not is_read_only(query):
+            raise StatementRefused(
+                "not_read_only",
+                "Only read-only queries (SELECT, or WITH ... SELECT) run through this tool.",
+                READ_ONLY_HINT,
+            )
+        tables = self._table_names()
+        sql = self._rewrite(query, tables)
+        if sql != query:
+            log_debug(f"guarded query rewritten to the materialized tables |\n{sql}")
+
+        views = sorted(relation_names(sql, set(GUARDED_VIEWS)) & set(GUARDED_VIEWS))
+        if views and not KEY_FILTER.search(_blank_strings(sql)):
+            raise QueryRejected(
+                "unfiltered_view",
+                f"{', '.join(views)} re-scores every deal/adviser pair and the query has no key filter.",
+                FILTER_HINT,
+            )
+
+        try:
+            plan = explain_plan(self.db_engine, sql)
+        except Exception as e:  # syntax errors etc. surface from the real execution
+            log_debug(f"EXPLAIN QUERY PLAN failed: {e}")
+            return sql
+        guarded = relation_names(sql, GUARDED_TABLES) | GUARDED_TABLES
+        loops = [line.strip() for line in plan if line.strip().startswith(("SCAN ", "SEARCH "))]
+        if not any(step_target(line) in guarded for line in loops):
+            return sql
+        # Any table scan counts, not only the guarded table's: scanning a driving table probes the
+        # guarded index once per row, and an IN (SELECT ...) list built from a whole table or index
+        # ("... FOR IN-OPERATOR") can name every adviser.
+        names = relation_names(sql, tables) | tables
+        scans = [line for line in loops if line.startswith("SCAN ") and step_target(line) in names]
+        scans += [line.strip() for line in plan if line.strip().endswith(" FOR IN-OPERATOR")]
+        if scans and not bounded_scan(sql, plan, scans):
+            raise QueryRejected(
+                "unbounded_scan",
+                "The query reads every scored deal/adviser pair, or probes them once per row of a scanned "
+                "table (no deal_id, accession_id or adviser_id filter bounds it).",
+                FILTER_HINT,
+                full_scans=scans,
+                plan=plan,
+            )
+        return sql
+
+    # ---------- execution ----------
+    @contextmanager
+    def budget_cursor(self, max_ms: Optional[float] = None) -> Iterator[sqlite3.Cursor]:
+        """A raw cursor on a pooled connection; statements running past max_ms (default: self.max_ms)
+        are interrupted by the progress handler and raise QueryRejected("time_budget"). The cursor
+        only reads: the pooled connection never commits, so a write would be rolled back after
+        reporting success; an authorizer refuses it up front with StatementRefused("not_read_only")."""
+        max_ms = self.max_ms if max_ms is None else max_ms
+        deadline = time.monotonic() + max_ms / 1000 if max_ms is not None else None
+        expired: List[bool] = []
+
+        def over_budget() -> int:
+            if deadline is not None and time.monotonic() > deadline:
+                expired.append(True)
+                return 1
+            return 0
+
+        def read_only(action: int, *_: Any) -> int:
+            if action in READ_ACTIONS:
+                return sqlite3.SQLITE_OK
+            denied.append(action)
+            return sqlite3.SQLITE_DENY
+
+        denied: List[int] = []
+        with self.db_engine.connect() as conn:
+            raw = conn.connection.driver_connection
+            raw.set_progress_handler(over_budget, PROGRESS_STEPS)
+            raw.set_authorizer(read_only)
+            cur = raw.cursor()
+            try:
+                yield cur
+            except sqlite3.DatabaseError:
+                if denied:
+                    raise StatementRefused(
+                        "not_read_only",
+                        "Only read-only queries run through this tool; the statement writes to the database.",
+                        READ_ONLY_HINT,
+                    ) from None
+                if expired:
+                    raise QueryRejected(
+                        "time_budget",
+                        f"The query ran longer than {max_ms:.0f} ms and was cancelled.",
+                        f"Narrow the filters or select fewer rows. {FILTER_HINT}",
+                        max_ms=max_ms,
+                    ) from None
+                raise
+            finally:
+                cur.close()
+                raw.set_progress_handler(None, 0)
+                raw.set_authorizer(None)
+
+    def run_sql(self, sql: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Run a read-only statement under the time and row budgets."""
+        log_debug(f"Running guarded sql |\n{sql}")
+        fetch = limit
+        if self.max_rows is not None and (limit is None or limit > self.max_rows):
+            fetch = self.max_rows + 1
+        with self.budget_cursor() as cur:
+            cur.execute(sql)
+            if cur.description is None:
+                return []
+            if fetch is None:
+                rows = cur.fetchall()
+            elif fetch > 0:
+                rows = cur.fetchmany(fetch)
+            else:
+                rows = []
+            names = [d[0] for d in cur.description]
+        if fetch is not None and fetch != limit and len(rows) > self.max_rows:
+            raise QueryRejected(
+                "row_budget",
+                f"The query returns more than {self.max_rows} rows.",
+                "Add filters or a LIMIT, aggregate in SQL (GROUP BY, or the mat_cube_* tables), or page through "
+                "it with result_pages.page_scored_query.",
+                max_rows=self.max_rows,
+            )
+        return [dict(zip(names, row)) for row in rows]
+
+    # ---------- tools ----------
+    def run_sql_query(self, query: str, limit: Optional[int] = 10) -> str:
+        """Use this function to run a SQL query and return the result.
+
+        Queries that would scan every scored deal/adviser pair, run too long or return too many rows are
+        refused with a JSON error ({"ok": false, "error": "too_expensive", "reason": ..., "hint": ...});
+        follow its hint (add a deal_id / accession_id / adviser_id filter, aggregate, or use a LIMIT).
+        Only read-only queries (SELECT, WITH ... SELECT) run; anything else is refused with "error": "read_only".
+
+        Args:
+            query (str): The query to run.
+            limit (int, optional): The number of rows to return. Defaults to 10. Use `None` to show all results.
+                Non-positive values return no rows.
+        Returns:
+            str: Result of the SQL query.
+        Notes:
+            - The result may be empty if the query does not return any data.
+        """
+        self._sync_version()
+        try:
+            sql = self.check_query(query)
+        except QueryRejected as e:
+            return self.query_error(query, e)
+        return super().run_sql_query(sql, limit)
+
+    def query_error(self, query: str, error: Exception) -> str:
+        if isinstance(error, QueryRejected):
+            logger.warning(f"Query refused ({error.reason}): {query}")
+            return json.dumps(error.to_dict(), default=str)
+        return super().query_error(query, error)
@@ -3,22 +3,39 @@
 Load SEC Reg CF, Reg D, and Form ADV datasets into SQLite staging tables.
 
 The script expects the raw quarterly files under ~/Downloads/data/
-and writes a SQLite database at data/staging.sqlite.
+(<quarter>_d, <quarter>_cf and adv-filing-data-* directories, plus the
+Schedule R IA_Firm_Download_SCH_R_*.csv contact extract) and writes a
+SQLite database at data/staging.sqlite. Each source file is recorded in
+stg_ingest_manifest with its size, mtime and hash; reruns load only new or
+changed files and upsert their rows by accession number / FilingID.
 """
 
 from __future__ import annotations
 
+import argparse
+import hashlib
+import os
+import re
 import sqlite3
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime
+from functools import partial
 from pathlib import Path
-from typing import Iterable
+from typing import Callable, Dict, Iterable, List, Set
 
 import pandas as pd
 
+from tools.materialize_views import bump_data_version
+
 REPO_ROOT = Path(__file__).resolve().parents[1]
 DB_PATH = REPO_ROOT / "data" / "staging.sqlite"
 DATA_ROOT = Path.home() / "Downloads" / "data"
 SCHEMA_PATH = REPO_ROOT / "data" / "staging_schema.sql"
 
+sqlite3.register_adapter(date, date.isoformat)
+
 TRUE_SET = {"true", "t", "1", "y", "yes"}
 FALSE_SET = {"false", "f", "0", "n", "no"}
 
@@ -55,26 +72,239 @@ TABLES = [
     "stg_cf_FORM_C_ISSUER_JURISDICTIONS",
     "stg_adv_base_a",
     "stg_adv_base_b",
+    "stg_adv_state_reg",
+    "stg_adv_sch_r",
+    "stg_adv_contacts",
 ]
 
 
-def exec_schema(con: sqlite3.Connection) -> None:
-    cur = con.cursor()
+# Upsert key per staging table: a reloaded file replaces every earlier row with the same key.
+UPSERT_KEYS = {
+    "stg_fd_FORMDSUBMISSION": "ACCESSIONNUMBER",
+    "stg_fd_ISSUERS": "ACCESSIONNUMBER",
+    "stg_fd_OFFERING": "ACCESSIONNUMBER",
+    "stg_cf_FORM_C_SUBMISSION": "ACCESSION_NUMBER",
+    "stg_cf_FORM_C_ISSUER_INFORMATION": "ACCESSION_NUMBER",
+    "stg_cf_FORM_C_DISCLOSURE": "ACCESSION_NUMBER",
+    "stg_cf_FORM_C_ISSUER_JURISDICTIONS": "ACCESSION_NUMBER",
+    "stg_adv_base_a": "FilingID",
+    "stg_adv_base_b": "FilingID",
+    "stg_adv_state_reg": "FilingID",
+    "stg_adv_sch_r": "FilingID",
+}
+
+
+# Columns computed in SQL right after each insert: {table: {column: (type, expression)}}.
+# *_NUM are typed REAL copies of currency/count text columns, parsed once with the
+# same CAST expressions the feature views used to evaluate on every query.
+DERIVED_COLUMNS = {
+    "stg_fd_OFFERING": {
+        "TOTALOFFERINGAMOUNT_NUM": ("real", "CAST(REPLACE(REPLACE(TOTALOFFERINGAMOUNT, ',', ''), '$', '') AS REAL)"),
+        "TOTALAMOUNTSOLD_NUM": ("real", "CAST(REPLACE(REPLACE(TOTALAMOUNTSOLD, ',', ''), '$', '') AS REAL)"),
+        "MINIMUMINVESTMENTACCEPTED_NUM": (
+            "real",
+            "CAST(REPLACE(REPLACE(MINIMUMINVESTMENTACCEPTED, ',', ''), '$', '') AS REAL)",
+        ),
+    },
+    "stg_cf_FORM_C_DISCLOSURE": {
+        "PRICE_NUM": ("real", "CAST(REPLACE(REPLACE(PRICE, ',', ''), '$', '') AS REAL)"),
+        "OFFERINGAMOUNT_NUM": ("real", "CAST(REPLACE(REPLACE(OFFERINGAMOUNT, ',', ''), '$', '') AS REAL)"),
+        "MAXIMUMOFFERINGAMOUNT_NUM": ("real", "CAST(REPLACE(REPLACE(MAXIMUMOFFERINGAMOUNT, ',', ''), '$', '') AS REAL)"),
+        "CURRENTEMPLOYEES_NUM": ("real", "CAST(REPLACE(CURRENTEMPLOYEES, ',', '') AS REAL)"),
+    },
+}
+
+# Source columns added after the first schema release (no backfill; filled on the next load).
+ADDED_COLUMNS = {
+    "stg_adv_base_a": {"1E1": "text", "firm_id": "text"},
+}
+
+# firm_id groups an adviser's filings into one firm (see vw_adv_latest). It is derived per
+# FilingID once every Base A part is loaded, since older parts predate the 1E1 column: the
+# filing's CRD number, else the CRD that other filings with the same legal name + main office
+# state carry (when exactly one does), else that name + state, else the FilingID.
+FIRM_ID_SQL = """
+WITH filings AS (
+    SELECT FilingID,
+           MAX(NULLIF(TRIM("1E1"), '')) AS crd,
+           MAX(NULLIF(UPPER(TRIM(REPLACE(REPLACE("1A", ',', ''), '.', ''))), '')
+               || '|' || UPPER(TRIM(COALESCE("1F1-State", '')))) AS name_key
+    FROM stg_adv_base_a
+    WHERE FilingID IS NOT NULL
+    GROUP BY FilingID
+),
+named AS (
+    SELECT name_key, MIN(crd) AS crd
+    FROM filings
+    WHERE crd IS NOT NULL AND name_key IS NOT NULL
+    GROUP BY name_key
+    HAVING COUNT(DISTINCT crd) = 1
+),
+firms AS (
+    SELECT f.FilingID,
+           COALESCE('CRD:' || COALESCE(f.crd, n.crd), 'NAME:' || f.name_key, 'FILING:' || f.FilingID) AS firm_id
+    FROM filings f
+    LEFT JOIN named n ON n.name_key = f.name_key
+)
+UPDATE stg_adv_base_a
+SET firm_id = firms.firm_id
+FROM firms
+WHERE firms.FilingID = stg_adv_base_a.FilingID
+  AND stg_adv_base_a.firm_id IS NOT firms.firm_id
+"""
+
+
+def derive_columns(con: sqlite3.Connection, table: str, after_rowid: int = 0) -> None:
+    columns = DERIVED_COLUMNS.get(table)
+    if not columns:
+        return
+    assignments = ", ".join(f"{col} = {expr}" for col, (_, expr) in columns.items())
+    con.execute(f"UPDATE {table} SET {assignments} WHERE ROWID > ?", (after_rowid,))
+
+
+def derive_firm_ids(con: sqlite3.Connection) -> None:
+    """Set firm_id on every ADV Base A filing (see FIRM_ID_SQL); run after all parts are loaded."""
+    con.execute(FIRM_ID_SQL)
+
+
+def firm_ids_stale(con: sqlite3.Connection) -> bool:
+    """True when some filing has no firm_id yet (e.g. the column was just added by migrate_columns)."""
+    row = con.execute(
+        "SELECT 1 FROM stg_adv_base_a WHERE firm_id IS NULL AND FilingID IS NOT NULL LIMIT 1"
+    ).fetchone()
+    return row is not None
+
+
+def migrate_columns(con: sqlite3.Connection) -> None:
+    """Add columns missing from databases created by an older schema and backfill derived ones."""
     for table in TABLES:
-        cur.execute(f"DROP TABLE IF EXISTS {table}")
-    cur.close()
+        existing = {row[1] for row in con.execute(f"PRAGMA table_info({table})")}
+        if not existing:
+            continue
+        added = [(col, decl) for col, decl in ADDED_COLUMNS.get(table, {}).items() if col not in existing]
+        derived = [(col, decl) for col, (decl, _) in DERIVED_COLUMNS.get(table, {}).items() if col not in existing]
+        if not added and not derived:
+            continue
+        with con:
+            for col, decl in added + derived:
+                con.execute(f'ALTER TABLE {table} ADD COLUMN "{col}" {decl}')
+            if derived:
+                derive_columns(con, table)
+
+
+def exec_schema(con: sqlite3.Connection, rebuild: bool = False) -> None:
+    """Create missing staging tables; rebuild=True drops them (and the manifest) first."""
+    if rebuild:
+        cur = con.cursor()
+        for table in TABLES + ["stg_ingest_manifest"]:
+            cur.execute(f"DROP TABLE IF EXISTS {table}")
+        cur.close()
+    # Migrate first: the schema script indexes columns that older tables lack.
+    migrate_columns(con)
     con.executescript(SCHEMA_PATH.read_text())
 
 
-def load_form_d(con: sqlite3.Connection) -> None:
-    base = DATA_ROOT / "2025Q1_d"
+# (table, columns, rows, keys) produced by a normalizer: rows are written with
+# executemany after earlier rows for `keys` (see UPSERT_KEYS) are deleted.
+Batch = tuple[str, list[str], list[tuple], list]
+
+# Bulk-load settings: WAL keeps the file consistent if a load dies mid-way while
+# synchronous=NORMAL skips the per-commit fsync; cache_size is in KiB when negative.
+LOAD_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -262_144,
+    "temp_store": "MEMORY",
+}
+
+
+def configure_connection(con: sqlite3.Connection) -> None:
+    for pragma, value in LOAD_PRAGMAS.items():
+        con.execute(f"PRAGMA {pragma}={value}")
+
+
+def to_records(df: pd.DataFrame) -> list[tuple]:
+    """DataFrame -> executemany rows, with pandas NA/NaN/NaT mapped to NULL."""
+    df = df.astype(object)
+    return list(df.where(df.notna(), None).itertuples(index=False, name=None))
+
+
+def frame_batch(table: str, df: pd.DataFrame, keys: Iterable | None = None) -> Batch:
+    """Batch for `df`, replacing its own keys unless `keys` is given."""
+    if keys is None:
+        keys = df[UPSERT_KEYS[table]].dropna().unique()
+    return table, list(df.columns), to_records(df), list(keys)
+
+
+def write_batch(con: sqlite3.Connection, batch: Batch, replaced: Dict[str, Set]) -> int:
+    """Upsert one batch.
+
+    `replaced` holds, per table, the keys already replaced by the current
+    source; earlier rows for a key are deleted only the first time it comes
+    up, so a key repeated across chunks of the same file keeps every row
+    from this load.
+    """
+    table, columns, rows, keys = batch
+    seen = replaced.setdefault(table, set())
+    fresh = [k for k in keys if k not in seen]
+    if fresh:
+        seen.update(fresh)
+        con.execute("CREATE TEMP TABLE IF NOT EXISTS upsert_keys (k text PRIMARY KEY)")
+        con.execute("DELETE FROM temp.upsert_keys")
+        con.executemany("INSERT OR IGNORE INTO temp.upsert_keys VALUES (?)", ((k,) for k in fresh))
+        con.execute(f'DELETE FROM {table} WHERE "{UPSERT_KEYS[table]}" IN (SELECT k FROM temp.upsert_keys)')
+    names = ", ".join(f'"{col}"' for col in columns)
+    params = ", ".join("?" for _ in columns)
+    before = con.execute(f"SELECT COALESCE(MAX(ROWID), 0) FROM {table}").fetchone()[0]
+    con.executemany(f"INSERT INTO {table} ({names}) VALUES ({params})", rows)
+    derive_columns(con, table, before)
+    return len(rows)
+
+
+def stream_chunks(
+    con: sqlite3.Connection,
+    chunks: Iterable[pd.DataFrame],
+    normalize: Callable[[pd.DataFrame], list[Batch]],
+    workers: int = 1,
+) -> int:
+    """Normalize each chunk and insert it as soon as it is ready.
+
+    With workers > 1 chunks are normalized on a process pool; at most
+    2 * workers chunks are in flight, and results are written in file order
+    (vw_adv_latest breaks DateSubmitted ties on ROWID), so memory stays flat
+    regardless of file size. The caller owns the transaction.
+    """
+    written = 0
+    replaced: Dict[str, Set] = {}
+    if workers <= 1:
+        for chunk in chunks:
+            for batch in normalize(chunk):
+                written += write_batch(con, batch, replaced)
+        return written
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: deque[Future] = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(normalize, chunk))
+            if len(pending) >= 2 * workers:
+                for batch in pending.popleft().result():
+                    written += write_batch(con, batch, replaced)
+        while pending:
+            for batch in pending.popleft().result():
+                written += write_batch(con, batch, replaced)
+    return written
+
+
+def load_form_d(con: sqlite3.Connection, base: Path) -> int:
+    written = 0
+    replaced: Dict[str, Set] = {}
 
     submission = pd.read_csv(base / "FORMDSUBMISSION.tsv", sep="\t", dtype=str)
     submission["FILING_DATE"] = parse_date(submission["FILING_DATE"], fmt="%d-%b-%Y")
     submission = submission[
         ["ACCESSIONNUMBER", "SUBMISSIONTYPE", "FILING_DATE", "FILE_NUM", "SIC_CODE", "TESTORLIVE"]
     ]
-    submission.to_sql("stg_fd_FORMDSUBMISSION", con, if_exists="append", index=False)
+    written += write_batch(con, frame_batch("stg_fd_FORMDSUBMISSION", submission), replaced)
 
     issuers = pd.read_csv(base / "ISSUERS.tsv", sep="\t", dtype=str)
     issuers = issuers[
@@ -94,7 +324,7 @@ def load_form_d(con: sqlite3.Connection) -> None:
             "ISSUERPHONENUMBER",
         ]
     ]
-    issuers.to_sql("stg_fd_ISSUERS", con, if_exists="append", index=False)
+    written += write_batch(con, frame_batch("stg_fd_ISSUERS", issuers), replaced)
 
     offering = pd.read_csv(base / "OFFERING.tsv", sep="\t", dtype=str)
     for col in [
@@ -121,18 +351,20 @@ def load_form_d(con: sqlite3.Connection) -> None:
             "SALE_DATE",
         ]
     ]
-    offering.to_sql("stg_fd_OFFERING", con, if_exists="append", index=False)
+    written += write_batch(con, frame_batch("stg_fd_OFFERING", offering), replaced)
+    return written
 
 
-def load_reg_cf(con: sqlite3.Connection) -> None:
-    base = DATA_ROOT / "2025Q1_cf"
+def load_reg_cf(con: sqlite3.Connection, base: Path) -> int:
+    written = 0
+    replaced: Dict[str, Set] = {}
 
     submission = pd.read_csv(base / "FORM_C_SUBMISSION.tsv", sep="\t", dtype=str)
     submission["FILING_DATE"] = parse_date(submission["FILING_DATE"], fmt="%Y%m%d")
     submission = submission[
         ["ACCESSION_NUMBER", "SUBMISSION_TYPE", "FILING_DATE", "CIK", "FILE_NUMBER", "PERIOD"]
     ]
-    submission.to_sql("stg_cf_FORM_C_SUBMISSION", con, if_exists="append", index=False)
+    written += write_batch(con, frame_batch("stg_cf_FORM_C_SUBMISSION", submission), replaced)
 
     issuer = pd.read_csv(base / "FORM_C_ISSUER_INFORMATION.tsv", sep="\t", dtype=str)
     issuer["PROGRESSUPDATE"] = issuer["PROGRESSUPDATE"].fillna("")
@@ -151,7 +383,7 @@ def load_reg_cf(con: sqlite3.Connection) -> None:
             "PROGRESSUPDATE",
         ]
     ]
-    issuer.to_sql("stg_cf_FORM_C_ISSUER_INFORMATION", con, if_exists="append", index=False)
+    written += write_batch(con, frame_batch("stg_cf_FORM_C_ISSUER_INFORMATION", issuer), replaced)
 
     disclosure = pd.read_csv(base / "FORM_C_DISCLOSURE.tsv", sep="\t", dtype=str)
     disclosure["DEADLINEDATE"] = parse_date(disclosure["DEADLINEDATE"], fmt="%Y-%m-%d")
@@ -182,96 +414,112 @@ def load_reg_cf(con: sqlite3.Connection) -> None:
             "NETINCOMEPRIORYEAR",
         ]
     ]
-    disclosure.to_sql("stg_cf_FORM_C_DISCLOSURE", con, if_exists="append", index=False)
+    written += write_batch(con, frame_batch("stg_cf_FORM_C_DISCLOSURE", disclosure), replaced)
 
     juris = pd.read_csv(base / "FORM_C_ISSUER_JURISDICTIONS.tsv", sep="\t", dtype=str)
     if "ISSUEJURISDICTIONSECUROFFERING" in juris.columns:
         juris = juris.rename(columns={"ISSUEJURISDICTIONSECUROFFERING": "STATEORPROVINCE"})
     juris["COUNTRY"] = pd.NA
-    juris[["ACCESSION_NUMBER", "STATEORPROVINCE", "COUNTRY"]].to_sql(
-        "stg_cf_FORM_C_ISSUER_JURISDICTIONS", con, if_exists="append", index=False
-    )
+    juris = juris[["ACCESSION_NUMBER", "STATEORPROVINCE", "COUNTRY"]]
+    written += write_batch(con, frame_batch("stg_cf_FORM_C_ISSUER_JURISDICTIONS", juris), replaced)
+    return written
+
+
+ADV_A_USECOLS = [
+    "FilingID",
+    "DateSubmitted",
+    "1A",
+    "1F1-Street 1",
+    "1F1-Street 2",
+    "1F1-City",
+    "1F1-State",
+    "1F1-Country",
+    "1F1-Postal",
+    "1F1-Private",
+    "1F2-M-F",
+    "1F2-Other",
+    "1F2-Hours",
+    "1F3",
+    "1F4",
+    "1F5",
+    "1G-Street 1",
+    "1G-Street 2",
+    "1G-City",
+    "1G-State",
+    "1G-Country",
+    "1G-Postal",
+    "1G-Private",
+    "5D1a",
+    "5D1b",
+    "5D1e",
+    "5D1f",
+    "5D2a",
+    "5D2b",
+    "5D2c",
+    "5D2g",
+    "5D2h",
+    "5D2j",
+    "5D2k",
+    "5F2a",
+    "5F2b",
+    "5F2c",
+    "5H",
+    "5J2",
+    "5K1",
+    "5K2",
+    "5K3",
+    "5K4",
+    "7A1",
+    "7A2",
+    "7A6",
+    "7A8",
+    "7A9",
+    "7A10",
+    "7A12",
+    "7A16",
+    "9A1a",
+    "9A1b",
+    "9A2a",
+    "9A2b",
+]
 
+# Loaded when the file has them; older ADV extracts do not carry every column.
+ADV_A_OPTIONAL_COLS = ["1E1"]
+
+ADV_A_NUMERIC_COLS: Iterable[str] = [
+    "5D1a",
+    "5D1b",
+    "5D1e",
+    "5D1f",
+    "5D2a",
+    "5D2b",
+    "5D2c",
+    "5D2g",
+    "5D2h",
+    "5D2j",
+    "5D2k",
+    "5F2a",
+    "5F2b",
+    "5F2c",
+    "9A2a",
+    "9A2b",
+]
 
-def load_adv_base_a(con: sqlite3.Connection) -> None:
-    path = DATA_ROOT / "adv-filing-data-20111105-20241231-part1" / "IA_ADV_Base_A_20111105_20241231.csv"
-    usecols = [
-        "FilingID",
-        "DateSubmitted",
-        "1A",
-        "1F1-Street 1",
-        "1F1-Street 2",
-        "1F1-City",
-        "1F1-State",
-        "1F1-Country",
-        "1F1-Postal",
-        "1F1-Private",
-        "1F2-M-F",
-        "1F2-Other",
-        "1F2-Hours",
-        "1F3",
-        "1F4",
-        "1F5",
-        "1G-Street 1",
-        "1G-Street 2",
-        "1G-City",
-        "1G-State",
-        "1G-Country",
-        "1G-Postal",
-        "1G-Private",
-        "5D1a",
-        "5D1b",
-        "5D1e",
-        "5D1f",
-        "5D2a",
-        "5D2b",
-        "5D2c",
-        "5D2g",
-        "5D2h",
-        "5D2j",
-        "5D2k",
-        "5F2a",
-        "5F2b",
-        "5F2c",
-        "5H",
-        "5J2",
-        "5K1",
-        "5K2",
-        "5K3",
-        "5K4",
-        "7A1",
-        "7A2",
-        "7A6",
-        "7A8",
-        "7A9",
-        "7A10",
-        "7A12",
-        "7A16",
-        "9A1a",
-        "9A1b",
-        "9A2a",
-        "9A2b",
-    ]
-    numeric_cols: Iterable[str] = [
-        "5D1a",
-        "5D1b",
-        "5D1e",
-        "5D1f",
-        "5D2a",
-        "5D2b",
-        "5D2c",
-        "5D2g",
-        "5D2h",
-        "5D2j",
-        "5D2k",
-        "5F2a",
-        "5F2b",
-        "5F2c",
-        "9A2a",
-        "9A2b",
-    ]
-    bool_cols = ["5K1", "5K2", "5K3", "5K4", "7A1", "7A2", "7A6", "7A8", "7A9", "7A10", "7A12", "7A16", "9A1a", "9A1b"]
+ADV_A_BOOL_COLS = ["5K1", "5K2", "5K3", "5K4", "7A1", "7A2", "7A6", "7A8", "7A9", "7A10", "7A12", "7A16", "9A1a", "9A1b"]
+
+
+def normalize_adv_base_a(chunk: pd.DataFrame) -> list[Batch]:
+    chunk["DateSubmitted"] = parse_date(chunk["DateSubmitted"], fmt="%m/%d/%Y %I:%M:%S %p")
+    for col in ADV_A_NUMERIC_COLS:
+        chunk[col] = pd.to_numeric(chunk[col], errors="coerce")
+    for col in ADV_A_BOOL_COLS:
+        chunk[col] = normalize_bool(chunk[col]).astype("Int64")
+    return [frame_batch("stg_adv_base_a", chunk)]
 
+
+def load_adv_base_a(con: sqlite3.Connection, path: Path, workers: int = 1) -> int:
+    header = pd.read_csv(path, nrows=0, encoding="latin1").columns.tolist()
+    usecols = ADV_A_USECOLS + [col for col in ADV_A_OPTIONAL_COLS if col in header]
     chunks = pd.read_csv(
         path,
         usecols=usecols,
@@ -280,26 +528,28 @@ def load_adv_base_a(con: sqlite3.Connection) -> None:
         chunksize=100_000,
         low_memory=False,
     )
-    frames = []
-    for chunk in chunks:
-        chunk["DateSubmitted"] = parse_date(chunk["DateSubmitted"], fmt="%m/%d/%Y %I:%M:%S %p")
-        for col in numeric_cols:
-            chunk[col] = pd.to_numeric(chunk[col], errors="coerce")
-        for col in bool_cols:
-            chunk[col] = normalize_bool(chunk[col]).astype("Int64")
-        frames.append(chunk)
-
-    df = pd.concat(frames, ignore_index=True)
-    df.to_sql("stg_adv_base_a", con, if_exists="append", index=False)
+    return stream_chunks(con, chunks, normalize_adv_base_a, workers)
+
+
+def normalize_adv_base_b(chunk: pd.DataFrame, state_cols: list[str], state_codes: list[str]) -> list[Batch]:
+    chunk = chunk.fillna("")
+    flags, registrations = state_registrations(chunk, state_cols, state_codes)
+    chunk["2-SECStateReg"] = flags.dot(pd.Index([code + "," for code in state_codes])).str.rstrip(",")
+    base = chunk[["FilingID", "2-SECStateReg", "3A", "3A-Other"]]
+    # Registrations are replaced for every filing in the chunk, including ones that now have none.
+    filings = base["FilingID"].dropna().unique()
+    return [
+        frame_batch("stg_adv_base_b", base),
+        frame_batch("stg_adv_state_reg", registrations.drop_duplicates(), keys=filings),
+    ]
 
 
-def load_adv_base_b(con: sqlite3.Connection) -> None:
-    path = DATA_ROOT / "adv-filing-data-20111105-20241231-part1" / "IA_ADV_Base_B_20111105_20241231.csv"
+def load_adv_base_b(con: sqlite3.Connection, path: Path, workers: int = 1) -> int:
     header = pd.read_csv(path, nrows=0, encoding="latin1").columns.tolist()
     state_cols = [col for col in header if col.startswith("2-")]
+    state_codes = [col[2:].strip().upper() for col in state_cols]
     usecols = ["FilingID", "3A", "3A-Other"] + state_cols
 
-    frames = []
     chunks = pd.read_csv(
         path,
         usecols=usecols,
@@ -308,30 +558,296 @@ def load_adv_base_b(con: sqlite3.Connection) -> None:
         chunksize=50_000,
         low_memory=False,
     )
-    for chunk in chunks:
-        chunk = chunk.fillna("")
-        chunk["2-SECStateReg"] = chunk[state_cols].apply(
-            lambda row: ",".join(col for col in state_cols if row[col].strip().upper() == "Y"),
-            axis=1,
+    normalize = partial(normalize_adv_base_b, state_cols=state_cols, state_codes=state_codes)
+    return stream_chunks(con, chunks, normalize, workers)
+
+
+def state_registrations(
+    chunk: pd.DataFrame, state_cols: list[str], state_codes: list[str]
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Vectorized 2-XX flag parsing: a boolean frame plus normalized (FilingID, state) rows."""
+    flags = chunk[state_cols].apply(lambda col: col.str.strip().str.upper().eq("Y"))
+    flags.columns = state_codes
+    stacked = flags.set_index(chunk["FilingID"]).stack()
+    registrations = stacked[stacked].reset_index().iloc[:, :2]
+    registrations.columns = ["FilingID", "state"]
+    return flags, registrations
+
+
+# Schedule R contact roles, in stg_adv_contacts column order (<ROLE>_EMAIL).
+CONTACT_ROLES = ["MAIN_OFFICE", "CEO", "CFO", "CTO", "CCO", "GENERAL_OFFICE"]
+
+# Long-format extracts carry one row per contact with a free-text role; first match wins.
+ROLE_PATTERNS = [
+    ("MAIN_OFFICE", re.compile(r"MAIN\s*OFFICE")),
+    ("GENERAL_OFFICE", re.compile(r"GENERAL\s+OFFICE|\bINFO\b")),
+    ("CEO", re.compile(r"\bCEO\b|CHIEF\s+EXECUTIVE")),
+    ("CFO", re.compile(r"\bCFO\b|CHIEF\s+FINANCIAL")),
+    ("CTO", re.compile(r"\bCTO\b|CHIEF\s+TECHNOLOGY")),
+    ("CCO", re.compile(r"\bCCO\b|CHIEF\s+COMPLIANCE")),
+]
+SCH_R_ROLE_COLUMNS = ["CONTACT_TYPE", "CONTACT_ROLE", "ROLE", "TITLE"]
+SCH_R_EMAIL_COLUMNS = ["EMAIL", "E_MAIL", "EMAIL_ADDRESS", "CONTACT_EMAIL"]
+
+# Each role column keeps the first address filed for it (file order); any further addresses for
+# the role go to OTHER_EMAILS with the OTHER ones, so no address is dropped.
+CONTACTS_PIVOT_SQL = f"""
+INSERT INTO stg_adv_contacts
+WITH numbered AS (
+    SELECT FilingID, role, email,
+           ROW_NUMBER() OVER (PARTITION BY FilingID, role ORDER BY ROWID) AS n
+    FROM stg_adv_sch_r
+    WHERE FilingID IS NOT NULL
+)
+SELECT FilingID,
+       {", ".join(f"MAX(CASE WHEN role = '{role}' AND n = 1 THEN email END)" for role in CONTACT_ROLES)},
+       GROUP_CONCAT(DISTINCT CASE WHEN role = 'OTHER' OR n > 1 THEN email END)
+FROM numbered
+GROUP BY FilingID
+"""
+
+
+def header_key(column: str) -> str:
+    """'Main Office E-mail' -> 'MAIN_OFFICE_E_MAIL': header matching that ignores case and punctuation."""
+    return re.sub(r"[^A-Z0-9]+", "_", column.upper()).strip("_")
+
+
+def classify_role(value: object) -> str:
+    text = str(value).upper() if value is not None else ""
+    return next((role for role, pattern in ROLE_PATTERNS if pattern.search(text)), "OTHER")
+
+
+def normalize_adv_sch_r(
+    chunk: pd.DataFrame,
+    wide: Dict[str, str],
+    role_col: str | None,
+    email_col: str | None,
+) -> list[Batch]:
+    """Schedule R rows -> (FilingID, role, email), from <ROLE>_EMAIL columns and/or role + email pairs."""
+    chunk = chunk.rename(columns={chunk.columns[0]: "FilingID"})
+    parts = [
+        pd.DataFrame({"FilingID": chunk["FilingID"], "role": role, "email": chunk[col]})
+        for role, col in wide.items()
+    ]
+    if role_col and email_col:
+        parts.append(pd.DataFrame({
+            "FilingID": chunk["FilingID"],
+            "role": chunk[role_col].map(classify_role),
+            "email": chunk[email_col],
+        }))
+    contacts = pd.concat(parts, ignore_index=True)
+    contacts["email"] = contacts["email"].str.strip().str.lower()
+    contacts = contacts[contacts["email"].str.contains("@", na=False)].drop_duplicates()
+    # Every filing in the chunk is replaced, including ones that no longer list an address.
+    return [frame_batch("stg_adv_sch_r", contacts, keys=chunk["FilingID"].dropna().unique())]
+
+
+def refresh_contacts(con: sqlite3.Connection) -> None:
+    """Rebuild stg_adv_contacts (one row per FilingID) from stg_adv_sch_r.
+
+    A full re-pivot: one pass over the FilingID index, cheap next to parsing
+    the file. Tracking the reloaded filings by ROWID is not reliable here, as
+    SQLite reuses ROWIDs once a reload has deleted the table's highest rows.
+    """
+    con.execute("DELETE FROM stg_adv_contacts")
+    con.execute(CONTACTS_PIVOT_SQL)
+
+
+def load_adv_sch_r(con: sqlite3.Connection, path: Path, workers: int = 1) -> int:
+    header = pd.read_csv(path, nrows=0, encoding="latin1").columns.tolist()
+    keys = {header_key(col): col for col in header}
+    if "FILINGID" not in keys:
+        raise ValueError(f"{path.name}: no FilingID column")
+    wide = {role: keys[f"{role}_EMAIL"] for role in CONTACT_ROLES if f"{role}_EMAIL" in keys}
+    role_col = next((keys[k] for k in SCH_R_ROLE_COLUMNS if k in keys), None)
+    email_col = next((keys[k] for k in SCH_R_EMAIL_COLUMNS if k in keys), None)
+    if not wide and not (role_col and email_col):
+        raise ValueError(f"{path.name}: no <ROLE>_EMAIL columns and no role/e-mail column pair")
+
+    usecols = [keys["FILINGID"], *wide.values(), *([role_col, email_col] if role_col and email_col else [])]
+    chunks = pd.read_csv(
+        path,
+        usecols=usecols,
+        encoding="latin1",
+        dtype=str,
+        chunksize=100_000,
+        low_memory=False,
+    )
+    # usecols keeps file order; put FilingID first for normalize_adv_sch_r.
+    chunks = (chunk[usecols] for chunk in chunks)
+    normalize = partial(normalize_adv_sch_r, wide=wide, role_col=role_col, email_col=email_col)
+    written = stream_chunks(con, chunks, normalize, workers)
+    refresh_contacts(con)
+    return written
+
+
+FD_FILES = ["FORMDSUBMISSION.tsv", "ISSUERS.tsv", "OFFERING.tsv"]
+CF_FILES = [
+    "FORM_C_SUBMISSION.tsv",
+    "FORM_C_ISSUER_INFORMATION.tsv",
+    "FORM_C_DISCLOSURE.tsv",
+    "FORM_C_ISSUER_JURISDICTIONS.tsv",
+]
+SCH_R_GLOB = "IA_Firm_Download_SCH_R_*.csv"
+
+
+@dataclass
+class Source:
+    """A unit of ingestion: reloaded whenever any of its files is new or changed."""
+
+    name: str
+    files: List[Path]
+    loader: Callable[..., int]
+    target: Path
+    chunked: bool = False  # streams chunks through stream_chunks, so it can use worker processes
+
+    def load(self, con: sqlite3.Connection, workers: int = 1) -> int:
+        if self.chunked:
+            return self.loader(con, self.target, workers=workers)
+        return self.loader(con, self.target)
+
+
+def discover_sources(data_root: Path, only: Iterable[str] = ()) -> List[Source]:
+    """Every Form D quarter, Reg CF quarter and ADV Base A/B part under data_root.
+
+    Sources are ordered oldest first so later filings land at higher ROWIDs.
+    `only` limits discovery to the named directories (e.g. 2025Q1_d).
+    """
+    only = set(only)
+    dirs = [d for d in sorted(data_root.iterdir()) if d.is_dir() and (not only or d.name in only)]
+    sources: List[Source] = []
+    for d in dirs:
+        if d.name.endswith("_d") and all((d / f).exists() for f in FD_FILES):
+            sources.append(Source(d.name, [d / f for f in FD_FILES], load_form_d, d))
+        elif d.name.endswith("_cf") and all((d / f).exists() for f in CF_FILES):
+            sources.append(Source(d.name, [d / f for f in CF_FILES], load_reg_cf, d))
+    for d in dirs:
+        if d.name.startswith("adv-filing-data-"):
+            for path in sorted(d.glob("IA_ADV_Base_A_*.csv")):
+                sources.append(Source(f"{d.name}/{path.name}", [path], load_adv_base_a, path, chunked=True))
+    for d in dirs:
+        if d.name.startswith("adv-filing-data-"):
+            for path in sorted(d.glob("IA_ADV_Base_B_*.csv")):
+                sources.append(Source(f"{d.name}/{path.name}", [path], load_adv_base_b, path, chunked=True))
+    # Schedule R ships as a separate firm download, either inside an ADV part or at the data root.
+    sch_r = [path for d in dirs if d.name.startswith("adv-filing-data-") for path in sorted(d.glob(SCH_R_GLOB))]
+    if not only:
+        sch_r += sorted(data_root.glob(SCH_R_GLOB))
+    for path in sch_r:
+        sources.append(Source(str(path.relative_to(data_root)), [path], load_adv_sch_r, path, chunked=True))
+    return sources
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def changed_files(con: sqlite3.Connection, source: Source, data_root: Path) -> List[tuple]:
+    """Manifest rows (path, size, mtime, sha256) for files that differ from the last load.
+
+    Size and mtime are checked first; a file is only hashed when they moved,
+    and a touched-but-identical file just has its mtime refreshed.
+    """
+    changed = []
+    for path in source.files:
+        key = str(path.relative_to(data_root))
+        stat = path.stat()
+        row = con.execute(
+            "SELECT size, mtime, sha256 FROM stg_ingest_manifest WHERE path = ?", (key,)
+        ).fetchone()
+        if row is not None and row[0] == stat.st_size and row[1] == stat.st_mtime:
+            continue
+        sha = file_sha256(path)
+        if row is not None and row[2] == sha:
+            with con:
+                con.execute(
+                    "UPDATE stg_ingest_manifest SET size = ?, mtime = ? WHERE path = ?",
+                    (stat.st_size, stat.st_mtime, key),
+                )
+            continue
+        changed.append((key, stat.st_size, stat.st_mtime, sha))
+    return changed
+
+
+def record_manifest(con: sqlite3.Connection, source: Source, data_root: Path, changed: List[tuple]) -> None:
+    """Record every file of a freshly loaded source (unchanged siblings keep their hash)."""
+    hashes = {row[0]: row for row in changed}
+    loaded_at = datetime.utcnow().isoformat(timespec="seconds")
+    for path in source.files:
+        key = str(path.relative_to(data_root))
+        stat = path.stat()
+        sha = hashes[key][3] if key in hashes else file_sha256(path)
+        con.execute(
+            "INSERT OR REPLACE INTO stg_ingest_manifest VALUES (?, ?, ?, ?, ?, ?)",
+            (key, source.loader.__name__, stat.st_size, stat.st_mtime, sha, loaded_at),
         )
-        frames.append(chunk[["FilingID", "2-SECStateReg", "3A", "3A-Other"]])
 
-    df = pd.concat(frames, ignore_index=True)
-    df.to_sql("stg_adv_base_b", con, if_exists="append", index=False)
+
+def ingest(
+    con: sqlite3.Connection,
+    data_root: Path,
+    only: Iterable[str] = (),
+    workers: int = 1,
+) -> Dict[str, int]:
+    """Load new or changed sources; each source commits atomically with its manifest rows.
+
+    firm_id is derived afterwards, in one pass over every ADV Base A part.
+    """
+    loaded: Dict[str, int] = {}
+    base_a = False
+    for source in discover_sources(data_root, only):
+        changed = changed_files(con, source, data_root)
+        if not changed:
+            continue
+        with con:
+            loaded[source.name] = source.load(con, workers)
+            record_manifest(con, source, data_root, changed)
+            bump_data_version(con)
+        base_a = base_a or source.loader is load_adv_base_a
+    if base_a or firm_ids_stale(con):
+        with con:
+            derive_firm_ids(con)
+            bump_data_version(con)
+    return loaded
 
 
 def main() -> None:
-    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    con = sqlite3.connect(DB_PATH)
-    exec_schema(con)
+    parser = argparse.ArgumentParser(description="Load SEC Reg CF, Reg D, and Form ADV files into SQLite staging tables.")
+    parser.add_argument(
+        "sources",
+        nargs="*",
+        help="Directories under the data root to consider (e.g. 2025Q1_d 2025Q1_cf); default: all.",
+    )
+    parser.add_argument("--data-root", type=Path, default=DATA_ROOT, help="Root of the raw SEC files.")
+    parser.add_argument("--db", type=Path, default=DB_PATH, help="SQLite database to load into.")
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Drop every staging table and the manifest before loading.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Processes used to normalize ADV chunks (1 = parse inline).",
+    )
+    args = parser.parse_args()
+
+    args.db.parent.mkdir(parents=True, exist_ok=True)
+    con = sqlite3.connect(args.db)
+    configure_connection(con)
+    exec_schema(con, rebuild=args.rebuild)
 
-    load_form_d(con)
-    load_reg_cf(con)
-    load_adv_base_a(con)
-    load_adv_base_b(con)
+    loaded = ingest(con, args.data_root, args.sources, workers=args.workers)
 
     con.close()
-    print(f"Loaded staging tables into {DB_PATH}")
+    for name, rows in loaded.items():
+        print(f"  {name}: {rows} rows")
+    print(f"Loaded {len(loaded)} new or changed sources into {args.db}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,569 @@
+#!/usr/bin/env python3
+"""
+Materialize the analytics views into indexed tables.
+
+vw_investor_deal_scored re-evaluates the whole view stack (latest-submission
+windows, feature parsing, the deal universe UNION and the deal x adviser
+cross-join) on every query. This script writes the feature, candidate and
+scored views into mat_* tables with indexes on deal_id, accession_id and
+adviser_id so a per-deal lookup becomes an index seek. mat_adv_features is the
+adviser dimension: one row per firm (its latest ADV filing), which every
+candidate and scored row joins to.
+
+The same pass keeps mat_adviser_top_deals, the reverse direction: each
+adviser's best TOP_DEALS_PER_ADVISER scored deals per deal_type, clustered on
+(adviser_id, deal_type, deal_rank) so "deals for this adviser" is a single
+primary-key range read instead of a scan of every scored pair.
+
+The first run (or --full) rebuilds every table. Later runs diff the feature
+views against their materialized copies and re-score only the deals and
+advisers that changed since the previous refresh; only advisers whose
+scored deals changed get their top-deals rows rebuilt.
+
+Every refresh also rebuilds the mat_cube_* summary tables (CUBES): counts,
+sums, shares and quantiles of the deal and adviser features grouped by
+state, industry, ticket/price/RAUM buckets and their combinations, plus the
+candidate pairs each group produces. Market-statistics questions ("median
+raise by state", "RAUM distribution by bucket") become an index read of a
+few hundred rows instead of a scan of the feature tables.
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DB_PATH = REPO_ROOT / "data" / "staging.sqlite"
+VIEWS_PATH = REPO_ROOT / "data" / "analytics_views.sql"
+
+# Feature views: (view, materialized table, key column, deal_id prefix or None for advisers).
+FEATURE_TABLES = [
+    ("vw_fd_features", "mat_fd_features", "ACCESSIONNUMBER", "FD:"),
+    ("vw_fd_latest_offering", "mat_fd_latest_offering", "ACCESSIONNUMBER", "FD:"),
+    ("vw_cf_features", "mat_cf_features", "ACCESSION_NUMBER", "CF:"),
+    ("vw_adv_features", "mat_adv_features", "FilingID", None),
+]
+
+CANDIDATES_VIEW = "vw_investor_deal_candidates"
+SCORED_VIEW = "vw_investor_deal_scored"
+CANDIDATES_TABLE = "mat_investor_deal_candidates"
+SCORED_TABLE = "mat_investor_deal_scored"
+TOP_DEALS_TABLE = "mat_adviser_top_deals"
+TOP_DEALS_PER_ADVISER = 50
+
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_mat_fd_features_accession ON mat_fd_features (ACCESSIONNUMBER)",
+    "CREATE INDEX IF NOT EXISTS ix_mat_fd_latest_offering_accession ON mat_fd_latest_offering (ACCESSIONNUMBER)",
+    "CREATE INDEX IF NOT EXISTS ix_mat_cf_features_accession ON mat_cf_features (ACCESSION_NUMBER)",
+    "CREATE INDEX IF NOT EXISTS ix_mat_adv_features_filing ON mat_adv_features (FilingID)",
+    "CREATE INDEX IF NOT EXISTS ix_mat_adv_features_firm ON mat_adv_features (firm_id)",
+    "CREATE INDEX IF NOT EXISTS ix_mat_candidates_deal ON mat_investor_deal_candidates (deal_id, adviser_id)",
+    "CREATE INDEX IF NOT EXISTS ix_mat_candidates_accession ON mat_investor_deal_candidates (accession_id)",
+    "CREATE INDEX IF NOT EXISTS ix_mat_candidates_adviser ON mat_investor_deal_candidates (adviser_id)",
+    "CREATE INDEX IF NOT EXISTS ix_mat_scored_deal ON mat_investor_deal_scored (deal_id, composite_score DESC, adviser_id)",
+    "CREATE INDEX IF NOT EXISTS ix_mat_scored_accession ON mat_investor_deal_scored (accession_id, composite_score DESC)",
+    "CREATE INDEX IF NOT EXISTS ix_mat_scored_adviser ON mat_investor_deal_scored (adviser_id, composite_score DESC)",
+    "CREATE INDEX IF NOT EXISTS ix_mat_top_deals_deal ON mat_adviser_top_deals (deal_id)",
+]
+
+TOP_DEALS_DDL = """
+CREATE TABLE IF NOT EXISTS mat_adviser_top_deals (
+  adviser_id text NOT NULL,    -- latest FilingID of the firm (mat_adv_features.FilingID).
+  deal_type text NOT NULL,     -- 'FORM_D' or 'REG_CF'.
+  deal_rank integer NOT NULL,  -- 1 = best composite_score for this adviser and deal_type.
+  deal_id text,
+  accession_id text,
+  issuer_name text,
+  issuer_state text,
+  target_raise real,
+  min_invest real,
+  security_type text,
+  retail_allowed integer,
+  composite_score real,
+  geography_score real,
+  capital_score real,
+  audience_score real,
+  ticket_score real,
+  traction_score real,
+  security_score real,
+  PRIMARY KEY (adviser_id, deal_type, deal_rank)
+) WITHOUT ROWID
+"""
+
+# Ranked like the forward lookups: composite_score DESC, ties by deal_id.
+TOP_DEALS_SQL = """
+INSERT INTO mat_adviser_top_deals
+SELECT adviser_id, deal_type, deal_rank, deal_id, accession_id, issuer_name, issuer_state,
+       target_raise, min_invest, security_type, retail_allowed, composite_score,
+       geography_score, capital_score, audience_score, ticket_score, traction_score, security_score
+FROM (
+  SELECT s.*,
+         ROW_NUMBER() OVER (
+           PARTITION BY s.adviser_id, s.deal_type
+           ORDER BY s.composite_score DESC, s.deal_id
+         ) AS deal_rank
+  FROM mat_investor_deal_scored s
+  {where}
+)
+WHERE deal_rank <= ?
+"""
+
+REFRESH_LOG_DDL = """
+CREATE TABLE IF NOT EXISTS mat_refresh_log (
+  refreshed_at text,        -- UTC timestamp of the refresh.
+  mode text,                -- 'full' or 'incremental'.
+  changed_deals integer,    -- deals re-scored in this refresh.
+  changed_advisers integer  -- advisers re-scored in this refresh.
+)
+"""
+
+
+@dataclass
+class Cube:
+    table: str                          # mat_cube_* table written by build_cubes
+    source: str                         # mat_* feature table aggregated
+    key: str                            # source expression matching `pair_key` in the candidates table
+    pair_key: str                       # deal_id or adviser_id
+    dimensions: Dict[str, str]          # output column -> source expression
+    groupings: List[Tuple[str, ...]]    # grouping sets; () is the grand total
+    measures: Dict[str, str]            # output column -> aggregate over source columns
+    quantiles: List[str]                # source columns summarized as <col>_p25/_p50/_p75/_p90
+    join: str = ""                      # optional 1:1 join onto the source (aliased f)
+
+
+# Nearest-rank percentiles (SQLite has no percentile aggregate).
+CUBE_QUANTILES = (25, 50, 75, 90)
+
+CUBES = [
+    Cube(
+        table="mat_cube_fd",
+        source="mat_fd_features",
+        key="'FD:' || f.ACCESSIONNUMBER",
+        pair_key="deal_id",
+        dimensions={
+            # The state code the scoring views match on, not vw_fd_features.issuer_state (a description).
+            "issuer_state": "UPPER(TRIM(COALESCE(o.STATEORCOUNTRY, o.STATEORCOUNTRYDESCRIPTION)))",
+            "INDUSTRYGROUPTYPE": "f.INDUSTRYGROUPTYPE",
+            "min_invest_bucket": "f.min_invest_bucket",
+        },
+        groupings=[
+            (),
+            ("issuer_state",),
+            ("INDUSTRYGROUPTYPE",),
+            ("min_invest_bucket",),
+            ("issuer_state", "INDUSTRYGROUPTYPE"),
+        ],
+        measures={
+            "deals": "COUNT(*)",
+            "total_target_raise": "SUM(target_raise)",
+            "avg_target_raise": "AVG(target_raise)",
+            "total_amount_sold": "SUM(amount_sold)",
+            "non_accredited_share": "AVG(allows_non_accredited)",
+            "equity_share": "AVG(is_equity)",
+            "debt_share": "AVG(is_debt)",
+            "pooled_share": "AVG(is_pooled)",
+            "candidate_pairs": "SUM(candidate_pairs)",
+        },
+        quantiles=["target_raise", "min_invest"],
+        join="LEFT JOIN mat_fd_latest_offering o ON o.ACCESSIONNUMBER = f.ACCESSIONNUMBER",
+    ),
+    Cube(
+        table="mat_cube_cf",
+        source="mat_cf_features",
+        key="'CF:' || ACCESSION_NUMBER",
+        pair_key="deal_id",
+        dimensions={
+            "issuer_state": "UPPER(TRIM(STATEORCOUNTRY))",
+            "security_type": "SECURITYOFFEREDTYPE",
+            "price_bucket": "price_bucket",
+            "employee_band": "employee_band",
+        },
+        groupings=[
+            (),
+            ("issuer_state",),
+            ("security_type",),
+            ("price_bucket",),
+            ("employee_band",),
+        ],
+        measures={
+            "deals": "COUNT(*)",
+            "total_target_raise": "SUM(target_raise)",
+            "avg_target_raise": "AVG(target_raise)",
+            "total_max_raise": "SUM(max_raise)",
+            "oversubscription_share": "AVG(OVERSUBSCRIPTIONACCEPTED = 'Y')",
+            "candidate_pairs": "SUM(candidate_pairs)",
+        },
+        quantiles=["target_raise", "unit_price", "employees"],
+    ),
+    Cube(
+        table="mat_cube_adv",
+        source="mat_adv_features",
+        key="FilingID",
+        pair_key="adviser_id",
+        dimensions={
+            "state": "state",
+            "raum_bucket": "raum_bucket",
+        },
+        groupings=[
+            (),
+            ("state",),
+            ("raum_bucket",),
+            ("state", "raum_bucket"),
+        ],
+        measures={
+            "advisers": "COUNT(*)",
+            "total_raum": "SUM(total_raum)",
+            "avg_raum": "AVG(total_raum)",
+            "non_hnw_clients": "SUM(non_hnw_clients)",
+            "hnw_clients": "SUM(hnw_clients)",
+            "pooled_clients": "SUM(pooled_clients)",
+            "broker_dealer_share": "AVG(is_broker_dealer)",
+            "bank_affiliate_share": "AVG(is_bank_affiliate)",
+            "candidate_pairs": "SUM(candidate_pairs)",
+        },
+        quantiles=["total_raum"],
+    ),
+]
+
+
+def apply_views(con: sqlite3.Connection) -> None:
+    con.executescript(VIEWS_PATH.read_text())
+
+
+def table_exists(con: sqlite3.Connection, name: str) -> bool:
+    row = con.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+    ).fetchone()
+    return row is not None
+
+
+def columns(con: sqlite3.Connection, name: str) -> list:
+    return [row[1] for row in con.execute(f"PRAGMA table_info({name})")]
+
+
+def in_sync(con: sqlite3.Connection) -> bool:
+    """True when every mat_* table exists with the same columns as its view."""
+    pairs = [(view, table) for view, table, _, _ in FEATURE_TABLES]
+    pairs += [(CANDIDATES_VIEW, CANDIDATES_TABLE), (SCORED_VIEW, SCORED_TABLE)]
+    return all(table_exists(con, table) and columns(con, table) == columns(con, view) for view, table in pairs)
+
+
+def view_body(con: sqlite3.Connection, view: str) -> str:
+    row = con.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'view' AND name = ?", (view,)
+    ).fetchone()
+    if row is None:
+        raise RuntimeError(f"{view} is missing; apply {VIEWS_PATH.name} first")
+    return re.sub(r"^\s*CREATE\s+VIEW\s+\S+\s+AS\s+", "", row[0], count=1, flags=re.IGNORECASE)
+
+
+def rebind_view(con: sqlite3.Connection, view: str, name: str, sources: Dict[str, str]) -> None:
+    """Create TEMP view `name` with the body of `view`, reading from `sources` instead.
+
+    This keeps the candidate/scoring logic single-sourced in analytics_views.sql
+    while letting a refresh evaluate it over delta tables only.
+    """
+    body = view_body(con, view)
+    for original, replacement in sources.items():
+        body = re.sub(rf"\b{re.escape(original)}\b", replacement, body)
+    con.execute(f"DROP VIEW IF EXISTS temp.{name}")
+    con.execute(f"CREATE TEMP VIEW {name} AS {body}")
+
+
+def create_indexes(con: sqlite3.Connection) -> None:
+    for ddl in INDEXES:
+        con.execute(ddl)
+
+
+def build_top_deals(con: sqlite3.Connection) -> None:
+    """Rebuild mat_adviser_top_deals from mat_investor_deal_scored."""
+    con.execute(f"DROP TABLE IF EXISTS {TOP_DEALS_TABLE}")
+    con.execute(TOP_DEALS_DDL)
+    con.execute(TOP_DEALS_SQL.format(where=""), (TOP_DEALS_PER_ADVISER,))
+
+
+def refresh_top_deals(con: sqlite3.Connection) -> int:
+    """Re-rank the advisers touched by this refresh; returns how many were re-ranked.
+
+    An adviser's list can move when the adviser itself changed, when a changed
+    deal is now among its scored rows, or when a changed (or removed) deal was
+    on its current list.
+    """
+    con.execute("DROP TABLE IF EXISTS temp.rerank_advisers")
+    con.execute(
+        f"""
+        CREATE TEMP TABLE rerank_advisers AS
+        SELECT adviser_id FROM temp.changed_advisers
+        UNION
+        SELECT adviser_id FROM main.{SCORED_TABLE} WHERE deal_id IN (SELECT deal_id FROM temp.changed_deals)
+        UNION
+        SELECT adviser_id FROM main.{TOP_DEALS_TABLE} WHERE deal_id IN (SELECT deal_id FROM temp.changed_deals)
+        """
+    )
+    con.execute(f"DELETE FROM {TOP_DEALS_TABLE} WHERE adviser_id IN (SELECT adviser_id FROM temp.rerank_advisers)")
+    con.execute(
+        TOP_DEALS_SQL.format(where="WHERE s.adviser_id IN (SELECT adviser_id FROM temp.rerank_advisers)"),
+        (TOP_DEALS_PER_ADVISER,),
+    )
+    count = con.execute("SELECT COUNT(*) FROM temp.rerank_advisers").fetchone()[0]
+    con.execute("DROP TABLE temp.rerank_advisers")
+    return count
+
+
+def cube_grouping_sql(cube: Cube, grouping: Tuple[str, ...]) -> str:
+    """SELECT producing one cube row per group of `grouping` from temp.cube_base."""
+    partition = f"PARTITION BY {', '.join(f'd_{d}' for d in grouping)} " if grouping else ""
+    windows = "".join(
+        f", ROW_NUMBER() OVER ({partition}ORDER BY {col} IS NULL, {col}) AS rn_{col}"
+        f", COUNT({col}) OVER ({partition or ''}) AS n_{col}"
+        for col in cube.quantiles
+    )
+    selects = [f"'{','.join(grouping) or 'all'}' AS grouping_set"]
+    selects += [f"{f'd_{d}' if d in grouping else 'NULL'} AS {d}" for d in cube.dimensions]
+    selects += [f"{expr} AS {name}" for name, expr in cube.measures.items()]
+    selects += [
+        f"MAX(CASE WHEN rn_{col} = MAX(1, (n_{col} * {q} + 99) / 100) AND n_{col} > 0 THEN {col} END) AS {col}_p{q}"
+        for col in cube.quantiles
+        for q in CUBE_QUANTILES
+    ]
+    group_by = f" GROUP BY {', '.join(f'd_{d}' for d in grouping)}" if grouping else ""
+    return f"SELECT {', '.join(selects)} FROM (SELECT *{windows} FROM temp.cube_base){group_by}"
+
+
+def build_cubes(con: sqlite3.Connection) -> None:
+    """Rebuild every mat_cube_* table from the current mat_* feature and candidate tables.
+
+    A cube row holds one group of one grouping set: grouping_set names the
+    grouped dimensions ('all' for the grand total, 'issuer_state',
+    'issuer_state,INDUSTRYGROUPTYPE', ...) and the other dimension columns
+    are NULL. Indexed on (grouping_set, dimensions...).
+    """
+    for cube in CUBES:
+        con.execute("DROP TABLE IF EXISTS temp.cube_pairs")
+        con.execute(
+            f"""
+            CREATE TEMP TABLE cube_pairs AS
+            SELECT {cube.pair_key} AS k, COUNT(*) AS pairs
+            FROM {CANDIDATES_TABLE}
+            GROUP BY {cube.pair_key}
+            """
+        )
+        dimensions = ", ".join(f"{expr} AS d_{name}" for name, expr in cube.dimensions.items())
+        con.execute("DROP TABLE IF EXISTS temp.cube_base")
+        con.execute(
+            f"""
+            CREATE TEMP TABLE cube_base AS
+            SELECT f.*, {dimensions}, COALESCE(p.pairs, 0) AS candidate_pairs
+            FROM {cube.source} f
+            {cube.join}
+            LEFT JOIN temp.cube_pairs p ON p.k = {cube.key}
+            """
+        )
+        con.execute(f"DROP TABLE IF EXISTS {cube.table}")
+        body = " UNION ALL ".join(cube_grouping_sql(cube, grouping) for grouping in cube.groupings)
+        con.execute(f"CREATE TABLE {cube.table} AS {body}")
+        con.execute(
+            f"CREATE INDEX ix_{cube.table} ON {cube.table} (grouping_set, {', '.join(cube.dimensions)})"
+        )
+        con.execute("DROP TABLE temp.cube_base")
+        con.execute("DROP TABLE temp.cube_pairs")
+
+
+def log_refresh(con: sqlite3.Connection, mode: str, deals: int, advisers: int) -> None:
+    con.execute(REFRESH_LOG_DDL)
+    con.execute(
+        "INSERT INTO mat_refresh_log VALUES (?, ?, ?, ?)",
+        (datetime.utcnow().isoformat(timespec="seconds"), mode, deals, advisers),
+    )
+
+
+def full_refresh(con: sqlite3.Connection) -> None:
+    tables = [(view, table) for view, table, _, _ in FEATURE_TABLES]
+    tables += [(CANDIDATES_VIEW, CANDIDATES_TABLE), (SCORED_VIEW, SCORED_TABLE)]
+    for view, table in tables:
+        con.execute(f"DROP TABLE IF EXISTS {table}")
+        con.execute(f"CREATE TABLE {table} AS SELECT * FROM {view}")
+    build_top_deals(con)
+    build_cubes(con)
+    create_indexes(con)
+    deals = con.execute(f"SELECT COUNT(DISTINCT deal_id) FROM {CANDIDATES_TABLE}").fetchone()[0]
+    advisers = con.execute("SELECT COUNT(*) FROM mat_adv_features").fetchone()[0]
+    log_refresh(con, "full", deals, advisers)
+
+
+def diff_features(con: sqlite3.Connection) -> None:
+    """Sync mat_* feature tables with their views, recording changed keys.
+
+    Fills temp.changed_deals(deal_id) and temp.changed_advisers(adviser_id).
+    """
+    con.execute("DROP TABLE IF EXISTS temp.changed_deals")
+    con.execute("DROP TABLE IF EXISTS temp.changed_advisers")
+    con.execute("CREATE TEMP TABLE changed_deals (deal_id text PRIMARY KEY)")
+    con.execute("CREATE TEMP TABLE changed_advisers (adviser_id text PRIMARY KEY)")
+
+    for view, table, key, prefix in FEATURE_TABLES:
+        fresh = f"temp.fresh_{table}"
+        con.execute(f"DROP TABLE IF EXISTS {fresh}")
+        con.execute(f"CREATE TEMP TABLE fresh_{table} AS SELECT * FROM {view}")
+        con.execute(f"DROP TABLE IF EXISTS temp.keys_{table}")
+        con.execute(
+            f"""
+            CREATE TEMP TABLE keys_{table} AS
+            SELECT {key} AS k FROM (SELECT * FROM {fresh} EXCEPT SELECT * FROM {table})
+            UNION
+            SELECT {key} AS k FROM (SELECT * FROM {table} EXCEPT SELECT * FROM {fresh})
+            """
+        )
+        con.execute(f"DELETE FROM {table} WHERE {key} IN (SELECT k FROM temp.keys_{table})")
+        con.execute(
+            f"INSERT INTO {table} SELECT * FROM {fresh} WHERE {key} IN (SELECT k FROM temp.keys_{table})"
+        )
+        if prefix is None:
+            con.execute(
+                f"INSERT OR IGNORE INTO changed_advisers SELECT k FROM temp.keys_{table} WHERE k IS NOT NULL"
+            )
+        else:
+            con.execute(
+                f"INSERT OR IGNORE INTO changed_deals SELECT '{prefix}' || k FROM temp.keys_{table} WHERE k IS NOT NULL"
+            )
+        con.execute(f"DROP TABLE {fresh}")
+        con.execute(f"DROP TABLE temp.keys_{table}")
+
+
+def _deal_filter_views(con: sqlite3.Connection, suffix: str, changed: bool) -> Dict[str, str]:
+    """Temp views over the deal-side mat tables restricted to (un)changed deals."""
+    op = "IN" if changed else "NOT IN"
+    mapping = {}
+    for view, table, key, prefix in FEATURE_TABLES:
+        if prefix is None:
+            continue
+        name = f"{table}_{suffix}"
+        con.execute(f"DROP VIEW IF EXISTS temp.{name}")
+        con.execute(
+            f"""
+            CREATE TEMP VIEW {name} AS
+            SELECT * FROM main.{table}
+            WHERE '{prefix}' || {key} {op} (SELECT deal_id FROM temp.changed_deals)
+            """
+        )
+        mapping[view] = f"temp.{name}"
+    return mapping
+
+
+def _score_pass(con: sqlite3.Connection, suffix: str, deal_sources: Iterable[tuple], adv_source: str) -> None:
+    sources = dict(deal_sources)
+    sources["vw_adv_features"] = adv_source
+    rebind_view(con, CANDIDATES_VIEW, f"candidates_{suffix}", sources)
+    rebind_view(
+        con,
+        SCORED_VIEW,
+        f"scored_{suffix}",
+        {
+            CANDIDATES_VIEW: f"temp.candidates_{suffix}",
+            "vw_adv_features": "main.mat_adv_features",
+            "vw_fd_features": "main.mat_fd_features",
+            "vw_cf_features": "main.mat_cf_features",
+        },
+    )
+    con.execute(f"INSERT INTO {CANDIDATES_TABLE} SELECT * FROM temp.candidates_{suffix}")
+    con.execute(f"INSERT INTO {SCORED_TABLE} SELECT * FROM temp.scored_{suffix}")
+
+
+def incremental_refresh(con: sqlite3.Connection) -> None:
+    diff_features(con)
+    deals = con.execute("SELECT COUNT(*) FROM changed_deals").fetchone()[0]
+    advisers = con.execute("SELECT COUNT(*) FROM changed_advisers").fetchone()[0]
+
+    if deals or advisers:
+        for table in (CANDIDATES_TABLE, SCORED_TABLE):
+            con.execute(
+                f"""
+                DELETE FROM {table}
+                WHERE deal_id IN (SELECT deal_id FROM temp.changed_deals)
+                   OR adviser_id IN (SELECT adviser_id FROM temp.changed_advisers)
+                """
+            )
+
+        # Changed deals against every current adviser.
+        if deals:
+            _score_pass(con, "deals", _deal_filter_views(con, "changed", True).items(), "main.mat_adv_features")
+
+        # Unchanged deals against changed advisers only.
+        if advisers:
+            con.execute("DROP VIEW IF EXISTS temp.mat_adv_features_changed")
+            con.execute(
+                """
+                CREATE TEMP VIEW mat_adv_features_changed AS
+                SELECT * FROM main.mat_adv_features
+                WHERE FilingID IN (SELECT adviser_id FROM temp.changed_advisers)
+                """
+            )
+            _score_pass(
+                con,
+                "advisers",
+                _deal_filter_views(con, "unchanged", False).items(),
+                "temp.mat_adv_features_changed",
+            )
+
+    if not table_exists(con, TOP_DEALS_TABLE):
+        build_top_deals(con)  # databases materialized before the reverse index existed
+    elif deals or advisers:
+        refresh_top_deals(con)
+    if deals or advisers or not all(table_exists(con, cube.table) for cube in CUBES):
+        build_cubes(con)
+
+    log_refresh(con, "incremental", deals, advisers)
+
+
+def bump_data_version(con: sqlite3.Connection) -> None:
+    """Advance PRAGMA user_version so readers holding cached results (tools/cached_sql_tool.py) refresh.
+
+    Shared with tools/load_staging.py, so the loader and the materializer advance it the same way.
+    """
+    version = con.execute("PRAGMA user_version").fetchone()[0]
+    con.execute(f"PRAGMA user_version = {version + 1}")
+
+
+def materialize(con: sqlite3.Connection, full: bool = False) -> str:
+    apply_views(con)
+    # A view whose columns changed since the last build cannot be diffed row by row.
+    mode = "full" if full or not in_sync(con) else "incremental"
+
+    con.execute("BEGIN")
+    try:
+        if mode == "full":
+            full_refresh(con)
+        else:
+            incremental_refresh(con)
+            create_indexes(con)
+        bump_data_version(con)
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+    return mode
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--db", type=Path, default=DB_PATH, help="SQLite database to materialize into.")
+    parser.add_argument("--full", action="store_true", help="Rebuild every mat_* table from scratch.")
+    args = parser.parse_args()
+
+    con = sqlite3.connect(args.db, isolation_level=None)
+    mode = materialize(con, full=args.full)
+    row = con.execute(
+        "SELECT changed_deals, changed_advisers FROM mat_refresh_log ORDER BY ROWID DESC LIMIT 1"
+    ).fetchone()
+    con.close()
+    print(f"{mode} refresh of {args.db}: {row[0]} deals, {row[1]} advisers re-scored")
+
+
+if __name__ == "__main__":
+    main()
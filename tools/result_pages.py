@@ -0,0 +1,270 @@
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Tuple
+import csv
+import importlib.util
+import json
+import threading
+import uuid
+
+from agno.tools import Toolkit
+from agno.utils.log import log_debug, logger
+
+from tools.guarded_sql_tool import GuardedSQLTools, QueryRejected
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+EXPORT_DIR = REPO_ROOT / "markdown" / "exports"
+FETCH_ROWS = 5_000
+
+# Keyset order for scored rows: best first, ties broken by adviser_id, then deal_id, so the key is unique
+# even when one adviser is paged across deals (ix_mat_scored_deal covers it for one deal).
+ORDERED_SQL = "SELECT * FROM ({inner}) ORDER BY composite_score DESC, adviser_id, deal_id"
+PAGE_SQL = """
+SELECT * FROM ({inner})
+WHERE composite_score <= ?
+  AND (composite_score < ? OR (composite_score = ? AND (adviser_id > ? OR (adviser_id = ? AND deal_id > ?))))
+ORDER BY composite_score DESC, adviser_id, deal_id
+LIMIT ?
+"""
+KEYSET_COLUMNS = ("composite_score", "adviser_id", "deal_id")
+
+
+@dataclass(slots=True)
+class PageHandle:
+    handle: str
+    query: str                             # guarded inner query, without the keyset order/filter
+    columns: List[str]
+    page_size: int
+    after: Optional[Tuple[Any, Any, Any]]  # (composite_score, adviser_id, deal_id) of the last row served
+    pages: int
+    served: int
+    total: int
+    export_path: Path
+
+
+def keyset_of(columns: Sequence[str], row: tuple) -> Tuple[Any, Any, Any]:
+    score, adviser_id, deal_id = (row[columns.index(col)] for col in KEYSET_COLUMNS)
+    return score, adviser_id, deal_id
+
+
+def fetch_chunks(cur: Any, size: int = FETCH_ROWS) -> Iterator[List[tuple]]:
+    """Rows from an executed cursor, `size` at a time."""
+    while True:
+        rows = cur.fetchmany(size)
+        if not rows:
+            return
+        yield rows
+
+
+def tap_first(chunks: Iterable[List[tuple]], n: int, into: List[tuple]) -> Iterator[List[tuple]]:
+    """Pass chunks through unchanged, copying the first `n` rows into `into`."""
+    for chunk in chunks:
+        if len(into) < n:
+            into.extend(chunk[: n - len(into)])
+        yield chunk
+
+
+def write_csv(path: Path, columns: Sequence[str], chunks: Iterable[List[tuple]]) -> int:
+    rows = 0
+    with open(path, "w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(columns)
+        for chunk in chunks:
+            writer.writerows(chunk)
+            rows += len(chunk)
+    return rows
+
+
+def write_parquet(path: Path, columns: Sequence[str], chunks: Iterable[List[tuple]]) -> int:
+    """Stream chunks into one Parquet file; the schema comes from the first chunk, with integers
+    widened to float64 and all-NULL columns typed as strings so later chunks still fit."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    rows = 0
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pylist([dict(zip(columns, row)) for row in chunk])
+            if writer is None:
+                schema = pa.schema([
+                    pa.field(f.name, pa.float64() if pa.types.is_integer(f.type)
+                             else pa.string() if pa.types.is_null(f.type) else f.type)
+                    for f in table.schema
+                ])
+                writer = pq.ParquetWriter(path, schema)
+            writer.write_table(table.cast(writer.schema))
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        pq.write_table(pa.table({col: pa.array([], pa.string()) for col in columns}), path)
+    return rows
+
+
+class PagedResultTools(Toolkit):
+    """
+    Large scored result sets without pushing them through the model:
+    - page_scored_query: runs a query over mat_investor_deal_scored (any query
+      returning composite_score, adviser_id and deal_id), streams every row to
+      markdown/exports/<handle>.csv|parquet and answers with the first page,
+      the row count and a handle
+    - next_page: the next page for a handle, by keyset on
+      (composite_score DESC, adviser_id, deal_id) so each page is an index range read
+      rather than an OFFSET re-scan
+
+    Queries go through the GuardedSQLTools checks (view rewrite, full-scan
+    refusal); the export gets its own, longer time budget (export_max_ms).
+    Handles are kept per toolkit instance, least recently used dropped first.
+    """
+    def __init__(
+        self,
+        sql_tools: GuardedSQLTools,
+        out_dir: Optional[Path] = None,
+        page_size: int = 25,
+        max_handles: int = 256,
+        export_max_ms: Optional[float] = 120_000.0,
+        name: str = "result_pages",
+        **kwargs,
+    ):
+        registered_tools = [
+            self.page_scored_query,
+            self.next_page,
+        ]
+        super().__init__(name=name, tools=registered_tools, **kwargs)
+        self.sql_tools = sql_tools
+        self.out_dir = Path(out_dir or EXPORT_DIR)
+        self.page_size = page_size
+        self.max_handles = max_handles
+        self.export_max_ms = export_max_ms
+        self._handles: OrderedDict[str, PageHandle] = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ---- helpers ----
+    def _remember(self, page: PageHandle) -> None:
+        with self._lock:
+            self._handles[page.handle] = page
+            self._handles.move_to_end(page.handle)
+            while len(self._handles) > self.max_handles:
+                self._handles.popitem(last=False)
+
+    def _lookup(self, handle: str) -> Optional[PageHandle]:
+        with self._lock:
+            page = self._handles.get(handle)
+            if page is not None:
+                self._handles.move_to_end(handle)
+            return page
+
+    def _response(self, page: PageHandle, rows: List[tuple]) -> str:
+        export_path = page.export_path
+        if export_path.is_relative_to(REPO_ROOT):
+            export_path = export_path.relative_to(REPO_ROOT)
+        return json.dumps({
+            "ok": True,
+            "handle": page.handle,
+            "page": page.pages,
+            "rows": [dict(zip(page.columns, row)) for row in rows],
+            "served": page.served,
+            "total_rows": page.total,
+            "has_more": page.after is not None and page.served < page.total,
+            "export_path": str(export_path),
+        }, default=str)
+
+    # ---- tools ----
+    def page_scored_query(self, query: str, page_size: Optional[int] = None, export_format: str = "csv") -> str:
+        """Use for "return everything" requests over scored deal/adviser rows (e.g. every candidate adviser
+        for a deal). Writes the full result to a CSV (or Parquet) file under markdown/exports/ and returns
+        only the first page, the total row count, the file path and a handle for next_page.
+
+        Args:
+            query (str): A SELECT over mat_investor_deal_scored that returns composite_score, adviser_id and
+                deal_id (filtered by deal_id, accession_id or adviser_id). Rows are ordered by composite_score
+                DESC, adviser_id, deal_id; an ORDER BY in the query is ignored.
+            page_size (int, optional): Rows per page. Defaults to 25.
+            export_format (str): "csv" (default) or "parquet".
+        Returns:
+            str: JSON with handle, rows (first page), total_rows, has_more and export_path.
+        """
+        page_size = page_size or self.page_size
+        fmt = export_format.lower().strip()
+        if fmt not in ("csv", "parquet"):
+            return json.dumps({"ok": False, "error": "unknown_export_format", "export_format": export_format})
+        if fmt == "parquet" and importlib.util.find_spec("pyarrow") is None:
+            fmt = "csv"  # the file is for the user; CSV carries the same rows
+        try:
+            inner = self.sql_tools.check_query(query).strip().rstrip(";")
+            handle = uuid.uuid4().hex[:12]
+            self.out_dir.mkdir(parents=True, exist_ok=True)
+            path = self.out_dir / f"{handle}.{fmt}"
+            first: List[tuple] = []
+            with self.sql_tools.budget_cursor(self.export_max_ms) as cur:
+                columns = [d[0] for d in cur.execute(f"SELECT * FROM ({inner}) LIMIT 0").description or []]
+                missing = [col for col in KEYSET_COLUMNS if col not in columns]
+                if missing:
+                    return json.dumps({
+                        "ok": False,
+                        "error": "missing_keyset_columns",
+                        "missing": missing,
+                        "hint": "Select composite_score, adviser_id and deal_id (paging is keyed on them).",
+                    })
+                cur.execute(ORDERED_SQL.format(inner=inner))
+                writer = write_parquet if fmt == "parquet" else write_csv
+                try:
+                    total = writer(path, columns, tap_first(fetch_chunks(cur), page_size, first))
+                except BaseException:
+                    path.unlink(missing_ok=True)
+                    raise
+        except QueryRejected as e:
+            return self.sql_tools.query_error(query, e)
+        except Exception as e:
+            logger.exception("Error paging query")
+            return f"Error running query: {e}"
+
+        page = PageHandle(
+            handle=handle,
+            query=inner,
+            columns=columns,
+            page_size=page_size,
+            after=keyset_of(columns, first[-1]) if len(first) == page_size else None,
+            pages=1,
+            served=len(first),
+            total=total,
+            export_path=path,
+        )
+        self._remember(page)
+        log_debug(f"exported {total} rows to {path} (handle {handle})")
+        return self._response(page, first)
+
+    def next_page(self, handle: str) -> str:
+        """Return the next page of a page_scored_query result.
+
+        Args:
+            handle (str): The handle returned by page_scored_query.
+        Returns:
+            str: JSON with rows, page, served, total_rows and has_more.
+        """
+        page = self._lookup(handle)
+        if page is None:
+            return json.dumps({"ok": False, "error": "unknown_handle", "handle": handle})
+        if page.after is None or page.served >= page.total:
+            return self._response(page, [])
+        score, adviser_id, deal_id = page.after
+        try:
+            with self.sql_tools.budget_cursor() as cur:
+                rows = cur.execute(
+                    PAGE_SQL.format(inner=page.query),
+                    (score, score, score, adviser_id, adviser_id, deal_id, page.page_size),
+                ).fetchall()
+        except QueryRejected as e:
+            return self.sql_tools.query_error(page.query, e)
+        except Exception as e:
+            logger.exception("Error paging query")
+            return f"Error running query: {e}"
+        # A short page is the last one (also if the data changed since the export).
+        page.after = keyset_of(page.columns, rows[-1]) if len(rows) == page.page_size else None
+        page.pages += 1
+        page.served += len(rows)
+        return self._response(page, rows)
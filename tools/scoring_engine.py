@@ -0,0 +1,718 @@
+"""
+Vectorized deal -> adviser scoring equivalent to vw_investor_deal_scored.
+
+Adviser features are loaded once into columnar NumPy arrays; a deal is then
+scored against every eligible adviser in a single batched pass. The step
+functions, weights and NULL handling mirror data/analytics_views.sql so the
+composite scores are identical to the SQL view.
+
+Hypothetical deals (what-if questions without an accession) are built by
+profile_deal() with the same feature columns the deal queries produce and
+scored the same way, in memory: nothing is written to the database.
+
+The reverse direction (an adviser's best deals) is read from
+mat_adviser_top_deals, which tools/materialize_views.py keeps alongside the
+scored table. Adviser lists carry Schedule R contact e-mails from
+vw_adv_contact_emails, fetched with one primary-key lookup per adviser.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from tools.materialize_views import TOP_DEALS_PER_ADVISER, TOP_DEALS_TABLE
+from tools.serving_db import connect_read_only, file_identity
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DB_PATH = REPO_ROOT / "data" / "staging.sqlite"
+
+WEIGHTS = {
+    "geography": 0.25,
+    "capital": 0.25,
+    "audience": 0.2,
+    "ticket": 0.15,
+    "traction": 0.1,
+    "security": 0.05,
+}
+
+ADVISER_SQL = """
+SELECT FilingID,
+       adviser_name,
+       city,
+       state,
+       total_raum,
+       raum_bucket,
+       non_hnw_clients,
+       hnw_clients,
+       pooled_clients,
+       is_broker_dealer,
+       is_bank_affiliate,
+       is_insurance_affiliate
+FROM {source}
+"""
+
+FD_DEAL_SQL = """
+SELECT 'FORM_D' AS deal_type,
+       'FD:' || f.ACCESSIONNUMBER AS deal_id,
+       f.ACCESSIONNUMBER AS accession_id,
+       o.ENTITYNAME AS issuer_name,
+       UPPER(TRIM(COALESCE(o.STATEORCOUNTRY, o.STATEORCOUNTRYDESCRIPTION))) AS issuer_state,
+       f.target_raise,
+       CASE
+           WHEN COALESCE(f.is_equity, 0) = 1 AND COALESCE(f.is_debt, 0) = 1 THEN 'Equity & Debt'
+           WHEN COALESCE(f.is_equity, 0) = 1 THEN 'Equity'
+           WHEN COALESCE(f.is_debt, 0) = 1 THEN 'Debt'
+           WHEN COALESCE(f.is_pooled, 0) = 1 THEN 'Pooled Vehicle'
+           ELSE 'Other'
+       END AS security_type,
+       COALESCE(f.allows_non_accredited, 0) AS retail_allowed,
+       COALESCE(f.is_pooled, 0) AS pooled_focus,
+       f.min_invest,
+       f.sold_vs_target,
+       NULL AS unit_price,
+       NULL AS target_vs_cap,
+       f.FILING_DATE AS filing_date
+FROM {features} f
+JOIN {offering} o USING (ACCESSIONNUMBER)
+WHERE {where}
+"""
+
+CF_DEAL_SQL = """
+SELECT 'REG_CF' AS deal_type,
+       'CF:' || f.ACCESSION_NUMBER AS deal_id,
+       f.ACCESSION_NUMBER AS accession_id,
+       f.NAMEOFISSUER AS issuer_name,
+       UPPER(TRIM(f.STATEORCOUNTRY)) AS issuer_state,
+       f.target_raise,
+       f.SECURITYOFFEREDTYPE AS security_type,
+       1 AS retail_allowed,
+       0 AS pooled_focus,
+       NULL AS min_invest,
+       NULL AS sold_vs_target,
+       f.unit_price,
+       f.target_vs_cap,
+       f.FILING_DATE AS filing_date
+FROM {features} f
+WHERE {where}
+"""
+
+DEAL_TYPES = ("FORM_D", "REG_CF")
+PROFILE_DEAL_ID = "WHATIF"
+
+# issuer_state in the deal queries is the filing's two-letter STATEORCOUNTRY code.
+US_STATE_CODES = {
+    "ALABAMA": "AL", "ALASKA": "AK", "ARIZONA": "AZ", "ARKANSAS": "AR", "CALIFORNIA": "CA",
+    "COLORADO": "CO", "CONNECTICUT": "CT", "DELAWARE": "DE", "DISTRICT OF COLUMBIA": "DC",
+    "FLORIDA": "FL", "GEORGIA": "GA", "HAWAII": "HI", "IDAHO": "ID", "ILLINOIS": "IL",
+    "INDIANA": "IN", "IOWA": "IA", "KANSAS": "KS", "KENTUCKY": "KY", "LOUISIANA": "LA",
+    "MAINE": "ME", "MARYLAND": "MD", "MASSACHUSETTS": "MA", "MICHIGAN": "MI", "MINNESOTA": "MN",
+    "MISSISSIPPI": "MS", "MISSOURI": "MO", "MONTANA": "MT", "NEBRASKA": "NE", "NEVADA": "NV",
+    "NEW HAMPSHIRE": "NH", "NEW JERSEY": "NJ", "NEW MEXICO": "NM", "NEW YORK": "NY",
+    "NORTH CAROLINA": "NC", "NORTH DAKOTA": "ND", "OHIO": "OH", "OKLAHOMA": "OK", "OREGON": "OR",
+    "PENNSYLVANIA": "PA", "PUERTO RICO": "PR", "RHODE ISLAND": "RI", "SOUTH CAROLINA": "SC",
+    "SOUTH DAKOTA": "SD", "TENNESSEE": "TN", "TEXAS": "TX", "UTAH": "UT", "VERMONT": "VT",
+    "VIRGIN ISLANDS": "VI", "VIRGINIA": "VA", "WASHINGTON": "WA", "WEST VIRGINIA": "WV",
+    "WISCONSIN": "WI", "WYOMING": "WY", "GUAM": "GU",
+}
+
+TOP_DEAL_COLUMNS = """
+deal_type, deal_id, accession_id, issuer_name, issuer_state, target_raise, min_invest,
+security_type, retail_allowed, composite_score, geography_score, capital_score,
+audience_score, ticket_score, traction_score, security_score
+"""
+
+TOP_DEALS_INDEX_SQL = f"""
+SELECT deal_rank, {TOP_DEAL_COLUMNS}
+FROM mat_adviser_top_deals
+WHERE adviser_id = ? AND deal_type IN (SELECT value FROM json_each(?)) AND deal_rank <= ?
+ORDER BY deal_type, deal_rank
+"""
+
+# Fallback when the index is missing or shallower than k: rank the scored rows directly.
+TOP_DEALS_SCORED_SQL = f"""
+SELECT deal_rank, {TOP_DEAL_COLUMNS}
+FROM (
+  SELECT s.*,
+         ROW_NUMBER() OVER (PARTITION BY s.deal_type ORDER BY s.composite_score DESC, s.deal_id) AS deal_rank
+  FROM {{scored}} s
+  WHERE s.adviser_id = ? AND s.deal_type IN (SELECT value FROM json_each(?))
+)
+WHERE deal_rank <= ?
+ORDER BY deal_type, deal_rank
+"""
+
+
+CONTACT_COLUMNS = [
+    "MAIN_OFFICE_EMAIL",
+    "CEO_EMAIL",
+    "CFO_EMAIL",
+    "CTO_EMAIL",
+    "CCO_EMAIL",
+    "GENERAL_OFFICE_EMAIL",
+    "OTHER_EMAILS",
+]
+
+CONTACTS_SQL = f"""
+SELECT adviser_id, {", ".join(CONTACT_COLUMNS)}
+FROM vw_adv_contact_emails
+WHERE adviser_id IN (SELECT value FROM json_each(?))
+"""
+
+
+def _source(con: sqlite3.Connection, view: str) -> str:
+    """Prefer the mat_* copy written by tools/materialize_views.py when present."""
+    table = view.replace("vw_", "mat_", 1)
+    row = con.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone()
+    return table if row else view
+
+
+def _as_float(value: object) -> float:
+    if value is None:
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _step(values: np.ndarray, thresholds: Sequence[float], scores: Sequence[float], default: float,
+          descending: bool = True) -> np.ndarray:
+    """Evaluate a SQL CASE ladder: first matching threshold wins, else `default`."""
+    if descending:
+        conditions = [values >= t for t in thresholds]
+    else:
+        conditions = [values <= t for t in thresholds]
+    return np.select(conditions, scores, default=default)
+
+
+@dataclass
+class Deal:
+    deal_type: str
+    deal_id: str
+    accession_id: str
+    issuer_name: Optional[str]
+    issuer_state: Optional[str]
+    target_raise: Optional[float]
+    security_type: Optional[str]
+    retail_allowed: int
+    pooled_focus: int
+    min_invest: Optional[float] = None
+    sold_vs_target: Optional[float] = None
+    unit_price: Optional[float] = None
+    target_vs_cap: Optional[float] = None
+    filing_date: Optional[str] = None
+
+
+@dataclass
+class AdviserMatrix:
+    """Columnar snapshot of vw_adv_features used for batched scoring."""
+
+    adviser_id: np.ndarray
+    adviser_name: np.ndarray
+    city: np.ndarray
+    state: np.ndarray
+    raum_bucket: np.ndarray
+    total_raum: np.ndarray
+    non_hnw_clients: np.ndarray
+    hnw_clients: np.ndarray
+    pooled_clients: np.ndarray
+    is_broker_dealer: np.ndarray
+    is_bank_affiliate: np.ndarray
+    is_insurance_affiliate: np.ndarray
+    hq_state: np.ndarray
+    _state_index: Dict[str, np.ndarray] = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def from_db(cls, con: sqlite3.Connection) -> "AdviserMatrix":
+        rows = con.execute(ADVISER_SQL.format(source=_source(con, "vw_adv_features"))).fetchall()
+        cols = list(zip(*rows)) if rows else [()] * 12
+
+        def _text(values) -> np.ndarray:
+            return np.array(values, dtype=object)
+
+        def _num(values) -> np.ndarray:
+            return np.array([_as_float(v) for v in values], dtype=np.float64)
+
+        # Same normalization as the adv CTE in vw_investor_deal_candidates.
+        hq_state = [s.strip(" ").upper() if s is not None else None for s in cols[3]]
+
+        matrix = cls(
+            adviser_id=_text(cols[0]),
+            adviser_name=_text(cols[1]),
+            city=_text(cols[2]),
+            state=_text(cols[3]),
+            total_raum=_num(cols[4]),
+            raum_bucket=_text(cols[5]),
+            non_hnw_clients=np.nan_to_num(_num(cols[6]), nan=0.0),
+            hnw_clients=np.nan_to_num(_num(cols[7]), nan=0.0),
+            pooled_clients=np.nan_to_num(_num(cols[8]), nan=0.0),
+            is_broker_dealer=_num(cols[9]) == 1,
+            is_bank_affiliate=_num(cols[10]) == 1,
+            is_insurance_affiliate=_num(cols[11]) == 1,
+            hq_state=_text(hq_state),
+        )
+        matrix._build_state_index(con.execute("SELECT FilingID, state FROM stg_adv_state_reg"))
+        return matrix
+
+    def __len__(self) -> int:
+        return len(self.adviser_id)
+
+    def _build_state_index(self, registrations: Iterable[Tuple[str, str]]) -> None:
+        """state -> adviser rows, mirroring the adv_states CTE (HQ state UNION registrations)."""
+        rows_by_filing: Dict[str, List[int]] = {}
+        for i, filing_id in enumerate(self.adviser_id):
+            rows_by_filing.setdefault(filing_id, []).append(i)
+        index: Dict[str, Set[int]] = {}
+        for i, hq in enumerate(self.hq_state):
+            if hq:
+                index.setdefault(hq, set()).add(i)
+        for filing_id, state in registrations:
+            for i in rows_by_filing.get(filing_id, ()):
+                index.setdefault(state, set()).add(i)
+        self._state_index = {k: np.array(sorted(v), dtype=np.int64) for k, v in index.items()}
+
+    def eligible(self, issuer_state: Optional[str]) -> np.ndarray:
+        """Row indexes that vw_investor_deal_candidates would join to this issuer_state."""
+        if issuer_state is None or issuer_state == "":
+            return np.arange(len(self), dtype=np.int64)
+        return self._state_index.get(issuer_state, np.empty(0, dtype=np.int64))
+
+
+def normalize_state(value: Optional[str]) -> Optional[str]:
+    """' tx ', 'Texas' -> 'TX'; other values upper-cased as the deal queries do; blank -> None."""
+    if value is None:
+        return None
+    state = " ".join(str(value).split()).upper()
+    if not state:
+        return None
+    return US_STATE_CODES.get(state, state)
+
+
+def profile_deal(
+    issuer_state: Optional[str] = None,
+    target_raise: Optional[float] = None,
+    min_invest: Optional[float] = None,
+    unit_price: Optional[float] = None,
+    security_type: Optional[str] = None,
+    retail_allowed: bool = False,
+    pooled_focus: bool = False,
+    deal_type: Optional[str] = None,
+    sold_vs_target: Optional[float] = None,
+    target_vs_cap: Optional[float] = None,
+) -> Deal:
+    """A hypothetical deal carrying the columns FD_DEAL_SQL / CF_DEAL_SQL would produce for a filing
+    with these features. deal_type defaults to REG_CF when only unit_price is given, else FORM_D."""
+    def _number(value: object, name: str) -> Optional[float]:
+        """None or blank means not given; anything else must be a number."""
+        if value is None or (isinstance(value, str) and not value.strip()):
+            return None
+        number = _as_float(value)
+        if np.isnan(number) and not (isinstance(value, float) and np.isnan(value)):
+            raise ValueError(f"{name} must be a number, not {value!r}")
+        return None if np.isnan(number) else number
+
+    target_raise = _number(target_raise, "target_raise")
+    min_invest = _number(min_invest, "min_invest")
+    unit_price = _number(unit_price, "unit_price")
+    if deal_type is None:
+        deal_type = "REG_CF" if unit_price is not None and min_invest is None else "FORM_D"
+    deal_type = deal_type.strip().upper()
+    if deal_type not in DEAL_TYPES:
+        raise ValueError(f"deal_type must be one of {', '.join(DEAL_TYPES)}, not {deal_type!r}")
+    if deal_type == "REG_CF":
+        retail, pooled = 1, 0  # as in CF_DEAL_SQL: every Reg CF offering is retail and none is pooled
+    else:
+        retail, pooled = int(bool(retail_allowed)), int(bool(pooled_focus))
+        if not security_type:
+            security_type = "Pooled Vehicle" if pooled else "Other"
+    return Deal(
+        deal_type=deal_type,
+        deal_id=PROFILE_DEAL_ID,
+        accession_id="",
+        issuer_name=None,
+        issuer_state=normalize_state(issuer_state),
+        target_raise=target_raise,
+        security_type=security_type,
+        retail_allowed=retail,
+        pooled_focus=pooled,
+        min_invest=min_invest if deal_type == "FORM_D" else None,
+        sold_vs_target=_number(sold_vs_target, "sold_vs_target") if deal_type == "FORM_D" else None,
+        unit_price=unit_price if deal_type == "REG_CF" else None,
+        target_vs_cap=_number(target_vs_cap, "target_vs_cap") if deal_type == "REG_CF" else None,
+    )
+
+
+def split_deal_id(deal_id: str) -> Tuple[str, str]:
+    """'FD:<acc>' -> ('FD', acc), 'CF:<acc>' -> ('CF', acc), bare accession -> ('', acc)."""
+    deal_id = deal_id.strip()
+    prefix, _, accession = deal_id.partition(":")
+    if not accession:
+        return "", deal_id
+    return prefix.upper(), accession
+
+
+def _deal_queries(con: sqlite3.Connection, where_fd: str, where_cf: str) -> Dict[str, str]:
+    return {
+        "FD": FD_DEAL_SQL.format(
+            features=_source(con, "vw_fd_features"),
+            offering=_source(con, "vw_fd_latest_offering"),
+            where=where_fd,
+        ),
+        "CF": CF_DEAL_SQL.format(features=_source(con, "vw_cf_features"), where=where_cf),
+    }
+
+
+def _fetch_deals(cur: sqlite3.Cursor) -> List[Deal]:
+    names = [d[0] for d in cur.description]
+    return [Deal(**dict(zip(names, row))) for row in cur]
+
+
+def load_deal(con: sqlite3.Connection, deal_id: str) -> Optional[Deal]:
+    """Fetch deal-side features for an FD:/CF: deal_id or a bare accession number."""
+    prefix, accession = split_deal_id(deal_id)
+    queries = _deal_queries(con, "f.ACCESSIONNUMBER = ?", "f.ACCESSION_NUMBER = ?")
+    for kind in ("FD", "CF"):
+        if prefix in ("", kind):
+            deals = _fetch_deals(con.execute(queries[kind], (accession,)))
+            if deals:
+                return deals[0]
+    return None
+
+
+def load_deals(
+    con: sqlite3.Connection,
+    deal_ids: Optional[Iterable[str]] = None,
+    since: Optional[str] = None,
+    deal_types: Iterable[str] = ("FORM_D", "REG_CF"),
+) -> List[Deal]:
+    """Fetch many deals with one query per deal type.
+
+    `deal_ids` follows load_deal (a bare accession resolves to Form D first);
+    `since` keeps deals whose FILING_DATE is on or after the ISO date. Deals
+    come back in input order when `deal_ids` is given, else by filing date.
+    """
+    deal_types = set(deal_types)
+    wanted: Dict[str, List[str]] = {"FD": [], "CF": []}
+    requested: List[Tuple[str, str]] = []
+    if deal_ids is not None:
+        for deal_id in deal_ids:
+            prefix, accession = split_deal_id(deal_id)
+            requested.append((prefix, accession))
+            for kind in ("FD", "CF"):
+                if prefix in ("", kind):
+                    wanted[kind].append(accession)
+
+    found: Dict[Tuple[str, str], Deal] = {}
+    for kind, deal_type, key in (("FD", "FORM_D", "ACCESSIONNUMBER"), ("CF", "REG_CF", "ACCESSION_NUMBER")):
+        if deal_type not in deal_types or (deal_ids is not None and not wanted[kind]):
+            continue
+        clauses, params = [], []
+        if deal_ids is not None:
+            clauses.append(f"f.{key} IN (SELECT value FROM json_each(?))")
+            params.append(json.dumps(wanted[kind]))
+        if since:
+            clauses.append("f.FILING_DATE >= ?")
+            params.append(since)
+        queries = _deal_queries(con, " AND ".join(clauses) or "1", " AND ".join(clauses) or "1")
+        for deal in _fetch_deals(con.execute(queries[kind], params)):
+            found[(kind, deal.accession_id)] = deal
+
+    if deal_ids is None:
+        return sorted(found.values(), key=lambda d: (d.filing_date or "", d.deal_id))
+    deals: List[Deal] = []
+    seen: Set[str] = set()
+    for prefix, accession in requested:
+        for kind in ("FD", "CF"):
+            deal = found.get((kind, accession)) if prefix in ("", kind) else None
+            if deal is not None:
+                if deal.deal_id not in seen:
+                    seen.add(deal.deal_id)
+                    deals.append(deal)
+                break
+    return deals
+
+
+def load_top_deals(
+    con: sqlite3.Connection,
+    adviser_id: str,
+    k: int = 10,
+    deal_types: Iterable[str] = ("FORM_D", "REG_CF"),
+) -> List[Dict[str, Any]]:
+    """An adviser's top k deals per deal type, best first.
+
+    Served from mat_adviser_top_deals (a primary-key range read) when k is
+    within its depth, else ranked from the scored table/view.
+    """
+    params = (str(adviser_id).strip(), json.dumps(sorted(deal_types)), k)
+    indexed = con.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (TOP_DEALS_TABLE,)
+    ).fetchone()
+    if indexed and k <= TOP_DEALS_PER_ADVISER:
+        cur = con.execute(TOP_DEALS_INDEX_SQL, params)
+    else:
+        cur = con.execute(TOP_DEALS_SCORED_SQL.format(scored=_source(con, "vw_investor_deal_scored")), params)
+    names = [d[0] for d in cur.description]
+    return [dict(zip(names, row)) for row in cur]
+
+
+def attach_contacts(con: sqlite3.Connection, advisers: List[Dict[str, Any]]) -> None:
+    """Add CONTACT_COLUMNS to each adviser row in place (None where Schedule R has no address)."""
+    row = con.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'view' AND name = 'vw_adv_contact_emails'"
+    ).fetchone()
+    if row is None or not advisers:
+        return
+    ids = sorted({str(adviser["adviser_id"]) for adviser in advisers})
+    contacts = {r[0]: r[1:] for r in con.execute(CONTACTS_SQL, (json.dumps(ids),))}
+    empty = (None,) * len(CONTACT_COLUMNS)
+    for adviser in advisers:
+        adviser.update(zip(CONTACT_COLUMNS, contacts.get(str(adviser["adviser_id"]), empty)))
+
+
+def score_deal(deal: Deal, advisers: AdviserMatrix, rows: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """Score one deal against `rows` of the adviser matrix (default: eligible advisers)."""
+    if rows is None:
+        rows = advisers.eligible(deal.issuer_state)
+    raum = advisers.total_raum[rows]
+    raum_ok = ~np.isnan(raum) & (raum > 0)
+    safe_raum = np.where(raum_ok, raum, 1.0)
+    pooled = advisers.pooled_clients[rows]
+    non_hnw = advisers.non_hnw_clients[rows]
+    hnw = advisers.hnw_clients[rows]
+    n = len(rows)
+
+    def _const(value: float) -> np.ndarray:
+        return np.full(n, value, dtype=np.float64)
+
+    # geography: every candidate with a known issuer_state already matched on state.
+    geography = _const(0.5 if not deal.issuer_state else 1.0)
+
+    target = _as_float(deal.target_raise)
+    if np.isnan(target) or target <= 0:
+        capital = _const(0.5)
+    else:
+        ladder = _step(target / safe_raum, [0.01, 0.05, 0.1, 0.2, 0.5],
+                       [1.0, 0.85, 0.7, 0.5, 0.3], 0.15, descending=False)
+        capital = np.where(raum_ok, ladder, 0.4)
+
+    if deal.pooled_focus == 1:
+        clients = pooled
+    elif deal.retail_allowed == 1:
+        clients = non_hnw
+    else:
+        clients = hnw
+    audience = np.select(
+        [clients >= 100, clients >= 50, clients >= 10, clients > 0],
+        [1.0, 0.85, 0.65, 0.45],
+        default=0.25,
+    )
+
+    if deal.deal_type == "FORM_D":
+        ticket_value, cuts = _as_float(deal.min_invest), [0.05, 0.15, 0.3, 0.6]
+    else:
+        ticket_value, cuts = _as_float(deal.unit_price), [0.0005, 0.0015, 0.003, 0.006]
+    if np.isnan(ticket_value):
+        ticket = _const(0.5)
+    else:
+        ladder = _step(ticket_value / safe_raum, cuts, [1.0, 0.85, 0.65, 0.45], 0.25, descending=False)
+        ticket = np.where(raum_ok, ladder, 0.6)
+
+    if deal.deal_type == "FORM_D":
+        sold = _as_float(deal.sold_vs_target)
+        if np.isnan(sold):
+            traction_value = 0.5
+        elif sold >= 1.0:
+            traction_value = 1.0
+        elif sold >= 0.75:
+            traction_value = 0.8
+        elif sold >= 0.5:
+            traction_value = 0.6
+        elif sold >= 0.25:
+            traction_value = 0.4
+        else:
+            traction_value = 0.2
+    else:
+        ratio = _as_float(deal.target_vs_cap)
+        traction_value = 0.5 if np.isnan(ratio) else (0.6 if ratio <= 0.8 else 0.4)
+    traction = _const(traction_value)
+
+    # SQLite LIKE is case-insensitive for ASCII.
+    security_type = (deal.security_type or "").lower()
+    if deal.pooled_focus == 1:
+        security = np.where(pooled > 0, 0.9, 0.4)
+    elif security_type.startswith("debt"):
+        affiliated = (advisers.is_bank_affiliate[rows] | advisers.is_broker_dealer[rows]
+                      | advisers.is_insurance_affiliate[rows])
+        security = np.where(affiliated, 0.85, 0.4)
+    elif security_type.startswith("equity"):
+        security = np.where(hnw > 0, 0.8, 0.5)
+    else:
+        security = _const(0.5)
+
+    # Same operation order as the SQL composite so the floats are bit-identical.
+    composite = (
+        WEIGHTS["geography"] * geography
+        + WEIGHTS["capital"] * capital
+        + WEIGHTS["audience"] * audience
+        + WEIGHTS["ticket"] * ticket
+        + WEIGHTS["traction"] * traction
+        + WEIGHTS["security"] * security
+    )
+    return {
+        "rows": rows,
+        "geography_score": geography,
+        "capital_score": capital,
+        "audience_score": audience,
+        "ticket_score": ticket,
+        "traction_score": traction,
+        "security_score": security,
+        "composite_score": composite,
+    }
+
+
+def top_k(scores: Dict[str, np.ndarray], advisers: AdviserMatrix, k: int = 5) -> List[Dict[str, Any]]:
+    """Highest composite scores first; ties broken by adviser_id for stable output."""
+    rows = scores["rows"]
+    if len(rows) == 0 or k <= 0:
+        return []
+    composite = scores["composite_score"]
+    if len(rows) > k:
+        cutoff = np.partition(composite, len(composite) - k)[len(composite) - k]
+        keep = np.flatnonzero(composite >= cutoff)
+    else:
+        keep = np.arange(len(rows))
+    ids = advisers.adviser_id[rows[keep]].astype(str)
+    order = keep[np.lexsort((ids, -composite[keep]))][:k]
+
+    results = []
+    for pos in order:
+        i = rows[pos]
+        raum = advisers.total_raum[i]
+        results.append({
+            "adviser_id": advisers.adviser_id[i],
+            "adviser_name": advisers.adviser_name[i],
+            "adviser_city": advisers.city[i],
+            "adviser_state": advisers.state[i],
+            "total_raum": None if np.isnan(raum) else float(raum),
+            "raum_bucket": advisers.raum_bucket[i],
+            "non_hnw_clients": float(advisers.non_hnw_clients[i]),
+            "hnw_clients": float(advisers.hnw_clients[i]),
+            "pooled_clients": float(advisers.pooled_clients[i]),
+            **{name: float(scores[name][pos]) for name in scores if name != "rows"},
+        })
+    return results
+
+
+class ScoringEngine:
+    """Keeps the adviser matrix resident and answers top-K queries per deal (and per adviser).
+
+    read_only opens the database immutable and memory-mapped (tools/serving_db.py);
+    the matrix is reloaded when a reload swaps a new database file in.
+    """
+
+    def __init__(self, db_path: Path = DB_PATH, read_only: bool = False):
+        self.db_path = Path(db_path)
+        self.read_only = read_only
+        self._advisers: Optional[AdviserMatrix] = None
+        self._identity: Optional[Tuple[int, int]] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self.read_only:
+            return connect_read_only(self.db_path)
+        return sqlite3.connect(self.db_path)
+
+    @property
+    def stale(self) -> bool:
+        """True until the matrix is loaded, and again once a different database file is in place."""
+        return self._advisers is None or file_identity(self.db_path) != self._identity
+
+    @property
+    def advisers(self) -> AdviserMatrix:
+        if self.stale:
+            self.reload()
+        return self._advisers
+
+    def reload(self) -> None:
+        identity = file_identity(self.db_path)
+        con = self._connect()
+        try:
+            self._advisers = AdviserMatrix.from_db(con)
+            self._identity = identity
+        finally:
+            con.close()
+
+    def _rank(self, con: sqlite3.Connection, deal: Deal, k: int) -> Dict[str, Any]:
+        matrix = self.advisers
+        scores = score_deal(deal, matrix)
+        advisers = top_k(scores, matrix, k)
+        attach_contacts(con, advisers)
+        return {
+            "deal": deal.__dict__,
+            "candidates": int(len(scores["rows"])),
+            "advisers": advisers,
+        }
+
+    def top_advisers(self, deal_id: str, k: int = 5) -> Optional[Dict[str, Any]]:
+        con = self._connect()
+        try:
+            deal = load_deal(con, deal_id)
+            if deal is None:
+                return None
+            return self._rank(con, deal, k)
+        finally:
+            con.close()
+
+    def top_advisers_for_profile(self, deal: Deal, k: int = 5) -> Dict[str, Any]:
+        """top_advisers for a hypothetical deal (profile_deal): scored in memory over the state's
+        candidate bucket; the database is only read, for the contacts of the K advisers."""
+        con = self._connect()
+        try:
+            return self._rank(con, deal, k)
+        finally:
+            con.close()
+
+    def top_advisers_batch(
+        self,
+        deal_ids: Optional[Iterable[str]] = None,
+        since: Optional[str] = None,
+        k: int = 5,
+        deal_types: Iterable[str] = ("FORM_D", "REG_CF"),
+    ) -> List[Dict[str, Any]]:
+        """top_advisers for many deals: one deal query per type, one adviser matrix."""
+        con = self._connect()
+        try:
+            deals = load_deals(con, deal_ids, since, deal_types)
+            results = []
+            for deal in deals:
+                scores = score_deal(deal, self.advisers)
+                results.append({
+                    "deal": deal.__dict__,
+                    "candidates": int(len(scores["rows"])),
+                    "advisers": top_k(scores, self.advisers, k),
+                })
+            attach_contacts(con, [adviser for result in results for adviser in result["advisers"]])
+        finally:
+            con.close()
+        return results
+
+    def top_deals(
+        self,
+        adviser_id: str,
+        k: int = 10,
+        deal_types: Iterable[str] = ("FORM_D", "REG_CF"),
+    ) -> Dict[str, Any]:
+        """The reverse lookup: an adviser's best-scoring deals per deal type."""
+        con = self._connect()
+        try:
+            deals = load_top_deals(con, adviser_id, k, deal_types)
+        finally:
+            con.close()
+        return {"adviser_id": str(adviser_id).strip(), "deals": deals}
@@ -0,0 +1,104 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Optional
+import json
+
+from agno.tools import Toolkit
+
+from tools.scoring_engine import DB_PATH, ScoringEngine, profile_deal
+
+
+class ScoringTools(Toolkit):
+    """
+    Batched top-K adviser scoring for a single deal, and its reverse:
+    - top_advisers_for_deal: composite + component scores for the best K advisers
+    - top_advisers_for_profile: the same for a hypothetical deal described by its features
+    - top_deals_for_adviser: an adviser's best K deals per deal type (precomputed index)
+    - reload_advisers: refresh the in-memory adviser matrix after a data load
+    """
+    def __init__(
+        self,
+        db_path: Optional[Path] = None,
+        read_only: bool = False,
+        name: str = "scoring_tools",
+        **kwargs,
+    ):
+        registered_tools = [
+            self.top_advisers_for_deal,
+            self.top_advisers_for_profile,
+            self.top_deals_for_adviser,
+            self.reload_advisers,
+        ]
+        super().__init__(name=name, tools=registered_tools, **kwargs)
+        self.engine = ScoringEngine(db_path or DB_PATH, read_only=read_only)
+
+    def top_advisers_for_deal(self, deal_id: str, k: int = 5) -> str:
+        """Return the top K advisers for a deal (FD:<accession>, CF:<accession>, or a bare accession),
+        with composite_score and geography/capital/audience/ticket/traction/security component scores
+        identical to vw_investor_deal_scored."""
+        result = self.engine.top_advisers(deal_id, k)
+        if result is None:
+            return json.dumps({"ok": False, "error": "unknown_deal", "deal_id": deal_id})
+        return json.dumps({"ok": True, **result}, default=str)
+
+    def top_advisers_for_profile(
+        self,
+        issuer_state: Optional[str] = None,
+        target_raise: Optional[float] = None,
+        min_invest: Optional[float] = None,
+        unit_price: Optional[float] = None,
+        security_type: Optional[str] = None,
+        retail_allowed: bool = False,
+        pooled_focus: bool = False,
+        deal_type: Optional[str] = None,
+        k: int = 5,
+    ) -> str:
+        """Return the top K advisers for a hypothetical deal described in words, without an accession
+        (e.g. "a $5M Texas equity raise open to non-accredited investors" -> issuer_state="TX",
+        target_raise=5000000, security_type="Equity", retail_allowed=True). Scores are computed exactly
+        as vw_investor_deal_scored would score a filing with these features; nothing is written.
+
+        Args:
+            issuer_state (str, optional): Two-letter code or state name; omit to consider every adviser.
+            target_raise (float, optional): Total offering amount in dollars.
+            min_invest (float, optional): Minimum investment in dollars (Form D).
+            unit_price (float, optional): Price per security in dollars (Reg CF).
+            security_type (str, optional): Form D: 'Equity', 'Debt', 'Equity & Debt', 'Pooled Vehicle' or
+                'Other'; Reg CF: the offered security as filed (e.g. 'Common Stock', 'Debt', 'SAFE').
+            retail_allowed (bool): Open to non-accredited investors (always true for Reg CF).
+            pooled_focus (bool): A pooled investment fund (Form D).
+            deal_type (str, optional): 'FORM_D' or 'REG_CF'; defaults to REG_CF when only unit_price is
+                given, else FORM_D.
+            k (int): Number of advisers. Defaults to 5.
+        """
+        try:
+            deal = profile_deal(
+                issuer_state, target_raise, min_invest, unit_price, security_type,
+                retail_allowed, pooled_focus, deal_type,
+            )
+        except ValueError as e:
+            return json.dumps({"ok": False, "error": "invalid_profile", "message": str(e)})
+        result = self.engine.top_advisers_for_profile(deal, k)
+        if not result["advisers"]:
+            return json.dumps({
+                "ok": False,
+                "error": "no_candidates",
+                "issuer_state": deal.issuer_state,
+                "hint": "No adviser is based or registered there; check the state, or omit issuer_state.",
+            })
+        return json.dumps({"ok": True, **result}, default=str)
+
+    def top_deals_for_adviser(self, adviser_id: str, k: int = 10, deal_type: Optional[str] = None) -> str:
+        """Return the top K deals for an adviser (adviser_id = the adviser's latest FilingID), per deal_type
+        ('FORM_D' or 'REG_CF'; both when omitted), ranked by composite_score with the same component
+        scores as vw_investor_deal_scored."""
+        deal_types = (deal_type.strip().upper(),) if deal_type else ("FORM_D", "REG_CF")
+        result = self.engine.top_deals(adviser_id, k, deal_types)
+        if not result["deals"]:
+            return json.dumps({"ok": False, "error": "no_scored_deals", "adviser_id": adviser_id})
+        return json.dumps({"ok": True, **result}, default=str)
+
+    def reload_advisers(self) -> str:
+        """Reload adviser features from the database (call after the staging data is refreshed)."""
+        self.engine.reload()
+        return json.dumps({"ok": True, "advisers": len(self.engine.advisers)})
@@ -1,15 +1,21 @@
 from __future__ import annotations
-from typing import Any, Dict, List, Optional, Literal
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Literal, Tuple
 from dataclasses import dataclass, field, asdict
 from datetime import datetime
-import uuid
 import json
+import sqlite3
+import threading
+import time
+import uuid
 
 from agno.tools import Toolkit
+from agno.utils.log import log_debug
 
 StepType = Literal["reason", "sql", "tool", "decision", "validate"]
 
-@dataclass
+@dataclass(slots=True)
 class Step:
     index: int
     title: str
@@ -22,7 +28,7 @@ class Step:
     started_at: Optional[str] = None
     finished_at: Optional[str] = None
 
-@dataclass
+@dataclass(slots=True)
 class Plan:
     plan_id: str
     created_at: str
@@ -34,6 +40,122 @@ class Plan:
     reflections: List[str] = field(default_factory=list)
     meta: Dict[str, Any] = field(default_factory=dict)
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Plan":
+        steps = [Step(**step) for step in data.get("steps", [])]
+        return cls(**{**data, "steps": steps})
+
+
+PLANS_DDL = """
+CREATE TABLE IF NOT EXISTS plans (
+  plan_id text PRIMARY KEY,
+  updated_at real NOT NULL,  -- time.time() of the last change.
+  body text NOT NULL         -- the Plan as JSON.
+)
+"""
+
+
+class PlanStore:
+    """
+    Plans kept in memory with LRU + idle-age eviction:
+    - at most max_plans plans stay resident (least recently used go first)
+    - plans untouched for max_idle_seconds are dropped
+    - with db_path, every change is written through to SQLite and evicted
+      plans are reloaded on demand until they pass max_idle_seconds there too
+
+    Thread-safe, so one store can back several agents.
+    """
+    def __init__(
+        self,
+        max_plans: int = 1000,
+        max_idle_seconds: Optional[float] = 3600.0,
+        db_path: Optional[Path] = None,
+    ):
+        self.max_plans = max_plans
+        self.max_idle_seconds = max_idle_seconds
+        self._plans: OrderedDict[str, Tuple[float, Plan]] = OrderedDict()
+        self._stats = {"evictions": 0, "expirations": 0, "loads": 0}
+        self._lock = threading.RLock()
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path is not None:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(PLANS_DDL)
+            self.prune(on_disk=True)
+
+    def __len__(self) -> int:
+        return len(self._plans)
+
+    def get(self, plan_id: str) -> Optional[Plan]:
+        with self._lock:
+            self.prune()
+            entry = self._plans.get(plan_id)
+            if entry is not None:
+                self._plans[plan_id] = (time.time(), entry[1])
+                self._plans.move_to_end(plan_id)
+                return entry[1]
+            plan = self._load(plan_id)
+            if plan is not None:
+                self._stats["loads"] += 1
+                self._remember(plan)
+            return plan
+
+    def put(self, plan: Plan) -> None:
+        """Store a new or changed plan (write-through when persistent)."""
+        with self._lock:
+            self._remember(plan)
+            if self._db is not None:
+                with self._db:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO plans VALUES (?, ?, ?)",
+                        (plan.plan_id, time.time(), json.dumps(asdict(plan), default=str)),
+                    )
+
+    def prune(self, on_disk: bool = False) -> None:
+        """Drop plans idle for longer than max_idle_seconds (also from SQLite when on_disk)."""
+        if self.max_idle_seconds is None:
+            return
+        cutoff = self._cutoff()
+        with self._lock:
+            while self._plans:
+                plan_id, (touched, _) = next(iter(self._plans.items()))
+                if touched >= cutoff:
+                    break
+                del self._plans[plan_id]
+                self._stats["expirations"] += 1
+            if on_disk and self._db is not None:
+                with self._db:
+                    self._db.execute("DELETE FROM plans WHERE updated_at < ?", (cutoff,))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "resident": len(self._plans), "persistent": self._db is not None}
+
+    def _cutoff(self) -> float:
+        return time.time() - self.max_idle_seconds if self.max_idle_seconds is not None else float("-inf")
+
+    def _remember(self, plan: Plan) -> None:
+        self._plans[plan.plan_id] = (time.time(), plan)
+        self._plans.move_to_end(plan.plan_id)
+        while len(self._plans) > self.max_plans:
+            evicted, _ = self._plans.popitem(last=False)
+            self._stats["evictions"] += 1
+            log_debug(f"evicted plan {evicted} from memory")
+
+    def _load(self, plan_id: str) -> Optional[Plan]:
+        if self._db is None:
+            return None
+        row = self._db.execute(
+            "SELECT body FROM plans WHERE plan_id = ? AND updated_at >= ?", (plan_id, self._cutoff())
+        ).fetchone()
+        return Plan.from_dict(json.loads(row[0])) if row else None
+
+
+def _compact(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop None/empty fields so compact responses carry only what is set."""
+    return {key: value for key, value in record.items() if value not in (None, [], {}, "")}
+
+
 class SequentialThinkingTools(Toolkit):
     """
     A deterministic planning scratchpad for Agents:
@@ -42,8 +164,22 @@ class SequentialThinkingTools(Toolkit):
     - set_step_status / record_result: lifecycle ops
     - reflect: append reflection note
     - get_plan: fetch as JSON
+
+    Plans live in a PlanStore (bounded, optionally persisted to SQLite at
+    db_path). With compact=True (the default) mutating calls answer with only
+    the fields they changed and get_plan omits step results unless asked;
+    compact=False returns the full step/plan on every call.
     """
-    def __init__(self, name: str = "sequential_thinking", **kwargs):
+    def __init__(
+        self,
+        name: str = "sequential_thinking",
+        compact: bool = True,
+        store: Optional[PlanStore] = None,
+        max_plans: int = 1000,
+        max_idle_seconds: Optional[float] = 3600.0,
+        db_path: Optional[Path] = None,
+        **kwargs,
+    ):
         registered_tools = [
             self.new_plan,
             self.add_step,
@@ -56,7 +192,8 @@ class SequentialThinkingTools(Toolkit):
             if not hasattr(tool_func, "__name__") and hasattr(tool_func, "name"):
                 setattr(tool_func, "__name__", getattr(tool_func, "name"))
         super().__init__(name=name, tools=registered_tools, **kwargs)
-        self._plans: Dict[str, Plan] = {}
+        self.compact = compact
+        self._plans = store if store is not None else PlanStore(max_plans=max_plans, max_idle_seconds=max_idle_seconds, db_path=db_path)
 
     def new_plan(self, title: str, goal: str,
                  constraints: Optional[List[str]] = None,
@@ -73,7 +210,9 @@ class SequentialThinkingTools(Toolkit):
             max_steps=max_steps,
             meta=metadata or {}
         )
-        self._plans[pid] = plan
+        self._plans.put(plan)
+        if self.compact:
+            return json.dumps({"ok": True, "plan_id": pid})
         return json.dumps({"ok": True, "plan_id": pid, "plan": asdict(plan)})
 
     def add_step(self, plan_id: str, title: str, kind: StepType = "reason",
@@ -93,6 +232,9 @@ class SequentialThinkingTools(Toolkit):
             expected=expected
         )
         plan.steps.append(step)
+        self._plans.put(plan)
+        if self.compact:
+            return json.dumps({"ok": True, "index": step.index})
         return json.dumps({"ok": True, "step": asdict(step)})
 
     def set_step_status(self, plan_id: str, index: int,
@@ -104,11 +246,15 @@ class SequentialThinkingTools(Toolkit):
         except IndexError:
             return json.dumps({"ok": False, "error": "invalid_step_index"})
         now = datetime.utcnow().isoformat()
+        changed: Dict[str, Any] = {"status": status}
         if status == "running":
-            step.started_at = now
+            step.started_at = changed["started_at"] = now
         if status in ("done","skipped","failed"):
-            step.finished_at = now
+            step.finished_at = changed["finished_at"] = now
         step.status = status
+        self._plans.put(plan)
+        if self.compact:
+            return json.dumps({"ok": True, "index": index, **changed})
         return json.dumps({"ok": True, "step": asdict(step)})
 
     def record_result(self, plan_id: str, index: int, result: str, success: bool = True) -> str:
@@ -119,24 +265,44 @@ class SequentialThinkingTools(Toolkit):
         except IndexError:
             return json.dumps({"ok": False, "error": "invalid_step_index"})
         step.result = result
+        changed: Dict[str, Any] = {}
         if success and step.status != "done":
-            step.status = "done"
-            step.finished_at = datetime.utcnow().isoformat()
+            step.status = changed["status"] = "done"
+            step.finished_at = changed["finished_at"] = datetime.utcnow().isoformat()
+        self._plans.put(plan)
+        if self.compact:
+            return json.dumps({"ok": True, "index": index, **changed})
         return json.dumps({"ok": True, "step": asdict(step)})
 
     def reflect(self, plan_id: str, note: str) -> str:
         """Append a free-form reflection note to the plan."""
         plan = self._require(plan_id)
         plan.reflections.append(note)
+        self._plans.put(plan)
+        if self.compact:
+            return json.dumps({"ok": True, "reflections": len(plan.reflections)})
         return json.dumps({"ok": True, "reflections": plan.reflections})
 
-    def get_plan(self, plan_id: str) -> str:
-        """Return the entire plan JSON."""
+    def get_plan(self, plan_id: str, include_results: bool = False) -> str:
+        """Return the plan JSON. Step results are left out unless include_results=True."""
         plan = self._require(plan_id)
-        return json.dumps({"ok": True, "plan": asdict(plan)})
+        if not self.compact:
+            return json.dumps({"ok": True, "plan": asdict(plan)})
+        body = _compact(asdict(plan))
+        steps = []
+        for step in body.get("steps", []):
+            result = step.pop("result")
+            if result is not None and include_results:
+                step["result"] = result
+            elif result is not None:
+                step["has_result"] = True
+            steps.append(_compact(step))
+        body["steps"] = steps
+        return json.dumps({"ok": True, "plan": body})
 
     # ---- helpers ----
     def _require(self, plan_id: str) -> Plan:
-        if plan_id not in self._plans:
+        plan = self._plans.get(plan_id)
+        if plan is None:
             raise ValueError(f"Unknown plan_id: {plan_id}")
-        return self._plans[plan_id]
+        return plan
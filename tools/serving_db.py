@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Read-only serving of data/staging.sqlite, and reloads that never disturb it.
+
+Serving: connections open the database as file:...?mode=ro&immutable=1, so
+SQLite takes no locks and never re-checks the file for changes, with a large
+mmap window (SERVE_PRAGMAS) so pages are read straight from the OS page
+cache, which every connection and process shares. serving_engine() pools
+these connections across agent sessions; checking out a connection whose
+file has since been swapped reconnects it to the new file.
+
+Reload: build_snapshot() copies the live database with SQLite's backup API
+into data/builds/, runs the loader (only new or changed files, per the
+ingest manifest) and the materializer against the copy, checkpoints it and
+switches it to journal_mode=DELETE (an immutable reader must never meet a
+-wal file). swap_in() then os.replace()s it over the live path: readers
+already holding the old file keep reading it until their connection is
+recycled, new connections see the new file, and no file being served is
+ever written to.
+
+Run from the repo root: python -m tools.serving_db [2025Q2_d ...] [--data-root DIR] [--workers N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional, Tuple
+from urllib.parse import quote
+
+# The loader (pandas) and SQLAlchemy are imported where used: the scoring engine imports this module
+# for connect_read_only/file_identity only.
+if TYPE_CHECKING:
+    from sqlalchemy import Engine
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DB_PATH = REPO_ROOT / "data" / "staging.sqlite"
+BUILD_DIR_NAME = "builds"
+
+SERVE_PRAGMAS = {
+    "mmap_size": 2 << 30,   # map up to 2 GiB (SQLite's default ceiling); pages come from the shared OS page cache
+    "cache_size": -65_536,  # 64 MiB private cache per connection for non-mmap pages
+    "temp_store": "MEMORY",
+    "query_only": 1,
+}
+
+
+def read_only_uri(db_path: Path) -> str:
+    return f"file:{quote(str(Path(db_path).resolve()))}?mode=ro&immutable=1"
+
+
+def file_identity(db_path: Path) -> Optional[Tuple[int, int]]:
+    """(device, inode) of the file at db_path now; changes when a reload swaps a new file in."""
+    try:
+        stat = os.stat(db_path)
+    except FileNotFoundError:
+        return None
+    return stat.st_dev, stat.st_ino
+
+
+def configure_serving(con: sqlite3.Connection) -> None:
+    for pragma, value in SERVE_PRAGMAS.items():
+        con.execute(f"PRAGMA {pragma}={value}")
+
+
+def connect_read_only(db_path: Path = DB_PATH) -> sqlite3.Connection:
+    """One immutable, memory-mapped connection (for code outside the pooled engine)."""
+    con = sqlite3.connect(read_only_uri(db_path), uri=True, check_same_thread=False)
+    configure_serving(con)
+    return con
+
+
+def serving_engine(db_path: Path = DB_PATH, pool_size: int = 8) -> Engine:
+    """Pooled immutable connections to db_path, shared by every agent session."""
+    from sqlalchemy import create_engine, event, exc
+
+    db_path = Path(db_path).resolve()
+    engine = create_engine(
+        f"sqlite:///{read_only_uri(db_path)}&uri=true",
+        pool_size=pool_size,
+        max_overflow=0,
+        pool_timeout=60,
+        pool_pre_ping=False,
+        connect_args={"check_same_thread": False},
+    )
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        connection_record.info["identity"] = file_identity(db_path)
+        configure_serving(dbapi_connection)
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        if connection_record.info.get("identity") != file_identity(db_path):
+            # The pool closes this connection and retries the checkout with a fresh one.
+            raise exc.DisconnectionError("database file was swapped by a reload")
+
+    return engine
+
+
+@contextmanager
+def reload_lock(build_dir: Path) -> Iterator[None]:
+    """Exclusive lock so two reloads never build or swap at the same time (POSIX only)."""
+    import fcntl  # not on Windows, where serving (connect_read_only, file_identity) still works
+
+    build_dir.mkdir(parents=True, exist_ok=True)
+    with open(build_dir / ".reload.lock", "w") as handle:
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise RuntimeError(f"another reload holds {build_dir / '.reload.lock'}") from None
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def finalize(db_path: Path) -> None:
+    """Fold the WAL into the main file and leave it in rollback-journal mode, ready to be served immutable."""
+    con = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        con.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        mode = con.execute("PRAGMA journal_mode=DELETE").fetchone()[0]
+        if mode.lower() != "delete":
+            raise RuntimeError(f"{db_path} is still in {mode} mode")
+        con.execute("PRAGMA optimize")
+    finally:
+        con.close()
+    for suffix in ("-wal", "-shm"):
+        if Path(f"{db_path}{suffix}").exists():
+            raise RuntimeError(f"{db_path}{suffix} left behind after the checkpoint")
+
+
+def build_snapshot(
+    db_path: Path,
+    data_root: Path,
+    only: Iterable[str] = (),
+    workers: int = 1,
+    full: bool = False,
+) -> Tuple[Path, dict]:
+    """Copy db_path, load new files into the copy, materialize it and finalize it; returns (path, loaded)."""
+    from tools import load_staging, materialize_views
+
+    build_dir = db_path.parent / BUILD_DIR_NAME
+    build = build_dir / f"{db_path.stem}.{time.strftime('%Y%m%d_%H%M%S')}.sqlite"
+    build.unlink(missing_ok=True)
+    try:
+        con = sqlite3.connect(build)
+        try:
+            if db_path.exists():
+                # mode=ro but not immutable: a live file last loaded in place may still have a -wal to read.
+                live = sqlite3.connect(f"file:{quote(str(db_path))}?mode=ro", uri=True)
+                try:
+                    live.backup(con)
+                finally:
+                    live.close()
+            load_staging.configure_connection(con)
+            load_staging.exec_schema(con)
+            loaded = load_staging.ingest(con, data_root, only, workers=workers)
+        finally:
+            con.close()
+
+        con = sqlite3.connect(build, isolation_level=None)
+        try:
+            con.execute("PRAGMA journal_mode=WAL")
+            materialize_views.materialize(con, full=full)
+        finally:
+            con.close()
+        finalize(build)
+    except BaseException:
+        for path in (build, Path(f"{build}-wal"), Path(f"{build}-shm")):
+            path.unlink(missing_ok=True)
+        raise
+    return build, loaded
+
+
+def swap_in(build: Path, db_path: Path) -> None:
+    """Atomically make `build` the live database (same filesystem, so os.replace is a rename)."""
+    with open(build, "rb+") as handle:
+        os.fsync(handle.fileno())
+    os.replace(build, db_path)
+    # Journal files of the replaced file (if it was last written in place) must not pair with the new one.
+    for suffix in ("-wal", "-shm"):
+        Path(f"{db_path}{suffix}").unlink(missing_ok=True)
+    dir_fd = os.open(db_path.parent, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+def reload(
+    db_path: Path = DB_PATH,
+    data_root: Optional[Path] = None,
+    only: Iterable[str] = (),
+    workers: int = 1,
+    full: bool = False,
+) -> dict:
+    """Build a refreshed copy of db_path and swap it in; serving connections are never blocked."""
+    from tools.load_staging import DATA_ROOT
+
+    db_path = Path(db_path).resolve()
+    data_root = Path(data_root or DATA_ROOT)
+    with reload_lock(db_path.parent / BUILD_DIR_NAME):
+        start = time.perf_counter()
+        build, loaded = build_snapshot(db_path, data_root, only, workers=workers, full=full)
+        built = time.perf_counter()
+        swap_in(build, db_path)
+    return {
+        "db": str(db_path),
+        "loaded": loaded,
+        "build_seconds": round(built - start, 3),
+        "swap_seconds": round(time.perf_counter() - built, 4),
+    }
+
+
+def main() -> None:
+    from tools.load_staging import DATA_ROOT
+
+    parser = argparse.ArgumentParser(description="Rebuild the served database in a copy and swap it in atomically.")
+    parser.add_argument(
+        "sources",
+        nargs="*",
+        help="Directories under the data root to consider (e.g. 2025Q1_d 2025Q1_cf); default: all.",
+    )
+    parser.add_argument("--db", type=Path, default=DB_PATH, help="Live SQLite database to replace.")
+    parser.add_argument("--data-root", type=Path, default=DATA_ROOT, help="Root of the raw SEC files.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Processes used to normalize ADV chunks (1 = parse inline).",
+    )
+    parser.add_argument("--full", action="store_true", help="Rebuild every mat_* table instead of refreshing.")
+    args = parser.parse_args()
+
+    result = reload(args.db, args.data_root, args.sources, workers=args.workers, full=args.full)
+    for name, rows in result["loaded"].items():
+        print(f"  {name}: {rows} rows")
+    print(
+        f"Swapped a refreshed {args.db} in ({len(result['loaded'])} sources loaded; "
+        f"build {result['build_seconds']:.1f}s, swap {result['swap_seconds'] * 1000:.1f}ms)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+A local, deterministic stand-in for the Gemini model.
+
+StandInModel answers without any network call, so the agent, its tools, the
+database and the service around them can be exercised and timed on their
+own (python -m tools.agent_service --model standin). It follows one script:
+a question naming a deal accession (FD:/CF: prefix optional) becomes a
+top_advisers_for_deal call for the "top N" it asks for; once tool results
+are in, it answers with a markdown table of them. Anything else gets a
+short fixed reply.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+from uuid import uuid4
+
+from agno.models.base import Model
+from agno.models.message import Message
+from agno.models.response import ModelResponse
+
+ACCESSION = re.compile(r"\b(?:(FD|CF):)?(\d{10}-\d{2}-\d{6})\b", re.IGNORECASE)
+TOP_N = re.compile(r"\btop\s+(\d{1,3})\b", re.IGNORECASE)
+DEAL_TOOL = "top_advisers_for_deal"
+TABLE_COLUMNS = ["adviser_id", "adviser_name", "adviser_state", "total_raum", "composite_score", "MAIN_OFFICE_EMAIL"]
+
+
+def _text(message: Message) -> str:
+    content = message.content
+    if isinstance(content, list):
+        return " ".join(str(part.get("text", "")) if isinstance(part, dict) else str(part) for part in content)
+    return str(content or "")
+
+
+def render_result(result: Dict[str, Any]) -> str:
+    """A tool result as markdown: the adviser table when there is one, else the JSON itself."""
+    advisers = result.get("advisers")
+    if not result.get("ok", True) or not isinstance(advisers, list):
+        return f"```json\n{json.dumps(result, indent=2, default=str)}\n```"
+    columns = [col for col in TABLE_COLUMNS if any(col in row for row in advisers)]
+    deal = result.get("deal") or {}
+    lines = [
+        f"Top {len(advisers)} advisers for {deal.get('deal_id', 'the deal')}:",
+        "",
+        "| " + " | ".join(columns) + " |",
+        "|" + "---|" * len(columns),
+    ]
+    for row in advisers:
+        lines.append("| " + " | ".join("" if row.get(col) is None else str(row.get(col)) for col in columns) + " |")
+    return "\n".join(lines)
+
+
+@dataclass
+class StandInModel(Model):
+    """
+    Scripted model for tests and latency baselines:
+    - first turn: one top_advisers_for_deal call when the question names an accession
+    - after tool results: a markdown answer built from them
+    - otherwise: a fixed reply
+    """
+
+    id: str = "standin"
+    name: str = "StandIn"
+    provider: str = "Local"
+    default_k: int = 5
+
+    def _respond(self, messages: List[Message], tools: Optional[List[Dict[str, Any]]] = None) -> ModelResponse:
+        last = messages[-1] if messages else None
+        if last is not None and last.role == self.tool_message_role:
+            results = []
+            for message in reversed(messages):
+                if message.role != self.tool_message_role:
+                    break
+                try:
+                    results.append(render_result(json.loads(_text(message))))
+                except ValueError:
+                    results.append(_text(message))
+            return ModelResponse(role=self.assistant_message_role, content="\n\n".join(reversed(results)))
+
+        question = next((_text(m) for m in reversed(messages) if m.role == "user"), "")
+        names = {self._tool_name(t) for t in tools or []}
+        match = ACCESSION.search(question)
+        if match and DEAL_TOOL in names:
+            prefix, accession = match.groups()
+            top = TOP_N.search(question)
+            arguments = {
+                "deal_id": f"{prefix.upper()}:{accession}" if prefix else accession,
+                "k": int(top.group(1)) if top else self.default_k,
+            }
+            return ModelResponse(
+                role=self.assistant_message_role,
+                tool_calls=[{
+                    "id": uuid4().hex,
+                    "type": "function",
+                    "function": {"name": DEAL_TOOL, "arguments": json.dumps(arguments)},
+                }],
+            )
+        return ModelResponse(
+            role=self.assistant_message_role,
+            content="Stand-in model: name a Form D or Reg CF accession number to get its top advisers.",
+        )
+
+    def invoke(self, messages: List[Message], assistant_message: Message, tools=None, **kwargs) -> ModelResponse:
+        return self._respond(messages, tools)
+
+    async def ainvoke(self, messages: List[Message], assistant_message: Message, tools=None, **kwargs) -> ModelResponse:
+        return self._respond(messages, tools)
+
+    def invoke_stream(self, messages: List[Message], assistant_message: Message, tools=None, **kwargs) -> Iterator[ModelResponse]:
+        yield self._respond(messages, tools)
+
+    async def ainvoke_stream(
+        self, messages: List[Message], assistant_message: Message, tools=None, **kwargs
+    ) -> AsyncIterator[ModelResponse]:
+        yield self._respond(messages, tools)
+
+    def _parse_provider_response(self, response: Any, **kwargs) -> ModelResponse:
+        return response
+
+    def _parse_provider_response_delta(self, response: Any) -> ModelResponse:
+        return response
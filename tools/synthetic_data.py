@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Deterministic synthetic SEC filings in the layouts tools/load_staging.py reads.
+
+Writes one Form D quarter (<quarter>_d/*.tsv), one Reg CF quarter
+(<quarter>_cf/*.tsv) and an ADV part (adv-filing-data-synthetic/IA_ADV_Base_A_*.csv,
+IA_ADV_Base_B_*.csv and a long-format IA_Firm_Download_SCH_R_*.csv) under a data root. The same seed and scale always
+produce byte-identical files, so benchmark runs are comparable. ADV firms file
+1-3 times under one CRD number (1E1) to exercise firm-level deduplication, and
+a small share of deals carry no issuer state (they match every adviser).
+
+Run from the repo root: python -m tools.synthetic_data /tmp/sec-synthetic --scale 10k
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator
+
+import numpy as np
+import pandas as pd
+
+from tools.load_staging import ADV_A_BOOL_COLS, ADV_A_USECOLS, CF_FILES, FD_FILES
+
+STATES = [
+    "AL", "AK", "AZ", "AR", "CA", "CO", "CT", "DE", "DC", "FL", "GA", "HI", "ID", "IL", "IN", "IA", "KS",
+    "KY", "LA", "ME", "MD", "MA", "MI", "MN", "MS", "MO", "MT", "NE", "NV", "NH", "NJ", "NM", "NY", "NC",
+    "ND", "OH", "OK", "OR", "PA", "PR", "RI", "SC", "SD", "TN", "TX", "UT", "VT", "VA", "WA", "WV", "WI", "WY",
+]
+# Filings skew toward large states, as in the real feeds.
+STATE_WEIGHTS = np.array([5.0 if s in ("CA", "NY", "TX", "FL") else 2.0 if s in ("IL", "MA", "NJ", "PA", "WA") else 1.0
+                          for s in STATES])
+STATE_WEIGHTS /= STATE_WEIGHTS.sum()
+
+CHUNK_ROWS = 100_000
+
+
+@dataclass(frozen=True)
+class Scale:
+    advisers: int  # distinct ADV firms (each files 1-3 times)
+    form_d: int    # Form D offerings in the quarter
+    reg_cf: int    # Reg CF offerings in the quarter
+
+
+# Deal counts stay modest: materialized candidates grow with deals x advisers per state.
+SCALES = {
+    "1k": Scale(advisers=1_000, form_d=500, reg_cf=100),
+    "10k": Scale(advisers=10_000, form_d=1_000, reg_cf=250),
+    "100k": Scale(advisers=100_000, form_d=1_000, reg_cf=250),
+    "1m": Scale(advisers=1_000_000, form_d=500, reg_cf=100),
+}
+
+
+def _states(rng: np.random.Generator, n: int, blank_share: float = 0.0) -> np.ndarray:
+    states = rng.choice(STATES, size=n, p=STATE_WEIGHTS).astype(object)
+    if blank_share:
+        states[rng.random(n) < blank_share] = ""
+    return states
+
+
+def _money(rng: np.random.Generator, n: int, low: float, high: float, blank_share: float = 0.05) -> np.ndarray:
+    """Log-uniform amounts formatted like the feeds ("1,250,000"), with some blanks."""
+    values = np.exp(rng.uniform(np.log(low), np.log(high), size=n)).round(0)
+    text = np.array([f"{v:,.0f}" for v in values], dtype=object)
+    text[rng.random(n) < blank_share] = ""
+    return text
+
+
+def _flags(rng: np.random.Generator, n: int, p: float, yes: str = "true", no: str = "false") -> np.ndarray:
+    return np.where(rng.random(n) < p, yes, no).astype(object)
+
+
+def _dates(rng: np.random.Generator, n: int, start: datetime, days: int) -> pd.Series:
+    return pd.Series(pd.to_datetime(start) + pd.to_timedelta(rng.integers(0, days, size=n), unit="D"))
+
+
+def _write_tsv(path: Path, frame: pd.DataFrame) -> None:
+    frame.to_csv(path, sep="\t", index=False, quoting=csv.QUOTE_MINIMAL, lineterminator="\n")
+
+
+def write_form_d(root: Path, quarter: str, n: int, rng: np.random.Generator) -> int:
+    base = root / f"{quarter}_d"
+    base.mkdir(parents=True, exist_ok=True)
+    accession = np.array([f"{9_000_000_000 + i:010d}-25-{i % 999_999 + 1:06d}" for i in range(n)], dtype=object)
+    filed = _dates(rng, n, datetime(2025, 1, 1), 90)
+    _write_tsv(base / FD_FILES[0], pd.DataFrame({
+        "ACCESSIONNUMBER": accession,
+        "SUBMISSIONTYPE": np.where(rng.random(n) < 0.1, "D/A", "D"),
+        "FILING_DATE": filed.dt.strftime("%d-%b-%Y").str.upper(),
+        "FILE_NUM": [f"021-{400000 + i}" for i in range(n)],
+        "SIC_CODE": rng.integers(1000, 9999, size=n),
+        "TESTORLIVE": "LIVE",
+    }))
+    _write_tsv(base / FD_FILES[1], pd.DataFrame({
+        "ACCESSIONNUMBER": accession,
+        "IS_PRIMARYISSUER_FLAG": "YES",
+        "ISSUER_SEQ_KEY": 1,
+        "CIK": [f"{1_900_000 + i:010d}" for i in range(n)],
+        "ENTITYNAME": [f"SYNTHETIC ISSUER {i} LLC" for i in range(n)],
+        "STREET1": [f"{100 + i % 900} MAIN ST" for i in range(n)],
+        "STREET2": "",
+        "CITY": [f"CITY {i % 500}" for i in range(n)],
+        "STATEORCOUNTRY": _states(rng, n, blank_share=0.002),
+        "STATEORCOUNTRYDESCRIPTION": "",
+        "ZIPCODE": rng.integers(10000, 99999, size=n),
+        "ISSUERPHONENUMBER": "555-0100",
+        "JURISDICTIONOFINC": _states(rng, n),
+        "ISSUER_PREVIOUSNAME_1": "",
+        "ENTITYTYPE": rng.choice(["Limited Liability Company", "Corporation", "Limited Partnership"], size=n),
+        "YEAROFINC_VALUE_ENTERED": rng.integers(1990, 2025, size=n),
+    }))
+    pooled = rng.random(n) < 0.3
+    _write_tsv(base / FD_FILES[2], pd.DataFrame({
+        "ACCESSIONNUMBER": accession,
+        "INDUSTRYGROUPTYPE": rng.choice(["Pooled Investment Fund", "Other Technology", "Real Estate", "Biotechnology",
+                                         "Commercial Banking", "Other"], size=n),
+        "FEDERALEXEMPTIONS_ITEMS_LIST": rng.choice(["06b", "06c", "06b,3C.1", "04a5"], size=n),
+        "ISEQUITYTYPE": _flags(rng, n, 0.6),
+        "ISDEBTTYPE": _flags(rng, n, 0.2),
+        "ISPOOLEDINVESTMENTFUNDTYPE": np.where(pooled, "true", "false"),
+        "HASNONACCREDITEDINVESTORS": _flags(rng, n, 0.1),
+        "TOTALOFFERINGAMOUNT": np.where(rng.random(n) < 0.1, "Indefinite", _money(rng, n, 1e5, 5e8)),
+        "TOTALAMOUNTSOLD": _money(rng, n, 1e4, 1e8, blank_share=0.0),
+        "TOTALREMAINING": _money(rng, n, 0.5, 1e8),
+        "MINIMUMINVESTMENTACCEPTED": _money(rng, n, 1e3, 5e6, blank_share=0.2),
+        "SALE_DATE": _dates(rng, n, datetime(2024, 6, 1), 300).dt.strftime("%Y-%m-%d"),
+    }))
+    return n
+
+
+def write_reg_cf(root: Path, quarter: str, n: int, rng: np.random.Generator) -> int:
+    base = root / f"{quarter}_cf"
+    base.mkdir(parents=True, exist_ok=True)
+    accession = np.array([f"{8_000_000_000 + i:010d}-25-{i % 999_999 + 1:06d}" for i in range(n)], dtype=object)
+    states = _states(rng, n)
+    _write_tsv(base / CF_FILES[0], pd.DataFrame({
+        "ACCESSION_NUMBER": accession,
+        "SUBMISSION_TYPE": np.where(rng.random(n) < 0.2, "C/A", "C"),
+        "FILING_DATE": _dates(rng, n, datetime(2025, 1, 1), 90).dt.strftime("%Y%m%d"),
+        "CIK": [f"{1_800_000 + i:010d}" for i in range(n)],
+        "FILE_NUMBER": [f"020-{30000 + i}" for i in range(n)],
+        "PERIOD": "",
+    }))
+    _write_tsv(base / CF_FILES[1], pd.DataFrame({
+        "ACCESSION_NUMBER": accession,
+        "NAMEOFISSUER": [f"SYNTHETIC CROWDFUND {i} INC" for i in range(n)],
+        "LEGALSTATUSFORM": rng.choice(["Corporation", "Limited Liability Company"], size=n),
+        "JURISDICTIONORGANIZATION": states,
+        "STREET1": [f"{200 + i % 800} MARKET ST" for i in range(n)],
+        "STREET2": "",
+        "CITY": [f"CITY {i % 300}" for i in range(n)],
+        "STATEORCOUNTRY": states,
+        "ZIPCODE": rng.integers(10000, 99999, size=n),
+        "ISSUERWEBSITE": [f"https://issuer{i}.example" for i in range(n)],
+        "PROGRESSUPDATE": "",
+    }))
+    _write_tsv(base / CF_FILES[2], pd.DataFrame({
+        "ACCESSION_NUMBER": accession,
+        "SECURITYOFFEREDTYPE": rng.choice(["Common Stock", "Preferred Stock", "Debt", "SAFE", "Other"], size=n),
+        "NOOFSECURITYOFFERED": rng.integers(1000, 1_000_000, size=n),
+        "PRICE": np.array([f"{p:.2f}" for p in np.exp(rng.uniform(np.log(0.1), np.log(250), size=n))]),
+        "OFFERINGAMOUNT": _money(rng, n, 1e4, 1e6, blank_share=0.0),
+        "MAXIMUMOFFERINGAMOUNT": _money(rng, n, 1e5, 5e6),
+        "OVERSUBSCRIPTIONACCEPTED": np.where(rng.random(n) < 0.8, "Y", "N"),
+        "OVERSUBSCRIPTIONALLOCATIONTYPE": rng.choice(["Pro-rata basis", "First-come, first-served basis", "Other"], size=n),
+        "DEADLINEDATE": _dates(rng, n, datetime(2025, 4, 1), 365).dt.strftime("%Y-%m-%d"),
+        "CURRENTEMPLOYEES": rng.integers(0, 120, size=n),
+        "TOTALASSETMOSTRECENTFISCALYEAR": _money(rng, n, 1e3, 1e7),
+        "REVENUEMOSTRECENTFISCALYEAR": _money(rng, n, 1e3, 1e7),
+        "NETINCOMEMOSTRECENTFISCALYEAR": _money(rng, n, 1e3, 1e6),
+        "TOTALASSETPRIORFISCALYEAR": _money(rng, n, 1e3, 1e7),
+        "REVENUEPRIORFISCALYEAR": _money(rng, n, 1e3, 1e7),
+        "NETINCOMEPRIORFISCALYEAR": _money(rng, n, 1e3, 1e6),
+    }))
+    _write_tsv(base / CF_FILES[3], pd.DataFrame({
+        "ACCESSION_NUMBER": accession,
+        "ISSUEJURISDICTIONSECUROFFERING": states,
+    }))
+    return n
+
+
+def _adv_filings(rng: np.random.Generator, advisers: int) -> Iterator[pd.DataFrame]:
+    """(firm, FilingID, DateSubmitted) chunks: each firm files 1-3 times, later filings later."""
+    next_filing = 1_000_000
+    for start in range(0, advisers, CHUNK_ROWS):
+        firms = np.arange(start, min(start + CHUNK_ROWS, advisers))
+        copies = rng.choice([1, 2, 3], size=len(firms), p=[0.7, 0.2, 0.1])
+        firm = np.repeat(firms, copies)
+        ordinal = np.concatenate([np.arange(c) for c in copies])
+        filing = np.arange(next_filing, next_filing + len(firm))
+        next_filing += len(firm)
+        submitted = (pd.Timestamp(2022, 1, 1)
+                     + pd.to_timedelta(ordinal * 365 + rng.integers(0, 300, size=len(firm)), unit="D")
+                     + pd.to_timedelta(rng.integers(0, 86_400, size=len(firm)), unit="s"))
+        yield pd.DataFrame({"firm": firm, "FilingID": filing, "DateSubmitted": submitted})
+
+
+# Schedule R contact titles (as filed), mailbox names and the share of filings listing each.
+SCH_R_ROLES = [
+    ("Main Office", "office", 0.9),
+    ("Chief Executive Officer", "ceo", 0.6),
+    ("Chief Financial Officer", "cfo", 0.4),
+    ("Chief Technology Officer", "cto", 0.1),
+    ("Chief Compliance Officer", "compliance", 0.7),
+    ("General Office", "info", 0.3),
+    ("Operations", "ops", 0.1),
+]
+
+
+def write_adv(root: Path, advisers: int, rng: np.random.Generator) -> Dict[str, int]:
+    """ADV Base A/B and Schedule R CSVs, written in chunks so the 1m scale stays within memory."""
+    base = root / "adv-filing-data-synthetic"
+    base.mkdir(parents=True, exist_ok=True)
+    path_a = base / "IA_ADV_Base_A_synthetic.csv"
+    path_b = base / "IA_ADV_Base_B_synthetic.csv"
+    path_r = base / "IA_Firm_Download_SCH_R_synthetic.csv"
+    state_cols = [f"2-{s}" for s in STATES]
+    counts = {"filings": 0, "registrations": 0, "contacts": 0}
+    for i, filings in enumerate(_adv_filings(rng, advisers)):
+        n = len(filings)
+        firm = filings["firm"].to_numpy()
+        # HQ and size are per firm; RAUM drifts a little between a firm's filings.
+        firms, per_filing = np.unique(firm, return_inverse=True)
+        hq = rng.choice(STATES, size=len(firms), p=STATE_WEIGHTS)[per_filing]
+        firm_raum = np.exp(rng.uniform(np.log(1e6), np.log(1e12), size=len(firms)))
+        raum = (firm_raum[per_filing] * rng.uniform(0.9, 1.1, size=n)).round(0)
+        a = {col: np.full(n, "", dtype=object) for col in ADV_A_USECOLS}
+        a["FilingID"] = filings["FilingID"].to_numpy()
+        a["DateSubmitted"] = filings["DateSubmitted"].dt.strftime("%m/%d/%Y %I:%M:%S %p").to_numpy()
+        a["1A"] = np.array([f"SYNTHETIC ADVISER {f} LLC" for f in firm], dtype=object)
+        a["1F1-Street 1"] = np.array([f"{10 + f % 990} BROAD ST" for f in firm], dtype=object)
+        a["1F1-City"] = np.array([f"CITY {f % 700}" for f in firm], dtype=object)
+        a["1F1-State"] = hq
+        a["1F1-Country"] = "United States"
+        a["1F1-Postal"] = rng.integers(10000, 99999, size=n)
+        a["1F3"] = "555-0199"
+        a["1F5"] = np.array([f"https://adviser{f}.example" for f in firm], dtype=object)
+        a["5F2a"] = raum * 0.9
+        a["5F2b"] = raum * 0.1
+        a["5F2c"] = np.where(rng.random(n) < 0.05, np.nan, raum)
+        for col in ("5D1a", "5D1b", "5D1e", "5D1f"):
+            a[col] = np.where(rng.random(n) < 0.3, 0, rng.integers(1, 400, size=n))
+        for col in ("5D2a", "5D2b", "5D2c", "5D2g", "5D2h", "5D2j", "5D2k"):
+            a[col] = (raum * rng.uniform(0, 0.3, size=n)).round(0)
+        for col in ADV_A_BOOL_COLS:
+            a[col] = np.where(rng.random(n) < 0.15, "Y", "N")
+        a["9A2a"] = (raum * rng.uniform(0, 0.5, size=n)).round(0)
+        a["9A2b"] = (raum * rng.uniform(0, 0.2, size=n)).round(0)
+        frame_a = pd.DataFrame({"FilingID": a["FilingID"], "DateSubmitted": a["DateSubmitted"],
+                                "1E1": firm + 100_000})
+        frame_a = pd.concat([frame_a, pd.DataFrame({c: a[c] for c in ADV_A_USECOLS[2:]})], axis=1)
+        frame_a.to_csv(path_a, mode="w" if i == 0 else "a", header=i == 0, index=False, encoding="latin1")
+
+        # Registered in the HQ state plus ~1.5 others.
+        flags = rng.random((n, len(STATES))) < (1.5 / len(STATES))
+        flags[np.arange(n), [STATES.index(s) for s in hq]] = True
+        frame_b = pd.DataFrame(np.where(flags, "Y", "N"), columns=state_cols)
+        frame_b.insert(0, "FilingID", a["FilingID"])
+        frame_b.insert(1, "2A1", "Y")
+        frame_b.insert(2, "3A", "Limited Liability Company")
+        frame_b.insert(3, "3A-Other", "")
+        frame_b.to_csv(path_b, mode="w" if i == 0 else "a", header=i == 0, index=False, encoding="latin1")
+
+        # Schedule R: one row per contact; most filings list a main office plus a few officers.
+        roles = [(title, mailbox, rng.random(n) < p) for title, mailbox, p in SCH_R_ROLES]
+        frame_r = pd.concat([
+            pd.DataFrame({
+                "FilingID": a["FilingID"][listed],
+                "Contact Type": title,
+                "Email": [f"{mailbox}@adviser{f}.example" for f in firm[listed]],
+            })
+            for title, mailbox, listed in roles
+        ], ignore_index=True).sort_values("FilingID", kind="stable")
+        frame_r.to_csv(path_r, mode="w" if i == 0 else "a", header=i == 0, index=False, encoding="latin1")
+        counts["contacts"] += len(frame_r)
+        counts["filings"] += n
+        counts["registrations"] += int(flags.sum())
+    return counts
+
+
+def generate(root: Path, scale: Scale, seed: int = 0, quarter: str = "2025Q1") -> Dict[str, int]:
+    """Write every synthetic source under `root`; returns row counts per source."""
+    root.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    counts = {
+        "form_d": write_form_d(root, quarter, scale.form_d, rng),
+        "reg_cf": write_reg_cf(root, quarter, scale.reg_cf, rng),
+        "advisers": scale.advisers,
+    }
+    adv = write_adv(root, scale.advisers, rng)
+    counts["adv_filings"] = adv["filings"]
+    counts["adv_registrations"] = adv["registrations"]
+    counts["adv_contacts"] = adv["contacts"]
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write deterministic synthetic Form D, Reg CF and ADV files.")
+    parser.add_argument("data_root", type=Path, help="Directory to write the quarter/ADV folders into.")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="10k", help="Preset size (advisers).")
+    parser.add_argument("--advisers", type=int, help="Override the preset's adviser count.")
+    parser.add_argument("--form-d", type=int, help="Override the preset's Form D offering count.")
+    parser.add_argument("--reg-cf", type=int, help="Override the preset's Reg CF offering count.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed; same seed + scale = same files.")
+    args = parser.parse_args()
+
+    preset = SCALES[args.scale]
+    scale = Scale(
+        advisers=args.advisers or preset.advisers,
+        form_d=args.form_d or preset.form_d,
+        reg_cf=args.reg_cf or preset.reg_cf,
+    )
+    counts = generate(args.data_root, scale, seed=args.seed)
+    print(f"Wrote synthetic data to {args.data_root}: {counts}")
+
+
+if __name__ == "__main__":
+    main()
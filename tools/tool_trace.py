@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Per-tool-call instrumentation for agent runs.
+
+ToolTrace is an Agno tool hook (Agent(tool_hooks=[trace])) that records, for
+every tool call, its wall time, the rows it returned and the bytes handed
+back to the model. SQL calls (run_sql_query) additionally get the EXPLAIN
+QUERY PLAN of the statement that actually ran (see ToolTrace's rewrite), with full table scans ("SCAN <table>" without an index)
+and temp B-trees ("USE TEMP B-TREE FOR ORDER BY/GROUP BY/DISTINCT") flagged.
+trace.write() stores the calls plus a per-tool summary next to the run's
+markdown report (main.py: markdown/output_<timestamp>.trace.json).
+
+With a SlowQueryLog attached, SQL calls at or above its threshold are also
+appended to a JSONL file shared across runs; this module's CLI aggregates
+that file into the hottest normalized queries.
+
+Run from the repo root: python -m tools.tool_trace markdown/slow_queries.jsonl --top 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from agno.utils.log import log_debug
+from sqlalchemy import Engine
+
+from tools.cached_sql_tool import is_read_only, normalize_sql
+
+SQL_TOOLS = ("run_sql_query",)
+ROW_KEYS = ("advisers", "deals", "rows", "results", "data")
+
+
+def count_rows(result: Any) -> Optional[int]:
+    """Rows in a tool result: the length of a JSON list, or of a known list field in a JSON object."""
+    if isinstance(result, str):
+        try:
+            result = json.loads(result)
+        except ValueError:
+            return None
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, dict):
+        for key in ROW_KEYS:
+            if isinstance(result.get(key), list):
+                return len(result[key])
+    return None
+
+
+def explain_plan(engine: Engine, query: str) -> List[str]:
+    """EXPLAIN QUERY PLAN detail lines, indented by depth in the plan tree."""
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {query.strip().rstrip(';')}").fetchall()
+    depth: Dict[int, int] = {0: -1}
+    lines = []
+    for node_id, parent, _, detail in rows:
+        depth[node_id] = depth.get(parent, -1) + 1
+        lines.append("  " * depth[node_id] + detail)
+    return lines
+
+
+def plan_flags(plan: List[str]) -> Dict[str, List[str]]:
+    """Full scans (SCAN without an index) and temp B-trees in a query plan."""
+    details = [line.strip() for line in plan]
+    return {
+        "full_scans": [d for d in details if d.startswith("SCAN ") and " INDEX " not in d
+                       and not d.startswith("SCAN CONSTANT ROW")],
+        "temp_btrees": [d for d in details if "USE TEMP B-TREE" in d],
+    }
+
+
+class SlowQueryLog:
+    """Appends SQL calls slower than threshold_ms to a JSONL file shared across runs."""
+
+    def __init__(self, path: Path, threshold_ms: float = 250.0):
+        self.path = Path(path)
+        self.threshold_ms = threshold_ms
+        self._lock = threading.Lock()
+
+    def record(self, call: Dict[str, Any], run: Optional[str] = None) -> None:
+        if call.get("wall_ms", 0.0) < self.threshold_ms:
+            return
+        entry = {
+            "ts": datetime.now().isoformat(timespec="seconds"),
+            "run": run,
+            **{key: call.get(key) for key in ("query", "executed", "normalized", "wall_ms", "rows", "bytes",
+                                              "plan", "full_scans", "temp_btrees")},
+        }
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as handle:
+                handle.write(json.dumps(entry, default=str) + "\n")
+
+
+class ToolTrace:
+    """
+    Agno tool hook recording every tool call of the agents it is attached to.
+
+    One instance per run: pass it to build_agent(tool_hooks=[trace]) and call
+    write() once the run finishes. plan_engine (usually the SQL toolkit's
+    db_engine) is used for EXPLAIN QUERY PLAN; plans are captured after the
+    call returns, so they never count towards its wall time, and are reused
+    for repeats of the same normalized query. rewrite (GuardedSQLTools.rewrite)
+    maps the agent's query to the statement the toolkit executed; that one is
+    explained and recorded as "executed" when it differs.
+    """
+
+    def __init__(
+        self,
+        plan_engine: Optional[Engine] = None,
+        slow_log: Optional[SlowQueryLog] = None,
+        run: Optional[str] = None,
+        rewrite: Optional[Callable[[str], str]] = None,
+    ):
+        self.plan_engine = plan_engine
+        self.rewrite = rewrite
+        self.slow_log = slow_log
+        self.run = run
+        self.calls: List[Dict[str, Any]] = []
+        self._plans: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+        self.started_at = datetime.now().isoformat(timespec="seconds")
+        self._start = time.perf_counter()
+
+    def reset(self) -> None:
+        """Forget recorded calls (e.g. before a retry) and restart the run clock."""
+        with self._lock:
+            self.calls.clear()
+        self.started_at = datetime.now().isoformat(timespec="seconds")
+        self._start = time.perf_counter()
+
+    def __call__(self, function_name: str, function_call: Callable[..., Any], arguments: Dict[str, Any]) -> Any:
+        call: Dict[str, Any] = {
+            "tool": function_name,
+            "arguments": arguments,
+            "offset_ms": round((time.perf_counter() - self._start) * 1000, 3),
+        }
+        start = time.perf_counter()
+        try:
+            result = function_call(**arguments)
+        except Exception as exc:
+            call.update(status="error", error=f"{type(exc).__name__}: {exc}")
+            raise
+        else:
+            text = result if isinstance(result, str) else json.dumps(result, default=str)
+            call.update(
+                status="error" if text.startswith(("Error", '{"ok": false')) else "ok",
+                rows=count_rows(result),
+                bytes=len(text.encode("utf-8")),
+            )
+            return result
+        finally:
+            call["wall_ms"] = round((time.perf_counter() - start) * 1000, 3)
+            if function_name in SQL_TOOLS and arguments.get("query"):
+                self._add_plan(call, arguments["query"])
+            with self._lock:
+                self.calls.append(call)
+            if self.slow_log is not None and "query" in call:
+                self.slow_log.record(call, self.run)
+
+    def _add_plan(self, call: Dict[str, Any], query: str) -> None:
+        call["query"] = query
+        call["normalized"] = normalized = normalize_sql(query)
+        if self.plan_engine is None or not is_read_only(query) or normalized.startswith("explain"):
+            return
+        executed = query
+        if self.rewrite is not None:
+            try:
+                executed = self.rewrite(query)
+            except Exception as exc:
+                log_debug(f"Query rewrite failed: {exc}")
+            if executed != query.strip():
+                call["executed"] = executed
+        key = normalize_sql(executed)
+        plan = self._plans.get(key)
+        if plan is None:
+            try:
+                plan = explain_plan(self.plan_engine, executed)
+            except Exception as exc:  # the call itself already reported the SQL error
+                log_debug(f"EXPLAIN QUERY PLAN failed: {exc}")
+                return
+            self._plans[key] = plan
+        call["plan"] = plan
+        call.update(plan_flags(plan))
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = list(self.calls)
+        wall_ms = (time.perf_counter() - self._start) * 1000
+        tools: Dict[str, Dict[str, Any]] = defaultdict(lambda: {"calls": 0, "wall_ms": 0.0, "rows": 0, "bytes": 0})
+        for call in calls:
+            stats = tools[call["tool"]]
+            stats["calls"] += 1
+            stats["wall_ms"] = round(stats["wall_ms"] + call["wall_ms"], 3)
+            stats["rows"] += call.get("rows") or 0
+            stats["bytes"] += call.get("bytes") or 0
+        # Tools may run concurrently, so time outside them is wall time minus their union, not their sum.
+        spans = sorted((c["offset_ms"], c["offset_ms"] + c["wall_ms"]) for c in calls)
+        tool_ms, covered_to = 0.0, 0.0
+        for begin, end in spans:
+            tool_ms += max(0.0, end - max(begin, covered_to))
+            covered_to = max(covered_to, end)
+        return {
+            "wall_ms": round(wall_ms, 3),
+            "tool_ms": round(tool_ms, 3),
+            "model_ms": round(max(0.0, wall_ms - tool_ms), 3),  # model round trips + framework overhead
+            "calls": len(calls),
+            "bytes": sum(c.get("bytes") or 0 for c in calls),
+            "errors": sum(c.get("status") == "error" for c in calls),
+            "full_scans": sum(bool(c.get("full_scans")) for c in calls),
+            "temp_btrees": sum(bool(c.get("temp_btrees")) for c in calls),
+            "tools": dict(tools),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        summary = self.summary()
+        with self._lock:
+            calls = list(self.calls)
+        return {"run": self.run, "started_at": self.started_at, "summary": summary, "calls": calls}
+
+    def write(self, path: Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), indent=2, default=str), encoding="utf-8")
+        return path
+
+
+def aggregate_slow_log(path: Path) -> List[Dict[str, Any]]:
+    """One row per normalized query in a slow-query log, with call counts and latency totals."""
+    groups: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            if line.strip():
+                entry = json.loads(line)
+                groups[entry.get("normalized") or normalize_sql(entry["query"])].append(entry)
+    rows = []
+    for normalized, entries in groups.items():
+        latencies = sorted(e["wall_ms"] for e in entries)
+        rows.append({
+            "query": normalized,
+            "calls": len(entries),
+            "runs": len({e.get("run") for e in entries}),
+            "total_ms": round(sum(latencies), 3),
+            "p50_ms": latencies[len(latencies) // 2],
+            "max_ms": latencies[-1],
+            "rows": max((e.get("rows") or 0) for e in entries),
+            "full_scans": sorted({s for e in entries for s in e.get("full_scans") or []}),
+            "temp_btrees": sorted({s for e in entries for s in e.get("temp_btrees") or []}),
+            "last_seen": max(e["ts"] for e in entries),
+        })
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Aggregate a slow-query log into the hottest queries.")
+    parser.add_argument("log", type=Path, help="Slow-query JSONL written by SlowQueryLog.")
+    parser.add_argument("--top", type=int, default=20, help="Queries to show.")
+    parser.add_argument("--sort", choices=["total_ms", "calls", "max_ms", "p50_ms"], default="total_ms")
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of text.")
+    args = parser.parse_args()
+
+    rows = sorted(aggregate_slow_log(args.log), key=lambda r: r[args.sort], reverse=True)[:args.top]
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    for row in rows:
+        flags = ", ".join(row["full_scans"] + row["temp_btrees"]) or "no scans/temp b-trees"
+        print(f"{row['total_ms']:>10.1f} ms total  {row['calls']:>4} calls  p50 {row['p50_ms']:.1f} ms  "
+              f"max {row['max_ms']:.1f} ms  {row['runs']} runs")
+        print(f"    {row['query'][:200]}")
+        print(f"    {flags}")
+
+
+if __name__ == "__main__":
+    main()